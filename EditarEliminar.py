@@ -1,180 +1,470 @@
+import logging
 import sqlite3
-
-DATABASE_NAME = "registro_asistencia.db"
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+
+import almacenamiento
+from cache_lru import LRUCache
+from conexiones import ConnectionPool
+
+DATABASE_NAME = almacenamiento.DB_NAME
+
+CAMPOS_BUSQUEDA = ['nombre', 'apellido', 'dni', 'fecha_nacimiento', 'genero']
+CAMPOS_TEXTO_COMPLETO = ['nombre', 'apellido', 'dni']  # Columnas del índice FTS5 individuos_fts
+MODOS_BUSQUEDA = ('texto', 'prefijo', 'exacto')
+# Columnas que se pueden modificar con update_individuo / bulk_update_individuos (en este orden)
+CAMPOS_EDITABLES = ['nombre', 'apellido', 'dni', 'fecha_nacimiento', 'genero', 'email', 'rol', 'estado']
+TAMANO_PAGINA = 20  # Individuos por página en el listado de la consola
+LOTE_IDS = 500  # IDs por consulta "WHERE id IN (...)"
+SIN_CAMBIO = object()  # Valor por defecto de update_individuo: el campo no se toca
+_NO_CACHEADO = object()
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=None)
+def _sql_update(columnas):
+    """
+    UPDATE para un conjunto de columnas. Siempre el mismo texto para las mismas columnas, así la
+    caché de sentencias de cada conexión (conexiones.CACHED_STATEMENTS) reutiliza la ya preparada.
+    """
+    return f"UPDATE individuos SET {', '.join(f'{c} = ?' for c in columnas)} WHERE id = ?"
+
+def _mensaje_integridad(error, cambios):
+    """Traduce un IntegrityError de individuos a un mensaje para el usuario."""
+    mensaje = str(error)
+    if "individuos.dni" in mensaje and "UNIQUE" in mensaje:
+        return f"El DNI '{cambios.get('dni')}' ya está en uso por otro individuo."
+    if "individuos.email" in mensaje and "UNIQUE" in mensaje:
+        return f"El email '{cambios.get('email')}' ya está en uso por otro individuo."
+    if "NOT NULL" in mensaje:
+        return f"El campo '{mensaje.rsplit('.', 1)[-1]}' no puede quedar vacío."
+    return mensaje
 
 class DatabaseManager:
-    def __init__(self, db_name=DATABASE_NAME):
+    def __init__(self, db_name=DATABASE_NAME, pool_size=5, pragmas=None, cache_size=1024, cache_ttl=300.0):
         self.db_name = db_name
+        self.pool = ConnectionPool(db_name, size=pool_size, pragmas=pragmas)
+        # Caché de búsquedas por ID y por DNI: claves ('id', id) y ('dni', dni)
+        self.cache = LRUCache(maxsize=cache_size, ttl=cache_ttl)
+        # Sube con cada invalidación: una lectura que empezó antes no guarda en la caché lo que leyó
+        self._generacion = 0
+        self._cache_lock = threading.Lock()
+        self._tx = threading.local()
         self._create_table()
 
+    @contextmanager
     def _get_connection(self):
-        """Obtiene una conexión a la base de datos."""
-        conn = sqlite3.connect(self.db_name)
-        conn.row_factory = sqlite3.Row # Para acceder a las columnas por nombre
-        return conn
+        """Obtiene una conexión del pool (la misma si el hilo ya tiene una)."""
+        with self.pool.connection() as conn:
+            yield conn
+
+    def _commit(self, conn):
+        """Confirma los cambios, salvo que estemos dentro de transaction()."""
+        if not getattr(self._tx, "depth", 0):
+            conn.commit()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Agrupa varias operaciones en una sola conexión y una sola transacción.
+        Ejemplo:
+            with db_manager.transaction():
+                db_manager.add_individuo(...)
+                db_manager.update_individuo(...)
+        """
+        with self._get_connection() as conn:
+            depth = getattr(self._tx, "depth", 0)
+            self._tx.depth = depth + 1
+            if depth == 0:
+                self._tx.invalidated = []
+                if not conn.in_transaction:
+                    # Sin BEGIN explícito, el primer SAVEPOINT abriría (y su RELEASE confirmaría)
+                    # la transacción: cada paso quedaría guardado por separado
+                    conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                if depth == 0:
+                    conn.commit()
+            except BaseException:
+                if depth == 0:
+                    conn.rollback()
+                raise
+            finally:
+                self._tx.depth = depth
+                if depth == 0:
+                    # Otro hilo pudo haber cacheado el valor viejo antes del commit
+                    self._quitar_de_cache(*self._tx.invalidated)
+
+    def _quitar_de_cache(self, *keys):
+        with self._cache_lock:
+            self._generacion += 1
+            self.cache.invalidate(*keys)
+
+    def _invalidate(self, *keys):
+        """Quita de la caché las entradas afectadas por un cambio (de nuevo al terminar la transacción)."""
+        self._quitar_de_cache(*keys)
+        if getattr(self._tx, "depth", 0):
+            self._tx.invalidated.extend(keys)
+
+    def _cache_individuo(self, individuo, generacion, *keys):
+        """
+        Guarda un individuo (o None) leído cuando la caché iba por `generacion`, salvo dentro de
+        una transacción sin confirmar o si mientras tanto hubo una invalidación (puede estar viejo).
+        """
+        if getattr(self._tx, "depth", 0):
+            return
+        with self._cache_lock:
+            if generacion != self._generacion:
+                return
+            for key in keys:
+                self.cache.set(key, individuo)
+            if individuo:
+                self.cache.set(('id', individuo['id']), individuo)
+                self.cache.set(('dni', individuo['dni']), individuo)
+
+    def cache_stats(self):
+        """Aciertos y fallos de la caché de búsquedas por ID y DNI."""
+        return self.cache.stats()
+
+    def close(self):
+        """Cierra las conexiones del pool."""
+        self.pool.close()
 
     def _create_table(self):
-        """Crea la tabla 'individuos' si no existe."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS individuos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nombre TEXT NOT NULL,
-                apellido TEXT NOT NULL,
-                dni TEXT UNIQUE NOT NULL,
-                fecha_nacimiento TEXT, -- YYYY-MM-DD
-                genero TEXT
-            )
-        ''')
-        conn.commit()
-        conn.close()
+        """Crea o actualiza el esquema unificado (individuos, asistencia, índices) si hace falta."""
+        with self._get_connection() as conn:
+            almacenamiento.asegurar_esquema(self.db_name, conn)
         print(f"Tabla 'individuos' asegurada en {self.db_name}")
 
     # --- Funciones para la tarea de "Alta de Individuo" (para tu compañero) ---
     def add_individuo(self, nombre, apellido, dni, fecha_nacimiento=None, genero=None):
         """Agrega un nuevo individuo a la base de datos."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute('''
-                INSERT INTO individuos (nombre, apellido, dni, fecha_nacimiento, genero)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (nombre, apellido, dni, fecha_nacimiento, genero))
-            conn.commit()
-            print(f"Individuo '{nombre} {apellido}' (DNI: {dni}) agregado exitosamente.")
-            return cursor.lastrowid # Retorna el ID del nuevo individuo
-        except sqlite3.IntegrityError:
-            print(f"Error: Ya existe un individuo con el DNI '{dni}'.")
-            return None
-        except Exception as e:
-            print(f"Error al agregar individuo: {e}")
-            return None
-        finally:
-            conn.close()
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute('''
+                    INSERT INTO individuos (nombre, apellido, dni, fecha_nacimiento, genero)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (nombre, apellido, dni, fecha_nacimiento, genero))
+                self._commit(conn)
+                # Puede haber quedado cacheado que el DNI (o el ID) no existía
+                self._invalidate(('dni', dni), ('id', cursor.lastrowid))
+                print(f"Individuo '{nombre} {apellido}' (DNI: {dni}) agregado exitosamente.")
+                return cursor.lastrowid # Retorna el ID del nuevo individuo
+            except sqlite3.IntegrityError:
+                baja = cursor.execute("SELECT id FROM individuos WHERE dni = ? AND eliminado_en IS NOT NULL", (dni,)).fetchone()
+                if baja:
+                    print(f"Error: El DNI '{dni}' pertenece al individuo dado de baja con ID {baja['id']} (se puede restaurar).")
+                else:
+                    print(f"Error: Ya existe un individuo con el DNI '{dni}'.")
+                return None
+            except Exception:
+                # Con la traza completa en el log (ver instrumentacion.configurar_logs)
+                logger.exception("Error al agregar individuo con DNI %s", dni)
+                return None
+
+    def buscar_posibles_duplicados(self, nombre, apellido, dni=None, fecha_nacimiento=None, limite=5):
+        """
+        Individuos vigentes que podrían ser la misma persona (nombre parecido sin importar acentos,
+        DNI casi igual, misma fecha de nacimiento). Cada uno trae 'puntaje' y 'motivos'.
+        """
+        import duplicados  # Solo hace falta en las altas: no se carga al abrir la consola
 
-    # --- Funciones para la tarea de "Edición y Eliminación de Individuos" (TU TAREA) ---
-    def update_individuo(self, individuo_id, nombre=None, apellido=None, dni=None, fecha_nacimiento=None, genero=None):
-        """Actualiza los datos de un individuo existente."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        set_clauses = []
-        params = []
+        candidatos = []
+        for candidato in duplicados.posibles_duplicados(f"{nombre} {apellido}", dni, fecha_nacimiento, self.db_name, limite):
+            # El índice compartido puede no haberse enterado todavía de una baja
+            individuo = self.get_individuo_by_id(candidato['clave'])
+            if individuo:
+                individuo.update(puntaje=candidato['puntaje'], motivos=candidato['motivos'])
+                candidatos.append(individuo)
+        return candidatos
 
-        if nombre:
-            set_clauses.append("nombre = ?")
-            params.append(nombre)
-        if apellido:
-            set_clauses.append("apellido = ?")
-            params.append(apellido)
-        if dni:
-            # Si se actualiza el DNI, debe ser único
-            set_clauses.append("dni = ?")
-            params.append(dni)
-        if fecha_nacimiento:
-            set_clauses.append("fecha_nacimiento = ?")
-            params.append(fecha_nacimiento)
-        if genero:
-            set_clauses.append("genero = ?")
-            params.append(genero)
-
-        if not set_clauses:
+    # --- Funciones para la tarea de "Edición y Eliminación de Individuos" (TU TAREA) ---
+    def update_individuo(self, individuo_id, nombre=SIN_CAMBIO, apellido=SIN_CAMBIO, dni=SIN_CAMBIO,
+                         fecha_nacimiento=SIN_CAMBIO, genero=SIN_CAMBIO):
+        """
+        Actualiza los datos de un individuo existente. Solo se modifican los campos indicados;
+        pasar None borra el valor (por ejemplo, genero=None).
+        """
+        cambios = {campo: valor for campo, valor in (
+            ('nombre', nombre), ('apellido', apellido), ('dni', dni),
+            ('fecha_nacimiento', fecha_nacimiento), ('genero', genero),
+        ) if valor is not SIN_CAMBIO}
+        if not cambios:
             print("No se proporcionaron datos para actualizar.")
             return False
 
-        params.append(individuo_id)
-        query = f"UPDATE individuos SET {', '.join(set_clauses)} WHERE id = ?"
+        resultado = self.bulk_update_individuos([dict(cambios, id=individuo_id)])[individuo_id]
+        if resultado['resultado'] == 'actualizado':
+            print(f"Individuo con ID {individuo_id} actualizado exitosamente.")
+            return True
+        if resultado['resultado'] == 'no_encontrado':
+            print(f"No se encontró un individuo con ID {individuo_id}.")
+        else:
+            print(f"Error al actualizar individuo con ID {individuo_id}: {resultado['error']}")
+        return False
 
-        try:
-            cursor.execute(query, tuple(params))
-            conn.commit()
-            if cursor.rowcount > 0:
-                print(f"Individuo con ID {individuo_id} actualizado exitosamente.")
-                return True
-            else:
-                print(f"No se encontró un individuo con ID {individuo_id}.")
-                return False
-        except sqlite3.IntegrityError:
-            print(f"Error: El DNI '{dni}' ya está en uso por otro individuo.")
-            return False
-        except Exception as e:
-            print(f"Error al actualizar individuo con ID {individuo_id}: {e}")
-            return False
-        finally:
-            conn.close()
+    def bulk_update_individuos(self, actualizaciones):
+        """
+        Aplica muchas actualizaciones parciales en una sola transacción.
+        `actualizaciones` es una lista de diccionarios {'id': ..., campo: valor, ...}; un valor None
+        borra el campo. Las filas que cambian las mismas columnas se agrupan y se ejecutan con
+        executemany sobre la misma sentencia preparada.
+        Devuelve {id: {'resultado': 'actualizado' | 'no_encontrado' | 'sin_cambios' | 'error', 'error': ...}};
+        los individuos dados de baja cuentan como no encontrados.
+        """
+        resultados = {}
+        pendientes = {}
+        for cambios in actualizaciones:
+            cambios = dict(cambios)
+            individuo_id = cambios.pop('id', None)
+            if not isinstance(individuo_id, int) or isinstance(individuo_id, bool):
+                raise ValueError(f"Cada actualización necesita un 'id' numérico: {cambios!r}")
+            desconocidos = set(cambios) - set(CAMPOS_EDITABLES)
+            if desconocidos:
+                resultados[individuo_id] = {'resultado': 'error', 'error': f"Campos desconocidos: {', '.join(sorted(desconocidos))}."}
+                continue
+            # Si un mismo ID aparece varias veces, gana el último valor de cada campo
+            pendientes.setdefault(individuo_id, {}).update(cambios)
+
+        for individuo_id, cambios in list(pendientes.items()):
+            if individuo_id in resultados:
+                # Una de sus actualizaciones era inválida: no se aplica ninguna
+                del pendientes[individuo_id]
+            elif not cambios:
+                resultados[individuo_id] = {'resultado': 'sin_cambios'}
+                del pendientes[individuo_id]
+        if not pendientes:
+            return resultados
+
+        with self.transaction() as conn:
+            # DNI actuales: sirven para detectar IDs inexistentes y para invalidar la caché
+            dni_anterior = {}
+            ids = list(pendientes)
+            for inicio in range(0, len(ids), LOTE_IDS):
+                parte = ids[inicio:inicio + LOTE_IDS]
+                marcadores = ", ".join("?" * len(parte))
+                for fila in conn.execute(f"SELECT id, dni FROM individuos WHERE id IN ({marcadores}) AND eliminado_en IS NULL", parte):
+                    dni_anterior[fila['id']] = fila['dni']
+
+            grupos = {}
+            for individuo_id, cambios in pendientes.items():
+                if individuo_id not in dni_anterior:
+                    resultados[individuo_id] = {'resultado': 'no_encontrado'}
+                    continue
+                columnas = tuple(campo for campo in CAMPOS_EDITABLES if campo in cambios)
+                grupos.setdefault(columnas, []).append(individuo_id)
+
+            for columnas, ids_grupo in grupos.items():
+                query = _sql_update(columnas)
+                params = [[pendientes[i][campo] for campo in columnas] + [i] for i in ids_grupo]
+                conn.execute("SAVEPOINT bulk_update")
+                try:
+                    conn.executemany(query, params)
+                    conn.execute("RELEASE bulk_update")
+                    fallidos = {}
+                except sqlite3.IntegrityError:
+                    # Se deshace el grupo y se reintenta fila por fila para saber cuáles fallan
+                    conn.execute("ROLLBACK TO bulk_update")
+                    conn.execute("RELEASE bulk_update")
+                    fallidos = {}
+                    for individuo_id, fila in zip(ids_grupo, params):
+                        try:
+                            conn.execute(query, fila)
+                        except sqlite3.IntegrityError as e:
+                            fallidos[individuo_id] = _mensaje_integridad(e, pendientes[individuo_id])
+
+                for individuo_id in ids_grupo:
+                    if individuo_id in fallidos:
+                        resultados[individuo_id] = {'resultado': 'error', 'error': fallidos[individuo_id]}
+                        continue
+                    resultados[individuo_id] = {'resultado': 'actualizado'}
+                    # El DNI viejo ya no existe y el nuevo pudo estar cacheado como inexistente
+                    claves = [('id', individuo_id), ('dni', dni_anterior[individuo_id])]
+                    if 'dni' in pendientes[individuo_id]:
+                        claves.append(('dni', pendientes[individuo_id]['dni']))
+                    self._invalidate(*claves)
+        return resultados
 
     def delete_individuo(self, individuo_id):
-        """Elimina un individuo de la base de datos por su ID."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        try:
-            # OPCIONAL: Antes de eliminar, podrías verificar si hay asistencias
-            # relacionadas y decidir qué hacer (eliminar en cascada, anular, etc.)
-            # Por simplicidad, aquí solo eliminamos el individuo.
-            # Una tabla de asistencias podría tener una clave foránea que maneje esto.
+        """
+        Da de baja a un individuo por su ID: queda con la fecha de baja, y sus asistencias también.
+        Es reversible con restaurar_individuo(), que lo deja como estaba (la baja no cambia su
+        `estado`); compactacion.py lo borra definitivamente pasado el plazo de retención.
+        """
+        return self._cambiar_baja(individuo_id, eliminar=True)
 
-            cursor.execute("DELETE FROM individuos WHERE id = ?", (individuo_id,))
-            conn.commit()
-            if cursor.rowcount > 0:
-                print(f"Individuo con ID {individuo_id} eliminado exitosamente.")
-                return True
-            else:
-                print(f"No se encontró un individuo con ID {individuo_id}.")
+    def restaurar_individuo(self, individuo_id):
+        """Deshace la baja de un individuo (y de las asistencias que se dieron de baja con él)."""
+        return self._cambiar_baja(individuo_id, eliminar=False)
+
+    def _cambiar_baja(self, individuo_id, eliminar):
+        if eliminar:
+            query = "UPDATE individuos SET eliminado_en = ? WHERE id = ? AND eliminado_en IS NULL"
+            params = (almacenamiento.ahora(), individuo_id)
+            accion, condicion = "eliminado", "eliminado_en IS NULL"
+        else:
+            query = "UPDATE individuos SET eliminado_en = NULL WHERE id = ? AND eliminado_en IS NOT NULL"
+            params = (individuo_id,)
+            accion, condicion = "restaurado", "eliminado_en IS NOT NULL"
+
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                # Las asistencias del individuo siguen su baja o restauración (triggers de almacenamiento.py)
+                anterior = cursor.execute(f"SELECT dni FROM individuos WHERE id = ? AND {condicion}", (individuo_id,)).fetchone()
+                cursor.execute(query, params)
+                self._commit(conn)
+                self._invalidate(('id', individuo_id))
+                if anterior:
+                    self._invalidate(('dni', anterior['dni']))
+                if cursor.rowcount > 0:
+                    print(f"Individuo con ID {individuo_id} {accion} exitosamente.")
+                    return True
+                else:
+                    estado = "vigente" if eliminar else "dado de baja"
+                    print(f"No se encontró un individuo {estado} con ID {individuo_id}.")
+                    return False
+            except Exception:
+                logger.exception("Error al actualizar la baja del individuo con ID %s", individuo_id)
                 return False
-        except Exception as e:
-            print(f"Error al eliminar individuo con ID {individuo_id}: {e}")
-            return False
-        finally:
-            conn.close()
 
     # --- Funciones para la tarea de "Registro de Asistencia" y "Filtros" ---
-    def get_individuo_by_id(self, individuo_id):
-        """Obtiene un individuo por su ID."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM individuos WHERE id = ?", (individuo_id,))
-        individuo = cursor.fetchone()
-        conn.close()
-        return dict(individuo) if individuo else None
-
-    def get_individuo_by_dni(self, dni):
-        """Obtiene un individuo por su DNI."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM individuos WHERE dni = ?", (dni,))
-        individuo = cursor.fetchone()
-        conn.close()
-        return dict(individuo) if individuo else None
+    def get_individuo_by_id(self, individuo_id, incluir_eliminados=False):
+        """Obtiene un individuo vigente por su ID (primero busca en la caché)."""
+        if incluir_eliminados:
+            with self._get_connection() as conn:
+                row = conn.execute("SELECT * FROM individuos WHERE id = ?", (individuo_id,)).fetchone()
+            return dict(row) if row else None
+        individuo = self.cache.get(('id', individuo_id), _NO_CACHEADO)
+        if individuo is _NO_CACHEADO:
+            generacion = self._generacion  # Antes de leer: si se invalida en el medio, no se cachea
+            with self._get_connection() as conn:
+                row = conn.execute("SELECT * FROM individuos WHERE id = ? AND eliminado_en IS NULL", (individuo_id,)).fetchone()
+            individuo = dict(row) if row else None
+            self._cache_individuo(individuo, generacion, ('id', individuo_id))
+        return dict(individuo) if individuo else None # Copia: quien llama puede modificarla
+
+    def get_individuo_by_dni(self, dni, incluir_eliminados=False):
+        """Obtiene un individuo vigente por su DNI (primero busca en la caché)."""
+        if incluir_eliminados:
+            with self._get_connection() as conn:
+                row = conn.execute("SELECT * FROM individuos WHERE dni = ?", (dni,)).fetchone()
+            return dict(row) if row else None
+        individuo = self.cache.get(('dni', dni), _NO_CACHEADO)
+        if individuo is _NO_CACHEADO:
+            generacion = self._generacion
+            with self._get_connection() as conn:
+                row = conn.execute("SELECT * FROM individuos WHERE dni = ? AND eliminado_en IS NULL", (dni,)).fetchone()
+            individuo = dict(row) if row else None
+            self._cache_individuo(individuo, generacion, ('dni', dni))
+        return dict(individuo) if individuo else None # Copia: quien llama puede modificarla
 
     def get_all_individuos(self):
         """Obtiene todos los individuos registrados."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM individuos ORDER BY apellido, nombre")
-        individuos = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return individuos
-
-    def get_individuos_by_criteria(self, **kwargs):
+        return list(self.iter_individuos())
+
+    def _build_criteria(self, criterios, modo, incluir_eliminados=False):
+        """
+        Traduce los criterios de búsqueda a cláusulas WHERE que aprovechan los índices.
+        Devuelve (lista de cláusulas, lista de parámetros).
+        """
+        if modo not in MODOS_BUSQUEDA:
+            raise ValueError(f"Modo de búsqueda inválido: '{modo}'. Opciones: {', '.join(MODOS_BUSQUEDA)}")
+
+        # Sin los dados de baja: así las consultas usan los índices parciales de filas vigentes
+        clauses = [] if incluir_eliminados else ["eliminado_en IS NULL"]
+        params = []
+        terminos_fts = []
+        for key, value in criterios.items():
+            if key not in CAMPOS_BUSQUEDA or value is None or value == "":
+                continue
+            value = str(value)
+            collate = " COLLATE NOCASE" if key == "genero" else ""
+            if modo == "texto" and key in CAMPOS_TEXTO_COMPLETO:
+                # Cada palabra se busca como prefijo de alguna palabra de la columna
+                for palabra in value.split():
+                    palabra = palabra.replace('"', '""')
+                    terminos_fts.append(f'{key} : "{palabra}"*')
+            elif modo == "exacto":
+                clauses.append(f"{key} = ?{collate}")
+                params.append(value)
+            else:
+                # Prefijo como rango: usa el índice B-tree, a diferencia de LIKE '%...%'
+                clauses.append(f"{key} >= ?{collate} AND {key} < ?{collate}")
+                params.extend([value, value + "\U0010ffff"])
+
+        if terminos_fts:
+            clauses.append("id IN (SELECT rowid FROM individuos_fts WHERE individuos_fts MATCH ?)")
+            params.append(" AND ".join(terminos_fts))
+        return clauses, params
+
+    def get_individuos_by_criteria(self, modo="texto", incluir_eliminados=False, **kwargs):
         """
         Obtiene individuos basados en criterios de búsqueda (para el compañero de filtros).
         Ejemplo: get_individuos_by_criteria(genero='Masculino', nombre='Juan')
+
+        Modos de búsqueda:
+          - 'texto' (por defecto): nombre, apellido y DNI por palabras con el índice FTS5,
+            sin distinguir mayúsculas ni acentos; el resto de los campos por prefijo.
+          - 'prefijo': cada campo empieza con el valor indicado.
+          - 'exacto': cada campo es igual al valor indicado.
+        Los individuos dados de baja se omiten salvo con incluir_eliminados=True.
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        return list(self.iter_individuos(modo=modo, incluir_eliminados=incluir_eliminados, **kwargs))
 
-        query = "SELECT * FROM individuos WHERE 1=1"
-        params = []
-        for key, value in kwargs.items():
-            if key in ['nombre', 'apellido', 'dni', 'fecha_nacimiento', 'genero']:
-                query += f" AND {key} LIKE ?"
-                params.append(f"%{value}%") # Permite búsqueda parcial
+    def get_individuos_page(self, page_size=50, cursor=None, modo="texto", incluir_eliminados=False, **kwargs):
+        """
+        Obtiene una página de individuos ordenados por apellido, nombre e id (paginación por clave).
+        `cursor` es el valor devuelto por la página anterior (None para la primera página).
+        Devuelve (individuos, cursor_siguiente); cursor_siguiente es None en la última página.
+        """
+        clauses, params = self._build_criteria(kwargs, modo, incluir_eliminados)
+        if cursor is not None:
+            # Continúa justo después de la última fila vista, sin OFFSET: recorre solo el índice
+            clauses.append("(apellido, nombre, id) > (?, ?, ?)")
+            params.extend(cursor)
+        query = "SELECT * FROM individuos"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY apellido, nombre, id LIMIT ?"
+        params.append(page_size + 1)  # Una fila extra para saber si hay otra página
+
+        with self._get_connection() as conn:
+            rows = conn.execute(query, tuple(params)).fetchall()
+        individuos = [dict(row) for row in rows[:page_size]]
+        next_cursor = None
+        if len(rows) > page_size:
+            ultimo = individuos[-1]
+            next_cursor = (ultimo['apellido'], ultimo['nombre'], ultimo['id'])
+        return individuos, next_cursor
+
+    def iter_individuos(self, batch_size=500, modo="texto", incluir_eliminados=False, **kwargs):
+        """
+        Recorre los individuos que cumplen los criterios sin cargarlos todos en memoria:
+        las filas se leen de a `batch_size` con fetchmany y se entregan de a una.
+        Usa una conexión propia del pool, no la del hilo: mientras se recorre se pueden hacer otras
+        operaciones (incluso modificar los individuos leídos). No ve los cambios sin confirmar de
+        una transaction() abierta.
+        """
+        clauses, params = self._build_criteria(kwargs, modo, incluir_eliminados)
+        query = "SELECT * FROM individuos"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY apellido, nombre, id"
 
-        query += " ORDER BY apellido, nombre"
-        cursor.execute(query, tuple(params))
-        individuos = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return individuos
+        conn = self.pool.acquire()
+        try:
+            cursor = conn.execute(query, tuple(params))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+        finally:
+            self.pool.release(conn)
 
 
 if __name__ == "__main__":
@@ -256,6 +546,7 @@ def display_menu():
     print("4. Eliminar Individuo (TU TAREA)")
     print("5. Buscar Individuos por Criterio (para compañero de Filtros)")
     print("6. Registrar Asistencia (para compañero de Asistencia)")
+    print("7. Restaurar Individuo eliminado")
     print("0. Salir")
     print("-----------------------------------------")
 
@@ -274,17 +565,32 @@ def run_system():
             dni = input("DNI: ")
             fecha_nacimiento = input("Fecha de Nacimiento (YYYY-MM-DD, opcional): ")
             genero = input("Género (opcional): ")
+            candidatos = db_manager.buscar_posibles_duplicados(nombre, apellido, dni, fecha_nacimiento or None)
+            if candidatos:
+                print("Atención: ya hay individuos registrados que podrían ser la misma persona:")
+                for ind in candidatos:
+                    print(f"  ID: {ind['id']}, Nombre: {ind['nombre']} {ind['apellido']}, DNI: {ind['dni']}, "
+                          f"Fecha Nac: {ind['fecha_nacimiento']} ({', '.join(ind['motivos'])})")
+                if input("¿Agregarlo de todas formas? (s/n): ").lower() != 's':
+                    print("Alta cancelada.")
+                    continue
             db_manager.add_individuo(nombre, apellido, dni, fecha_nacimiento if fecha_nacimiento else None, genero if genero else None)
 
         elif choice == '2':
             # Funcionalidad general para ver individuos
             print("\n--- Lista de Individuos ---")
-            individuos = db_manager.get_all_individuos()
+            # Se muestra página por página: solo se lee de la base la página que se imprime
+            individuos, cursor = db_manager.get_individuos_page(page_size=TAMANO_PAGINA)
             if not individuos:
                 print("No hay individuos registrados.")
-            else:
+            while individuos:
                 for ind in individuos:
                     print(f"ID: {ind['id']}, Nombre: {ind['nombre']} {ind['apellido']}, DNI: {ind['dni']}, Fecha Nac: {ind['fecha_nacimiento']}, Género: {ind['genero']}")
+                if cursor is None:
+                    break
+                if input("-- Enter para ver más, 'q' para volver al menú: ").strip().lower() == 'q':
+                    break
+                individuos, cursor = db_manager.get_individuos_page(page_size=TAMANO_PAGINA, cursor=cursor)
 
         elif choice == '3':
             # --- TU TAREA: Edición de Individuo ---
@@ -302,21 +608,21 @@ def run_system():
                 continue
 
             print(f"Editando a: {individuo['nombre']} {individuo['apellido']} (DNI: {individuo['dni']})")
-            print("Deja el campo vacío si no quieres modificarlo.")
+            print("Deja el campo vacío si no quieres modificarlo, o escribe '-' para borrar un dato opcional.")
 
-            new_nombre = input(f"Nuevo Nombre ({individuo['nombre']}): ") or None
-            new_apellido = input(f"Nuevo Apellido ({individuo['apellido']}): ") or None
-            new_dni = input(f"Nuevo DNI ({individuo['dni']}): ") or None
-            new_fecha_nacimiento = input(f"Nueva Fecha de Nacimiento ({individuo['fecha_nacimiento']}): ") or None
-            new_genero = input(f"Nuevo Género ({individuo['genero']}): ") or None
+            def leer_cambio(texto):
+                valor = input(texto).strip()
+                if not valor:
+                    return SIN_CAMBIO
+                return None if valor == '-' else valor
 
             db_manager.update_individuo(
                 individuo_id,
-                nombre=new_nombre,
-                apellido=new_apellido,
-                dni=new_dni,
-                fecha_nacimiento=new_fecha_nacimiento,
-                genero=new_genero
+                nombre=leer_cambio(f"Nuevo Nombre ({individuo['nombre']}): "),
+                apellido=leer_cambio(f"Nuevo Apellido ({individuo['apellido']}): "),
+                dni=leer_cambio(f"Nuevo DNI ({individuo['dni']}): "),
+                fecha_nacimiento=leer_cambio(f"Nueva Fecha de Nacimiento ({individuo['fecha_nacimiento']}): "),
+                genero=leer_cambio(f"Nuevo Género ({individuo['genero']}): "),
             )
 
         elif choice == '4':
@@ -359,7 +665,12 @@ def run_system():
                 print("No se especificó ningún criterio de búsqueda.")
                 continue
 
-            resultados = db_manager.get_individuos_by_criteria(**search_criteria)
+            modo = input("Modo de búsqueda [texto/prefijo/exacto] (texto): ").strip().lower() or 'texto'
+            if modo not in MODOS_BUSQUEDA:
+                print("Modo no válido. Se usará 'texto'.")
+                modo = 'texto'
+
+            resultados = db_manager.get_individuos_by_criteria(modo=modo, **search_criteria)
             if not resultados:
                 print("No se encontraron individuos con esos criterios.")
             else:
@@ -375,6 +686,16 @@ def run_system():
             # o db_manager.get_individuo_by_id() para verificar al individuo antes de registrar.
             # También podría necesitar una tabla separada para 'asistencias'.
 
+        elif choice == '7':
+            print("\n--- Restaurando Individuo ---")
+            individuo_id = input("Introduce el ID del individuo a restaurar: ")
+            try:
+                individuo_id = int(individuo_id)
+            except ValueError:
+                print("ID inválido. Debe ser un número.")
+                continue
+            db_manager.restaurar_individuo(individuo_id)
+
         elif choice == '0':
             print("Saliendo del sistema. ¡Hasta luego!")
             break
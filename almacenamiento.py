@@ -0,0 +1,541 @@
+import argparse
+import os
+import sqlite3
+import sys
+from datetime import datetime, timezone
+
+import instrumentacion
+
+# --- Almacenamiento unificado ---
+# Una sola base y un solo esquema para personas (individuos/usuarios) y asistencia.
+# `asistencia.usuario_id` es clave foránea de `individuos.id` con ON DELETE CASCADE.
+# El esquema se versiona con PRAGMA user_version: cada migración se aplica una sola vez.
+
+DB_NAME = "registro_asistencia.db"
+
+def conectar(db_name=None):
+    """
+    Conexión con claves foráneas activas (SQLite las trae apagadas por defecto).
+    Sus sentencias se miden con instrumentacion.py. Con uri=True, ATTACH acepta rutas "file:...?mode=ro"
+    (los años archivados de particiones_asistencia.py); una ruta común se abre igual que siempre.
+    """
+    conn = sqlite3.connect(db_name or DB_NAME, timeout=30, factory=instrumentacion.fabrica_conexion(), uri=True)
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+def ahora():
+    """Fecha y hora UTC en formato ISO, la que se guarda en `eliminado_en`."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+def ahora_preciso():
+    """Como ahora(), con microsegundos: ordena las marcas de asistencia hechas en el mismo segundo."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")
+
+def separar_nombre_completo(nombre_completo):
+    """'Juan Carlos Pérez' -> ('Juan Carlos', 'Pérez'). La última palabra se toma como apellido."""
+    partes = str(nombre_completo).split()
+    if len(partes) < 2:
+        return " ".join(partes), ""
+    return " ".join(partes[:-1]), partes[-1]
+
+def _columnas(cursor, tabla):
+    return {fila[1] for fila in cursor.execute(f"PRAGMA table_info({tabla})")}
+
+def _existe(cursor, nombre):
+    return cursor.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (nombre,)).fetchone() is not None
+
+# --- Migraciones ---
+def _v1_individuos(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS individuos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            apellido TEXT NOT NULL,
+            dni TEXT UNIQUE NOT NULL,
+            fecha_nacimiento TEXT, -- YYYY-MM-DD
+            genero TEXT
+        )
+    ''')
+
+def _v2_datos_de_usuario(cursor):
+    # Columnas que antes vivían en la tabla `usuario` de usuarios.db (altadeusuario.py)
+    columnas = _columnas(cursor, "individuos")
+    if "email" not in columnas:
+        cursor.execute("ALTER TABLE individuos ADD COLUMN email TEXT")
+    if "rol" not in columnas:
+        cursor.execute("ALTER TABLE individuos ADD COLUMN rol TEXT")  # Alumno, Profesor, Administrador
+    if "estado" not in columnas:
+        cursor.execute("ALTER TABLE individuos ADD COLUMN estado TEXT NOT NULL DEFAULT 'Activo'")
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_individuos_email ON individuos (email)")
+
+def _v3_busqueda(cursor):
+    # Índices B-tree para filtros exactos/por prefijo y para el orden por apellido, nombre
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_individuos_apellido_nombre ON individuos (apellido, nombre)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_individuos_genero ON individuos (genero COLLATE NOCASE)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_individuos_fecha_nacimiento ON individuos (fecha_nacimiento)")
+
+    # Índice de texto completo (FTS5) sobre nombre, apellido y DNI, sincronizado por triggers
+    fts_existia = _existe(cursor, "individuos_fts")
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS individuos_fts USING fts5(
+            nombre, apellido, dni,
+            content='individuos', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS individuos_fts_ai AFTER INSERT ON individuos BEGIN
+            INSERT INTO individuos_fts (rowid, nombre, apellido, dni)
+            VALUES (new.id, new.nombre, new.apellido, new.dni);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS individuos_fts_ad AFTER DELETE ON individuos BEGIN
+            INSERT INTO individuos_fts (individuos_fts, rowid, nombre, apellido, dni)
+            VALUES ('delete', old.id, old.nombre, old.apellido, old.dni);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS individuos_fts_au AFTER UPDATE OF nombre, apellido, dni ON individuos BEGIN
+            INSERT INTO individuos_fts (individuos_fts, rowid, nombre, apellido, dni)
+            VALUES ('delete', old.id, old.nombre, old.apellido, old.dni);
+            INSERT INTO individuos_fts (rowid, nombre, apellido, dni)
+            VALUES (new.id, new.nombre, new.apellido, new.dni);
+        END
+    ''')
+    if not fts_existia:
+        # Bases creadas antes del índice: se indexan las filas que ya existían
+        cursor.execute("INSERT INTO individuos_fts (individuos_fts) VALUES ('rebuild')")
+
+def _v4_asistencia(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS asistencia (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario_id INTEGER NOT NULL REFERENCES individuos (id) ON DELETE CASCADE,
+            fecha TEXT NOT NULL,
+            estado TEXT NOT NULL,
+            UNIQUE(usuario_id, fecha)
+        )
+    ''')
+    # Índices "cubrientes" para los reportes: las consultas agregadas se resuelven
+    # leyendo solo el índice, sin tocar la tabla
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_asistencia_fecha_estado ON asistencia (fecha, estado, usuario_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_asistencia_usuario_fecha ON asistencia (usuario_id, fecha, estado)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_individuos_estado ON individuos (estado)")
+
+# --- Resúmenes (rollups) tal como los crean las migraciones ---
+# Copia fija de las sentencias de rollups_asistencia.py: las migraciones 5, 6 y 9 crean sus triggers
+# con este texto y no cambian si ese módulo cambia. Un trigger nuevo o distinto va en otra migración.
+_ROLLUP_ESTADOS = {"presentes": "Presente", "ausentes": "Ausente", "tardes": "Tarde", "justificados": "Justificado"}
+_ROLLUP_ROL = "COALESCE((SELECT rol FROM individuos WHERE id = {f}.usuario_id), 'Sin rol')"
+_ROLLUP_MES = "substr({f}.fecha, 1, 7)"
+_ROLLUP_TABLAS = {
+    "asistencia_diaria_rol": {"fecha": "{f}.fecha", "rol": _ROLLUP_ROL},
+    "asistencia_mensual_usuario": {"usuario_id": "{f}.usuario_id", "mes": _ROLLUP_MES},
+    "asistencia_mensual_rol": {"mes": _ROLLUP_MES, "rol": _ROLLUP_ROL},
+}
+
+def _rollup_sentencias(fila, signo):
+    """Cuerpo de trigger que suma (+) o resta (-) la fila NEW/OLD en las tres tablas de resumen."""
+    sentencias = []
+    for tabla, claves in _ROLLUP_TABLAS.items():
+        valores = {col: expr.format(f=fila) for col, expr in claves.items()}
+        where = " AND ".join(f"{col} = {valor}" for col, valor in valores.items())
+        sets = ", ".join([f"total = total {signo} 1"]
+                         + [f"{col} = {col} {signo} ({fila}.estado = '{estado}')" for col, estado in _ROLLUP_ESTADOS.items()])
+        if signo == "+":
+            sentencias.append(f"INSERT INTO {tabla} ({', '.join(valores)}) SELECT {', '.join(valores.values())} "
+                              f"WHERE NOT EXISTS (SELECT 1 FROM {tabla} WHERE {where});")
+        sentencias.append(f"UPDATE {tabla} SET {sets} WHERE {where};")
+        if signo == "-":
+            sentencias.append(f"DELETE FROM {tabla} WHERE {where} AND total = 0;")
+    return "\n".join(sentencias)
+
+def _v5_rollups(cursor):
+    # Resúmenes diarios/mensuales que se actualizan solos con cada marca
+    # (la tabla `asistencia` todavía no tenía bajas lógicas)
+    for tabla, claves in _ROLLUP_TABLAS.items():
+        if _existe(cursor, tabla):
+            continue  # Bases anteriores a las migraciones, que ya tenían los resúmenes
+        columnas_claves = ", ".join(f"{col} {'INTEGER' if col == 'usuario_id' else 'TEXT'} NOT NULL" for col in claves)
+        columnas_conteo = ", ".join(f"{col} INTEGER NOT NULL DEFAULT 0" for col in ["total", *_ROLLUP_ESTADOS])
+        cursor.execute(f"CREATE TABLE {tabla} ({columnas_claves}, {columnas_conteo}, PRIMARY KEY ({', '.join(claves)})) WITHOUT ROWID")
+        # Las asistencias que ya existían se cargan una sola vez
+        conteos = ", ".join(["COUNT(*)"] + [f"SUM(a.estado = '{estado}')" for estado in _ROLLUP_ESTADOS.values()])
+        cursor.execute(
+            f"INSERT INTO {tabla} ({', '.join([*claves, 'total', *_ROLLUP_ESTADOS])}) "
+            f"SELECT {', '.join(expr.format(f='a') for expr in claves.values())}, {conteos} "
+            f"FROM asistencia a GROUP BY {', '.join(map(str, range(1, len(claves) + 1)))}"
+        )
+
+    sumar_nueva, restar_vieja = _rollup_sentencias("NEW", "+"), _rollup_sentencias("OLD", "-")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS asistencia_rollup_ai AFTER INSERT ON asistencia BEGIN {sumar_nueva} END")
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS asistencia_rollup_au AFTER UPDATE OF usuario_id, fecha, estado ON asistencia
+        WHEN OLD.estado IS NOT NEW.estado OR OLD.fecha IS NOT NEW.fecha OR OLD.usuario_id IS NOT NEW.usuario_id
+        BEGIN {restar_vieja} {sumar_nueva} END
+    ''')
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS asistencia_rollup_ad AFTER DELETE ON asistencia BEGIN {restar_vieja} END")
+
+def _v6_bajas_logicas(cursor):
+    # Las bajas marcan la fecha y hora (UTC) en `eliminado_en` en lugar de borrar la fila;
+    # compactacion.py purga las bajas viejas más tarde, de a poco
+    for tabla in ("individuos", "asistencia"):
+        if "eliminado_en" not in _columnas(cursor, tabla):
+            cursor.execute(f"ALTER TABLE {tabla} ADD COLUMN eliminado_en TEXT")
+
+    # Índices parciales: las consultas habituales solo recorren las filas vigentes
+    indices = {
+        "idx_individuos_apellido_nombre": "individuos (apellido, nombre, id)",
+        "idx_individuos_genero": "individuos (genero COLLATE NOCASE)",
+        "idx_individuos_fecha_nacimiento": "individuos (fecha_nacimiento)",
+        "idx_individuos_estado": "individuos (estado)",
+        # eliminado_en al final (siempre NULL): sin ella SQLite no los usa como índices cubrientes
+        "idx_asistencia_fecha_estado": "asistencia (fecha, estado, usuario_id, eliminado_en)",
+        "idx_asistencia_usuario_fecha": "asistencia (usuario_id, fecha, estado, eliminado_en)",
+    }
+    for nombre, definicion in indices.items():
+        cursor.execute(f"DROP INDEX IF EXISTS {nombre}")
+        cursor.execute(f"CREATE INDEX {nombre} ON {definicion} WHERE eliminado_en IS NULL")
+    # Y al revés para la compactación, que solo busca bajas
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_individuos_bajas ON individuos (eliminado_en) WHERE eliminado_en IS NOT NULL")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_asistencia_bajas ON asistencia (eliminado_en) WHERE eliminado_en IS NOT NULL")
+
+    # La baja (o la restauración) de una persona se extiende a sus asistencias con la misma marca de tiempo
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS individuos_baja AFTER UPDATE OF eliminado_en ON individuos
+        WHEN OLD.eliminado_en IS NULL AND NEW.eliminado_en IS NOT NULL BEGIN
+            UPDATE asistencia SET eliminado_en = NEW.eliminado_en WHERE usuario_id = NEW.id AND eliminado_en IS NULL;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS individuos_restauracion AFTER UPDATE OF eliminado_en ON individuos
+        WHEN OLD.eliminado_en IS NOT NULL AND NEW.eliminado_en IS NULL BEGIN
+            UPDATE asistencia SET eliminado_en = NULL WHERE usuario_id = NEW.id AND eliminado_en = OLD.eliminado_en;
+        END
+    ''')
+
+    # Los triggers de los resúmenes ahora ignoran las asistencias dadas de baja: restan al darlas
+    # de baja y vuelven a sumar al restaurarlas
+    for trigger in ("asistencia_rollup_ai", "asistencia_rollup_au", "asistencia_rollup_ad"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    sumar_nueva, restar_vieja = _rollup_sentencias("NEW", "+"), _rollup_sentencias("OLD", "-")
+    cambio = "OLD.estado IS NOT NEW.estado OR OLD.fecha IS NOT NEW.fecha OR OLD.usuario_id IS NOT NEW.usuario_id"
+    cursor.execute(f'''
+        CREATE TRIGGER asistencia_rollup_ai AFTER INSERT ON asistencia
+        WHEN NEW.eliminado_en IS NULL BEGIN {sumar_nueva} END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER asistencia_rollup_au_resta AFTER UPDATE OF usuario_id, fecha, estado, eliminado_en ON asistencia
+        WHEN OLD.eliminado_en IS NULL AND ({cambio} OR NEW.eliminado_en IS NOT NULL)
+        BEGIN {restar_vieja} END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER asistencia_rollup_au_suma AFTER UPDATE OF usuario_id, fecha, estado, eliminado_en ON asistencia
+        WHEN NEW.eliminado_en IS NULL AND ({cambio} OR OLD.eliminado_en IS NOT NULL)
+        BEGIN {sumar_nueva} END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER asistencia_rollup_ad AFTER DELETE ON asistencia
+        WHEN OLD.eliminado_en IS NULL BEGIN {restar_vieja} END
+    ''')
+
+# Sentencias de trigger que pasan la jornada de la fila {f} (NEW/OLD) a la siguiente versión.
+# Sin UPSERT ni INSERT OR ...: dentro de un trigger manda el ON CONFLICT del upsert que lo disparó.
+TOCAR_JORNADA = '''
+    UPDATE asistencia_dias_modificados
+    SET version = (SELECT MAX(version) + 1 FROM asistencia_dias_modificados)
+    WHERE fecha = {f}.fecha;
+    INSERT INTO asistencia_dias_modificados (fecha, version)
+    SELECT {f}.fecha, (SELECT COALESCE(MAX(version), 0) + 1 FROM asistencia_dias_modificados)
+    WHERE NOT EXISTS (SELECT 1 FROM asistencia_dias_modificados WHERE fecha = {f}.fecha);
+'''
+
+def _v7_dias_modificados(cursor):
+    # Versión de cada jornada: cualquier cambio en una asistencia de esa fecha le asigna la
+    # siguiente versión. La exportación incremental (exportacion_asistencia.py) re-exporta
+    # solo las jornadas con versión mayor a la de su última corrida.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS asistencia_dias_modificados (
+            fecha TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_asistencia_dias_version ON asistencia_dias_modificados (version)")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS asistencia_dia_ai AFTER INSERT ON asistencia BEGIN {TOCAR_JORNADA.format(f='NEW')} END")
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS asistencia_dia_au AFTER UPDATE OF usuario_id, fecha, estado, eliminado_en ON asistencia
+        WHEN OLD.estado IS NOT NEW.estado OR OLD.fecha IS NOT NEW.fecha OR OLD.usuario_id IS NOT NEW.usuario_id
+            OR OLD.eliminado_en IS NOT NEW.eliminado_en
+        BEGIN {TOCAR_JORNADA.format(f='OLD')} {TOCAR_JORNADA.format(f='NEW')} END
+    ''')
+    # Purgar una baja (compactacion.py) no cambia lo exportado: no se toca la jornada
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS asistencia_dia_ad AFTER DELETE ON asistencia
+        WHEN OLD.eliminado_en IS NULL BEGIN {TOCAR_JORNADA.format(f='OLD')} END
+    ''')
+    # Las jornadas que ya existían quedan todas en la versión 1
+    cursor.execute('''
+        INSERT INTO asistencia_dias_modificados (fecha, version)
+        SELECT DISTINCT fecha, 1 FROM asistencia WHERE true
+        ON CONFLICT(fecha) DO NOTHING
+    ''')
+
+def _v8_ultima_escritura(cursor):
+    # Momento (UTC, con microsegundos) en que se hizo la última marca o baja de cada asistencia.
+    # Al sincronizar el diario local de un kiosco (diario_local.py) gana la escritura más reciente.
+    # Las filas anteriores quedan en NULL: cualquier marca las reemplaza.
+    if "actualizado_en" not in _columnas(cursor, "asistencia"):
+        cursor.execute("ALTER TABLE asistencia ADD COLUMN actualizado_en TEXT")
+
+def _v9_archivo_anual(cursor):
+    # Años cerrados movidos a un archivo aparte por particiones_asistencia.py
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS asistencia_archivos (
+            anio TEXT PRIMARY KEY, -- YYYY
+            archivo TEXT NOT NULL, -- dentro de la carpeta archivo_asistencia, junto a la base
+            estado TEXT NOT NULL DEFAULT 'archivando', -- archivando | archivado
+            filas INTEGER,
+            bytes INTEGER,
+            archivado_en TEXT
+        ) WITHOUT ROWID
+    ''')
+    # Desde que empieza a archivarse, el año no acepta marcas nuevas
+    for sufijo, evento in (("ai", "INSERT"), ("au", "UPDATE OF fecha")):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS asistencia_archivada_{sufijo} BEFORE {evento} ON asistencia
+            WHEN EXISTS (SELECT 1 FROM asistencia_archivos WHERE anio = substr(NEW.fecha, 1, 4))
+            BEGIN SELECT RAISE(ABORT, 'El año de esa fecha está archivado'); END
+        ''')
+    # Archivar borra el año de `asistencia`, pero sus resúmenes y las versiones de sus jornadas
+    # quedan como estaban: los triggers de borrado ignoran los años archivados
+    cursor.execute("DROP TRIGGER IF EXISTS asistencia_rollup_ad")
+    cursor.execute(f'''
+        CREATE TRIGGER asistencia_rollup_ad AFTER DELETE ON asistencia
+        WHEN OLD.eliminado_en IS NULL
+            AND NOT EXISTS (SELECT 1 FROM asistencia_archivos WHERE anio = substr(OLD.fecha, 1, 4))
+        BEGIN {_rollup_sentencias("OLD", "-")} END
+    ''')
+    cursor.execute("DROP TRIGGER IF EXISTS asistencia_dia_ad")
+    cursor.execute(f'''
+        CREATE TRIGGER asistencia_dia_ad AFTER DELETE ON asistencia
+        WHEN OLD.eliminado_en IS NULL
+            AND NOT EXISTS (SELECT 1 FROM asistencia_archivos WHERE anio = substr(OLD.fecha, 1, 4))
+        BEGIN {TOCAR_JORNADA.format(f='OLD')} END
+    ''')
+
+def _v10_grupos(cursor):
+    # Grupos o cursos y sus integrantes. Cada cambio que altera la planilla de un grupo (altas, bajas
+    # y pases de integrantes; baja, reactivación o cambio de nombre de una persona) le sube la
+    # versión; grupos_asistencia.py rearma la planilla guardada solo cuando quedó vieja.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS grupos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL UNIQUE,
+            version INTEGER NOT NULL DEFAULT 1
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS grupo_miembros (
+            grupo_id INTEGER NOT NULL REFERENCES grupos (id) ON DELETE CASCADE,
+            usuario_id INTEGER NOT NULL REFERENCES individuos (id) ON DELETE CASCADE,
+            PRIMARY KEY (grupo_id, usuario_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_grupo_miembros_usuario ON grupo_miembros (usuario_id, grupo_id)")
+    # Planilla de cada grupo: integrantes activos [[id, "Nombre Apellido"], ...] ya ordenados
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS grupo_planillas (
+            grupo_id INTEGER PRIMARY KEY REFERENCES grupos (id) ON DELETE CASCADE,
+            version INTEGER NOT NULL, -- la de `grupos` al armarla
+            miembros TEXT NOT NULL -- JSON
+        )
+    ''')
+    subir = "UPDATE grupos SET version = version + 1 WHERE id = {f}.grupo_id;"
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS grupo_miembros_ai AFTER INSERT ON grupo_miembros BEGIN {subir.format(f='NEW')} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS grupo_miembros_ad AFTER DELETE ON grupo_miembros BEGIN {subir.format(f='OLD')} END")
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS grupo_miembros_au AFTER UPDATE ON grupo_miembros
+        BEGIN {subir.format(f='OLD')} {subir.format(f='NEW')} END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS individuos_grupos_au AFTER UPDATE OF nombre, apellido, estado, eliminado_en ON individuos
+        WHEN OLD.nombre IS NOT NEW.nombre OR OLD.apellido IS NOT NEW.apellido
+            OR OLD.estado IS NOT NEW.estado OR OLD.eliminado_en IS NOT NEW.eliminado_en
+        BEGIN
+            UPDATE grupos SET version = version + 1
+            WHERE id IN (SELECT grupo_id FROM grupo_miembros WHERE usuario_id = NEW.id);
+        END
+    ''')
+
+MIGRACIONES = [
+    (1, "Tabla individuos", _v1_individuos),
+    (2, "Email, rol y estado de los usuarios", _v2_datos_de_usuario),
+    (3, "Índices y texto completo para búsquedas", _v3_busqueda),
+    (4, "Asistencia con clave foránea a individuos", _v4_asistencia),
+    (5, "Resúmenes de asistencia", _v5_rollups),
+    (6, "Bajas lógicas e índices parciales", _v6_bajas_logicas),
+    (7, "Versión de cada jornada para exportaciones incrementales", _v7_dias_modificados),
+    (8, "Momento de la última escritura de cada asistencia", _v8_ultima_escritura),
+    (9, "Años de asistencia archivados", _v9_archivo_anual),
+    (10, "Grupos, integrantes y planillas de clase", _v10_grupos),
+]
+VERSION_ACTUAL = MIGRACIONES[-1][0]
+
+def version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrar(conn):
+    """
+    Aplica las migraciones pendientes en una sola transacción y devuelve la versión final.
+    Si la base ya está al día no ejecuta ningún DDL.
+    """
+    if version(conn) >= VERSION_ACTUAL:
+        return VERSION_ACTUAL
+
+    propia = not conn.in_transaction
+    cursor = conn.cursor()
+    if propia:
+        cursor.execute("BEGIN IMMEDIATE")  # Otro proceso podría estar migrando al mismo tiempo
+    try:
+        actual = version(conn)
+        for numero, _, migracion in MIGRACIONES:
+            if numero > actual:
+                migracion(cursor)
+                cursor.execute(f"PRAGMA user_version = {numero}")
+        if propia:
+            conn.commit()
+    except Exception:
+        if propia:
+            conn.rollback()
+        raise
+    return VERSION_ACTUAL
+
+def inicializar(db_name=None):
+    """Crea o actualiza el esquema de la base indicada."""
+    conn = conectar(db_name)
+    try:
+        return migrar(conn)
+    finally:
+        conn.close()
+
+# Bases ya verificadas en este proceso (rutas absolutas)
+_esquemas_al_dia = set()
+
+def asegurar_esquema(db_name=None, conn=None):
+    """
+    Como migrar(), pero una sola vez por proceso y base: las pantallas de consola lo llaman en
+    cada uso y, una vez verificado el user_version, las siguientes llamadas no abren la base.
+    """
+    db_name = db_name or DB_NAME
+    clave = db_name if db_name == ":memory:" else os.path.abspath(db_name)
+    if clave in _esquemas_al_dia:
+        return VERSION_ACTUAL
+    version_final = migrar(conn) if conn is not None else inicializar(db_name)
+    if clave != ":memory:":  # Cada conexión a :memory: es una base distinta
+        _esquemas_al_dia.add(clave)
+    return version_final
+
+# --- Migración única de las tres bases anteriores ---
+def _leer_usuarios_flask(conn):
+    """Usuarios de la tabla `usuario` del viejo usuarios.db (adjuntado como `viejo_usuarios`)."""
+    if not conn.execute("SELECT 1 FROM viejo_usuarios.sqlite_master WHERE name = 'usuario'").fetchone():
+        return []
+    return conn.execute(
+        "SELECT id, nombre_completo, dni, email, rol, estado FROM viejo_usuarios.usuario"
+    ).fetchall()
+
+def migrar_datos_legados(usuarios_db="usuarios.db", asistencia_db="asistencia.db", destino=None):
+    """
+    Copia a la base unificada los usuarios de usuarios.db y las asistencias de asistencia.db.
+    Las personas se identifican por DNI: si ya existían en `individuos` se completan su email,
+    rol y estado. Devuelve un resumen con lo copiado y lo que no se pudo copiar.
+    """
+    resumen = {"usuarios": 0, "usuarios_omitidos": 0, "asistencias": 0, "asistencias_huerfanas": 0}
+    conn = conectar(destino)
+    try:
+        migrar(conn)
+        id_viejo_a_dni = {}
+
+        if usuarios_db and os.path.exists(usuarios_db):
+            conn.execute("ATTACH DATABASE ? AS viejo_usuarios", (usuarios_db,))
+            with conn:
+                for id_viejo, nombre_completo, dni, email, rol, estado in _leer_usuarios_flask(conn):
+                    nombre, apellido = separar_nombre_completo(nombre_completo)
+                    try:
+                        conn.execute('''
+                            INSERT INTO individuos (nombre, apellido, dni, email, rol, estado)
+                            VALUES (?, ?, ?, ?, ?, ?)
+                            ON CONFLICT(dni) DO UPDATE SET
+                                email = COALESCE(individuos.email, excluded.email),
+                                rol = COALESCE(individuos.rol, excluded.rol),
+                                estado = excluded.estado
+                        ''', (nombre, apellido, dni, email, rol, estado or 'Activo'))
+                        resumen["usuarios"] += 1
+                        id_viejo_a_dni[id_viejo] = dni
+                    except sqlite3.IntegrityError:
+                        # El email ya pertenece a otra persona con distinto DNI
+                        resumen["usuarios_omitidos"] += 1
+            conn.execute("DETACH DATABASE viejo_usuarios")
+
+        if asistencia_db and os.path.exists(asistencia_db):
+            conn.execute("ATTACH DATABASE ? AS vieja_asistencia", (asistencia_db,))
+            # Si asistencia.db tenía su propia tabla `usuarios` con DNI, se usa esa para resolver los IDs
+            tiene_usuarios = conn.execute(
+                "SELECT 1 FROM vieja_asistencia.sqlite_master WHERE name = 'usuarios'"
+            ).fetchone()
+            if tiene_usuarios and "dni" in {f[1] for f in conn.execute("PRAGMA vieja_asistencia.table_info(usuarios)")}:
+                id_viejo_a_dni = dict(conn.execute("SELECT id, dni FROM vieja_asistencia.usuarios"))
+            dni_a_id = dict(conn.execute("SELECT dni, id FROM individuos"))
+
+            with conn:
+                for usuario_id, fecha, estado in conn.execute(
+                    "SELECT usuario_id, fecha, estado FROM vieja_asistencia.asistencia"
+                ).fetchall():
+                    nuevo_id = dni_a_id.get(id_viejo_a_dni.get(usuario_id))
+                    if nuevo_id is None:
+                        resumen["asistencias_huerfanas"] += 1
+                        continue
+                    conn.execute('''
+                        INSERT INTO asistencia (usuario_id, fecha, estado) VALUES (?, ?, ?)
+                        ON CONFLICT(usuario_id, fecha) DO UPDATE SET estado = excluded.estado
+                    ''', (nuevo_id, fecha, estado))
+                    resumen["asistencias"] += 1
+            conn.execute("DETACH DATABASE vieja_asistencia")
+        return resumen
+    finally:
+        conn.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Esquema y migraciones de la base de asistencia.")
+    parser.add_argument("--db", default=DB_NAME, help="Base unificada (por defecto %(default)s).")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    sub.add_parser("migrar", help="Aplica las migraciones de esquema pendientes.")
+    sub.add_parser("version", help="Muestra la versión del esquema.")
+    legado = sub.add_parser("migrar-legado", help="Copia los datos de usuarios.db y asistencia.db.")
+    legado.add_argument("--usuarios", default=None, help="Ruta de usuarios.db (por defecto instance/usuarios.db o usuarios.db).")
+    legado.add_argument("--asistencia", default="asistencia.db")
+    args = parser.parse_args(argv)
+
+    if args.comando == "migrar":
+        print(f"✅ Esquema en la versión {inicializar(args.db)} ({args.db}).")
+    elif args.comando == "version":
+        conn = conectar(args.db)
+        try:
+            print(f"Versión del esquema: {version(conn)} (actual: {VERSION_ACTUAL})")
+        finally:
+            conn.close()
+    else:
+        usuarios = args.usuarios or next(
+            (ruta for ruta in (os.path.join("instance", "usuarios.db"), "usuarios.db") if os.path.exists(ruta)), None
+        )
+        resumen = migrar_datos_legados(usuarios, args.asistencia, args.db)
+        print(f"✅ {resumen['usuarios']} usuarios y {resumen['asistencias']} asistencias copiados a {args.db}.")
+        if resumen["usuarios_omitidos"]:
+            print(f"⚠️  {resumen['usuarios_omitidos']} usuarios omitidos (email en uso por otra persona).")
+        if resumen["asistencias_huerfanas"]:
+            print(f"⚠️  {resumen['asistencias_huerfanas']} asistencias sin persona correspondiente.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
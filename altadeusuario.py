@@ -1,30 +1,121 @@
-from flask import Flask, request, jsonify
+import os
+
+from flask import Blueprint, Flask, request, jsonify
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import QueuePool
+
+import almacenamiento
+import duplicados
+import importacion_usuarios
+import instrumentacion
+from conexiones import DEFAULT_PRAGMAS
+
+# La misma base unificada que usan la consola y la asistencia (ver almacenamiento.py)
+DATABASE_URI = os.environ.get('USUARIOS_DATABASE_URI', 'sqlite:///' + os.path.abspath(almacenamiento.DB_NAME))
 
-app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///usuarios.db'  # Usa SQLite para simplicidad
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db = SQLAlchemy(app)
+db = SQLAlchemy()
+usuarios_bp = Blueprint('usuarios', __name__)
 
 # Modelo de Usuario
 class Usuario(db.Model):
+    # Un usuario es una fila de `individuos`: el esquema lo crea y migra almacenamiento.py
+    __tablename__ = 'individuos'
     id = db.Column(db.Integer, primary_key=True)
-    nombre_completo = db.Column(db.String(100), nullable=False)
+    nombre = db.Column(db.String(100), nullable=False)
+    apellido = db.Column(db.String(100), nullable=False)
     dni = db.Column(db.String(20), unique=True, nullable=False)
-    email = db.Column(db.String(120), unique=True, nullable=False)
-    rol = db.Column(db.String(20), nullable=False)  # Alumno, Profesor, Administrador
-    estado = db.Column(db.String(10), default='Activo')
+    fecha_nacimiento = db.Column(db.String(10))  # YYYY-MM-DD
+    genero = db.Column(db.String(20))
+    email = db.Column(db.String(120), unique=True)
+    rol = db.Column(db.String(20))  # Alumno, Profesor, Administrador
+    estado = db.Column(db.String(10), nullable=False, default='Activo')
+    eliminado_en = db.Column(db.String(19))  # Baja lógica: fecha y hora UTC (ver compactacion.py)
+
+    @property
+    def nombre_completo(self):
+        return f"{self.nombre} {self.apellido}".strip()
+
+    @nombre_completo.setter
+    def nombre_completo(self, valor):
+        self.nombre, self.apellido = almacenamiento.separar_nombre_completo(valor)
 
     def __repr__(self):
         return f'<Usuario {self.nombre_completo}>'
 
-# Crear la base de datos
-with app.app_context():
-    db.create_all()
+# --- Configuración de la app y del motor de base de datos ---
+def _configurar_conexion_sqlite(dbapi_connection, connection_record):
+    """Se ejecuta una vez por conexión nueva del pool: WAL, busy_timeout y demás PRAGMAs."""
+    # Transacciones manejadas por nosotros (ver _begin_inmediato) en lugar de las del driver
+    dbapi_connection.isolation_level = None
+    for pragma, value in DEFAULT_PRAGMAS.items():
+        dbapi_connection.execute(f"PRAGMA {pragma} = {value}")
+
+def _begin_inmediato(conn):
+    """
+    Toma el lock de escritura al empezar la transacción. Con BEGIN diferido, dos workers que
+    leen y después escriben pueden fallar con "database is locked" sin esperar el busy_timeout.
+    """
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+def create_app(config=None):
+    """Crea y configura la app (no crea tablas: ver init_db / `flask init-db`)."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URI
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    if config:
+        app.config.update(config)
+
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite') and ':memory:' not in app.config['SQLALCHEMY_DATABASE_URI']:
+        app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {
+            'poolclass': QueuePool,
+            'pool_size': int(os.environ.get('USUARIOS_POOL_SIZE', 5)),
+            'max_overflow': int(os.environ.get('USUARIOS_POOL_OVERFLOW', 10)),
+            'pool_pre_ping': True,
+            'pool_recycle': 3600,
+            'connect_args': {'timeout': 30, 'check_same_thread': False},
+        })
+
+    db.init_app(app)
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            event.listen(db.engine, 'connect', _configurar_conexion_sqlite)
+            event.listen(db.engine, 'begin', _begin_inmediato)
+        # Tiempos de cada sentencia y consultas lentas con su plan (ver instrumentacion.py)
+        instrumentacion.instrumentar_motor(db.engine)
+
+    app.register_blueprint(usuarios_bp)
+    # Latencia por endpoint y GET /metrics en formato Prometheus
+    instrumentacion.instrumentar_app(app)
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Crea las tablas de la base de datos."""
+        init_db(app)
+        print("✅ Base de datos de usuarios inicializada.")
+
+    return app
+
+def init_db(app):
+    """Crea o migra el esquema. Se llama una vez al desplegar, no en cada import."""
+    with app.app_context():
+        if db.engine.url.get_backend_name() == 'sqlite' and db.engine.url.database:
+            almacenamiento.inicializar(db.engine.url.database)
+        else:
+            db.create_all()
+        # Sin conexiones abiertas que puedan heredar los workers al hacer fork
+        db.engine.dispose()
+
+def _indice_duplicados():
+    """Índice de posibles duplicados de la base del servicio (ver duplicados.py); None si no es SQLite."""
+    url = db.engine.url
+    if url.get_backend_name() != 'sqlite' or not url.database or url.database == ':memory:':
+        return None
+    return duplicados.indice_compartido(url.database)
 
 # Ruta para registrar un nuevo usuario
-@app.route('/usuarios', methods=['POST'])
+@usuarios_bp.route('/usuarios', methods=['POST'])
 def registrar_usuario():
     data = request.get_json()
 
@@ -40,25 +131,68 @@ def registrar_usuario():
         email=data['email'],
         rol=data['rol']
     )
+    # Se registra igual, pero se avisa si se parece a alguien que ya estaba
+    indice = _indice_duplicados()
+    candidatos = indice.candidatos(data['nombre_completo'], data['dni']) if indice is not None else []
 
     try:
         db.session.add(nuevo_usuario)
         db.session.commit()
-        return jsonify({"mensaje": "Usuario registrado exitosamente."}), 201
+        respuesta = {"mensaje": "Usuario registrado exitosamente.", "id": nuevo_usuario.id}
+        if candidatos:
+            respuesta["posibles_duplicados"] = [
+                {"id": c['clave'], "nombre_completo": c['nombre'], "motivos": c['motivos']} for c in candidatos
+            ]
+        return jsonify(respuesta), 201
     except IntegrityError:
         db.session.rollback()
         return jsonify({"error": "El email o DNI ya están registrados."}), 409
 
-# Ejecutar la app
+# Ruta para importar muchos usuarios de una vez (CSV o JSONL)
+# El cuerpo se procesa a medida que llega: se puede enviar el archivo directamente
+# (Content-Type: text/csv o application/x-ndjson) o como campo 'archivo' de un formulario.
+@usuarios_bp.route('/usuarios/importar', methods=['POST'])
+def importar_usuarios():
+    formato = request.args.get('formato')
+    if 'archivo' in request.files:
+        archivo = request.files['archivo']
+        stream = archivo.stream
+        if not formato and archivo.filename.endswith(('.jsonl', '.ndjson')):
+            formato = 'jsonl'
+    else:
+        stream = request.stream
+        if not formato and request.mimetype in ('application/x-ndjson', 'application/jsonl', 'application/json-lines'):
+            formato = 'jsonl'
+    formato = formato or 'csv'
+    if formato not in importacion_usuarios.FORMATOS:
+        return jsonify({"error": f"Formato no soportado: '{formato}'."}), 400
+
+    filas = importacion_usuarios.leer_filas(importacion_usuarios.abrir_texto(stream), formato)
+    reporte = importacion_usuarios.importar_usuarios(db.session, Usuario.__table__, filas, indice=_indice_duplicados())
+    status = 201 if reporte['insertados'] else 200
+    return jsonify(reporte), status
+
+# Ejecutar la app (servidor de desarrollo; en producción usar servidor_usuarios.py)
 if __name__ == '__main__':
+    instrumentacion.configurar_logs()
+    app = create_app()
+    init_db(app)
     app.run(debug=True)
 
-    POST /usuarios
-Content-Type: application/json
-
-{
-  "nombre_completo": "Juan Pérez",
-  "dni": "12345678",
-  "email": "juan.perez@example.com",
-  "rol": "Alumno"
-}
\ No newline at end of file
+# Ejemplo de uso:
+#
+#     POST /usuarios
+#     Content-Type: application/json
+#
+#     {
+#       "nombre_completo": "Juan Pérez",
+#       "dni": "12345678",
+#       "email": "juan.perez@example.com",
+#       "rol": "Alumno"
+#     }
+#
+#     POST /usuarios/importar
+#     Content-Type: text/csv
+#
+#     nombre_completo,dni,email,rol
+#     Juan Pérez,12345678,juan.perez@example.com,Alumno
@@ -0,0 +1,243 @@
+import argparse
+import sys
+from datetime import date
+
+import numpy as np
+
+import almacenamiento
+import particiones_asistencia
+
+# --- Patrones de asistencia e inasistencia ---
+# La asistencia de un rango se carga una sola vez en una matriz usuarios × jornadas de códigos
+# int8 (20.000 usuarios × 200 jornadas = 4 MB) y todas las métricas se calculan sobre la matriz
+# completa con operaciones de NumPy, sin recorrer filas en Python.
+#
+#     python analitica_asistencia.py --desde 2025-03-01 --hasta 2025-11-30 --umbral 0.9
+
+# Códigos de la matriz; 0 = la persona no tiene registro ese día
+SIN_REGISTRO, PRESENTE, AUSENTE, TARDE, JUSTIFICADO = 0, 1, 2, 3, 4
+CODIGOS = {"Presente": PRESENTE, "Ausente": AUSENTE, "Tarde": TARDE, "Justificado": JUSTIFICADO}
+UMBRAL_CRONICO = 0.9  # Ausentismo crónico: asiste a menos del 90% de las jornadas
+MINIMO_JORNADAS = 10  # Con menos jornadas computables no se marca a nadie como crónico
+PENDIENTE_ESTABLE = 0.0005  # Cambios menores a 0,05 puntos por período se consideran estables
+
+class MatrizAsistencia:
+    """Asistencia de un rango: `codigos[i, j]` es el estado del usuario `usuarios[i]` el día `fechas[j]`."""
+
+    def __init__(self, usuarios, roles, fechas, codigos):
+        self.usuarios = usuarios  # np.int64, ordenado
+        self.roles = roles        # np.array de str, alineado con usuarios
+        self.fechas = fechas      # lista de 'YYYY-MM-DD' (solo jornadas con alguna marca)
+        self.codigos = codigos    # np.int8, usuarios × jornadas
+
+    @property
+    def asistio(self):
+        """Presente o tarde."""
+        return (self.codigos == PRESENTE) | (self.codigos == TARDE)
+
+    @property
+    def computable(self):
+        """Jornadas que cuentan para la tasa: con registro y sin justificar."""
+        return (self.codigos != SIN_REGISTRO) & (self.codigos != JUSTIFICADO)
+
+def cargar_matriz(desde=None, hasta=None, rol=None, db_name=None):
+    """Carga la asistencia vigente de [desde, hasta] de las personas vigentes (opcionalmente de un rol)."""
+    rango, params = "", []
+    if desde:
+        rango += " AND a.fecha >= ?"
+        params.append(desde)
+    if hasta:
+        rango += " AND a.fecha <= ?"
+        params.append(hasta)
+
+    conn = almacenamiento.conectar(db_name)
+    try:
+        conn.execute("BEGIN")  # Personas y marcas de la misma foto de la base
+        # Una consulta por fuente (la tabla y los años archivados del rango): cada jornada está en una sola
+        fuentes = particiones_asistencia.fuentes(conn, desde, hasta)
+        query = "SELECT id, COALESCE(rol, 'Sin rol') FROM individuos WHERE eliminado_en IS NULL"
+        if rol:
+            query += " AND rol = ?"
+        personas = conn.execute(query + " ORDER BY id", [rol] if rol else []).fetchall()
+        # Una fila por jornada y estado con los IDs concatenados: SQLite recorre solo el índice
+        # idx_asistencia_fecha_estado y NumPy parsea los IDs, sin crear un objeto Python por marca
+        grupos = conn.execute(
+            " UNION ALL ".join(
+                f"SELECT a.fecha, a.estado, group_concat(a.usuario_id) FROM {fuente} a "
+                f"WHERE a.eliminado_en IS NULL{rango} GROUP BY a.fecha, a.estado"
+                for fuente in fuentes
+            ),
+            params * len(fuentes),
+        ).fetchall()
+    finally:
+        conn.close()
+
+    usuarios = np.fromiter((p[0] for p in personas), dtype=np.int64, count=len(personas))
+    roles = np.array([p[1] for p in personas], dtype=object)
+    fechas = sorted({fecha for fecha, _, _ in grupos})
+    columna = {fecha: j for j, fecha in enumerate(fechas)}
+    codigos = np.zeros((len(usuarios), len(fechas)), dtype=np.int8)
+    if not len(usuarios):
+        return MatrizAsistencia(usuarios, roles, fechas, codigos)
+    for fecha, estado, ids in grupos:
+        ids = np.fromstring(ids, dtype=np.int64, sep=",")
+        fila = np.searchsorted(usuarios, ids)
+        # Marcas de personas que no están en la matriz (otro rol): se descartan
+        valida = usuarios[np.minimum(fila, len(usuarios) - 1)] == ids
+        codigos[fila[valida], columna[fecha]] = CODIGOS.get(estado, SIN_REGISTRO)
+    return MatrizAsistencia(usuarios, roles, fechas, codigos)
+
+# --- Métricas (todas vectorizadas sobre la matriz completa) ---
+def _dividir(numerador, denominador):
+    """Cociente con NaN donde el denominador es 0."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominador > 0, numerador / np.maximum(denominador, 1), np.nan)
+
+def tasa_asistencia(matriz):
+    """Fracción de jornadas computables a las que asistió cada usuario (NaN si no tiene ninguna)."""
+    return _dividir(matriz.asistio.sum(axis=1), matriz.computable.sum(axis=1))
+
+def rachas_de_ausencia(matriz):
+    """
+    Devuelve (racha más larga, racha actual) de ausencias consecutivas de cada usuario.
+    Cualquier otro estado (incluida una ausencia justificada) corta la racha.
+    """
+    if not matriz.fechas:
+        vacio = np.zeros(len(matriz.usuarios), dtype=np.int32)
+        return vacio, vacio.copy()
+    ausente = matriz.codigos == AUSENTE
+    acumulado = np.cumsum(ausente, axis=1, dtype=np.int32)
+    # El contador se "reinicia" en cada día sin ausencia: se le resta lo acumulado hasta ese día
+    reinicio = np.maximum.accumulate(np.where(ausente, 0, acumulado), axis=1)
+    racha = acumulado - reinicio
+    return racha.max(axis=1), racha[:, -1]
+
+def tasa_movil(matriz, ventana=20):
+    """Tasa de asistencia de cada usuario en las últimas `ventana` jornadas, para cada jornada (usuarios × jornadas)."""
+    def acumulada(valores):
+        suma = np.zeros((valores.shape[0], valores.shape[1] + 1), dtype=np.int32)
+        np.cumsum(valores, axis=1, out=suma[:, 1:])
+        return suma
+
+    fin = np.arange(1, len(matriz.fechas) + 1)
+    inicio = np.maximum(fin - ventana, 0)
+    asistidos, computables = acumulada(matriz.asistio), acumulada(matriz.computable)
+    return _dividir(asistidos[:, fin] - asistidos[:, inicio], computables[:, fin] - computables[:, inicio]).astype(np.float32)
+
+def ausentismo_cronico(matriz, umbral=UMBRAL_CRONICO, minimo_jornadas=MINIMO_JORNADAS):
+    """Devuelve (ids, tasas) de los usuarios con tasa de asistencia menor que `umbral`."""
+    tasa = tasa_asistencia(matriz)
+    cronico = (matriz.computable.sum(axis=1) >= minimo_jornadas) & (tasa < umbral)
+    return matriz.usuarios[cronico], tasa[cronico]
+
+def _sumar_por(etiquetas, valores, eje):
+    """Suma filas (eje 0) o columnas (eje 1) de `valores` que comparten etiqueta. Devuelve (etiquetas únicas, sumas)."""
+    unicas, posicion = np.unique(np.asarray(etiquetas), return_inverse=True)
+    pertenece = (posicion[None, :] == np.arange(len(unicas))[:, None]).astype(np.float32)
+    sumas = pertenece @ valores if eje == 0 else valores @ pertenece.T
+    return unicas, sumas
+
+def tendencia_tardanzas(matriz, periodo="semana", grupos=None):
+    """
+    Tasa de llegadas tarde por grupo (por defecto, el rol) y por semana o mes, y su pendiente por
+    mínimos cuadrados (cambio de la tasa por período; positiva = cada vez más tardanzas).
+    Devuelve {grupo: {"periodos": [...], "tasa_tarde": [...], "pendiente": float o None}}.
+    """
+    if not matriz.fechas or not len(matriz.usuarios):
+        return {}
+    if periodo == "mes":
+        claves = [f[:7] for f in matriz.fechas]
+    else:
+        claves = ["%d-S%02d" % date.fromisoformat(f).isocalendar()[:2] for f in matriz.fechas]
+    grupos = matriz.roles if grupos is None else grupos
+
+    tarde = (matriz.codigos == TARDE).astype(np.float32)
+    registrado = (matriz.codigos != SIN_REGISTRO).astype(np.float32)
+    nombres, tardes = _sumar_por(grupos, tarde, eje=0)  # grupos × jornadas
+    _, registros = _sumar_por(grupos, registrado, eje=0)
+    periodos, tardes = _sumar_por(claves, tardes, eje=1)  # grupos × períodos
+    _, registros = _sumar_por(claves, registros, eje=1)
+    tasa = _dividir(tardes, registros)
+
+    # Pendiente de la recta que mejor ajusta la tasa de cada grupo, ignorando períodos sin registros
+    x = np.arange(len(periodos), dtype=np.float64)[None, :]
+    valido = ~np.isnan(tasa)
+    y = np.where(valido, tasa, 0.0)
+    n = valido.sum(axis=1)
+    sx, sy = (x * valido).sum(axis=1), y.sum(axis=1)
+    sxx, sxy = (x * x * valido).sum(axis=1), (x * y).sum(axis=1)
+    pendiente = _dividir(n * sxy - sx * sy, np.where(n >= 2, n * sxx - sx * sx, 0))
+
+    return {
+        str(nombre): {
+            "periodos": [str(p) for p in periodos],
+            "tasa_tarde": [None if np.isnan(t) else round(float(t), 4) for t in tasa[i]],
+            "pendiente": None if np.isnan(pendiente[i]) else round(float(pendiente[i]), 5),
+        }
+        for i, nombre in enumerate(nombres)
+    }
+
+def patrones(desde=None, hasta=None, rol=None, umbral=UMBRAL_CRONICO, ventana=20, db_name=None):
+    """Resumen de patrones de un rango: ausentismo crónico, rachas, tasa reciente y tendencia de tardanzas."""
+    matriz = cargar_matriz(desde, hasta, rol, db_name)
+    racha_maxima, racha_actual = rachas_de_ausencia(matriz)
+    tasa = tasa_asistencia(matriz)
+    reciente = tasa_movil(matriz, ventana)[:, -1] if matriz.fechas else np.full(len(matriz.usuarios), np.nan)
+    ids, _ = ausentismo_cronico(matriz, umbral)
+    fila = np.searchsorted(matriz.usuarios, ids)
+    cronicos = [
+        {
+            "usuario_id": int(matriz.usuarios[i]),
+            "rol": matriz.roles[i],
+            "tasa": round(float(tasa[i]), 4),
+            "tasa_reciente": None if np.isnan(reciente[i]) else round(float(reciente[i]), 4),
+            "racha_maxima": int(racha_maxima[i]),
+            "racha_actual": int(racha_actual[i]),
+        }
+        for i in fila[np.argsort(tasa[fila], kind="stable")]
+    ]
+    return {
+        "usuarios": len(matriz.usuarios),
+        "jornadas": len(matriz.fechas),
+        "cronicos": cronicos,
+        "en_racha": [int(u) for u in matriz.usuarios[racha_actual >= 3]],  # 3 o más ausencias seguidas hasta hoy
+        "tardanzas": tendencia_tardanzas(matriz),
+    }
+
+# --- Interfaz simple de consola ---
+def imprimir_patrones(resultado, umbral=UMBRAL_CRONICO):
+    print(f"\n{resultado['usuarios']} personas, {resultado['jornadas']} jornadas.")
+    if resultado["cronicos"]:
+        print(f"\nAusentismo crónico (asistencia menor al {umbral:.0%}):")
+        print(f"{'ID':>8} {'Rol':<15} {'Tasa':>7} {'Últ.':>7} {'Racha':>6} {'Actual':>7}")
+        for c in resultado["cronicos"]:
+            reciente = "-" if c["tasa_reciente"] is None else f"{c['tasa_reciente']:.0%}"
+            print(f"{c['usuario_id']:>8} {c['rol']:<15} {c['tasa']:>7.0%} {reciente:>7} {c['racha_maxima']:>6} {c['racha_actual']:>7}")
+    else:
+        print("\nNo hay casos de ausentismo crónico.")
+    if resultado["en_racha"]:
+        print(f"\nCon 3 o más ausencias seguidas hasta la última jornada: {len(resultado['en_racha'])} personas.")
+    for grupo, tendencia in resultado["tardanzas"].items():
+        if tendencia["pendiente"] is None:
+            continue
+        if abs(tendencia["pendiente"]) < PENDIENTE_ESTABLE:
+            direccion = "estables"
+        else:
+            direccion = "en aumento" if tendencia["pendiente"] > 0 else "en baja"
+        print(f"Tardanzas de {grupo}: {direccion} ({tendencia['pendiente'] * 100:+.2f} puntos por semana).")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Detecta patrones de asistencia e inasistencia.")
+    parser.add_argument("--db", default=almacenamiento.DB_NAME)
+    parser.add_argument("--desde", help="YYYY-MM-DD")
+    parser.add_argument("--hasta", help="YYYY-MM-DD")
+    parser.add_argument("--rol")
+    parser.add_argument("--umbral", type=float, default=UMBRAL_CRONICO, help="Tasa mínima de asistencia esperada.")
+    parser.add_argument("--ventana", type=int, default=20, help="Jornadas de la tasa reciente.")
+    args = parser.parse_args(argv)
+    resultado = patrones(args.desde, args.hasta, args.rol, args.umbral, args.ventana, args.db)
+    imprimir_patrones(resultado, args.umbral)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,9 @@
+"""
+Benchmarks reproducibles de los caminos críticos del sistema de asistencia.
+
+    python -m benchmarks --individuos 10000
+    python -m benchmarks --individuos 100000 --guardar-base benchmarks/baseline.json
+    python -m benchmarks --comparar benchmarks/baseline.json
+
+Cada escenario informa throughput (operaciones por segundo) y latencias p50/p95/p99.
+"""
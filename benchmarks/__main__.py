@@ -0,0 +1,55 @@
+import argparse
+import sys
+import tempfile
+import time
+
+from benchmarks import escenarios, medicion
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks del sistema de asistencia.")
+    parser.add_argument("--individuos", type=int, default=10_000, help="Tamaño de la población (10k a 5M).")
+    parser.add_argument("--usuarios-asistencia", type=int, default=2_000,
+                        help="Usuarios con asistencia diaria cargada (se limita al tamaño de la población).")
+    parser.add_argument("--dias", type=int, default=200, help="Jornadas de asistencia (un año lectivo).")
+    parser.add_argument("--repeticiones", type=int, default=500, help="Repeticiones por escenario.")
+    parser.add_argument("--solo", nargs="+", choices=list(escenarios.ESCENARIOS), help="Correr solo estos escenarios.")
+    parser.add_argument("--guardar-base", metavar="JSON", help="Guardar los resultados como línea base.")
+    parser.add_argument("--comparar", metavar="JSON", help="Comparar contra una línea base guardada.")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="Empeoramiento tolerado (0.2 = 20%%).")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="bench_asistencia_") as directorio:
+        ctx = escenarios.Contexto(
+            directorio,
+            individuos=args.individuos,
+            usuarios_asistencia=min(args.usuarios_asistencia, args.individuos),
+            dias=args.dias,
+            repeticiones=args.repeticiones,
+        )
+        t0 = time.perf_counter()
+        print(f"Preparando {ctx.individuos} individuos y {ctx.usuarios_asistencia} usuarios x {ctx.dias} jornadas...")
+        escenarios.preparar(ctx)
+        print(f"Datos listos en {time.perf_counter() - t0:.1f} s")
+
+        resultados = []
+        for nombre, escenario in escenarios.ESCENARIOS.items():
+            if args.solo and nombre not in args.solo:
+                continue
+            resultados.extend(escenario(ctx))
+
+    medicion.imprimir(resultados)
+
+    parametros = {k: v for k, v in vars(args).items() if k in ("individuos", "usuarios_asistencia", "dias", "repeticiones")}
+    if args.guardar_base:
+        medicion.guardar_base(args.guardar_base, resultados, parametros)
+        print(f"\nLínea base guardada en {args.guardar_base}")
+    if args.comparar:
+        regresiones = medicion.comparar(args.comparar, resultados, args.tolerancia)
+        if regresiones:
+            print(f"\n❌ Regresiones: {', '.join(regresiones)}")
+            return 1
+        print("\n✅ Sin regresiones respecto de la línea base.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import almacenamiento
+from benchmarks import datos, medicion
+
+# --- Tiempo de arranque de las entradas de consola ---
+# Mide, en un proceso nuevo cada vez, cuánto tarda cada entrada del kiosco en mostrar su
+# primera pregunta. La primera corrida de cada una (compila los .pyc) no se cuenta.
+#
+#     python -m benchmarks.arranque
+#     python -m benchmarks.arranque --repeticiones 50 --guardar-base arranque.json
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(RAIZ, "main.py")
+OBJETIVO_MS = 100
+
+# nombre -> (argumentos de python, texto de la primera pregunta)
+ENTRADAS = {
+    "arranque_interprete": (["-c", "input('Seleccione una opción: ')"], "Seleccione una opción:"),
+    "arranque_menu": ([MAIN], "Seleccione una opción:"),
+    "arranque_individuos": ([MAIN, "individuos"], "Selecciona una opción:"),
+    "arranque_asistencia": ([MAIN, "asistencia"], "Ingrese la fecha"),
+    "arranque_reportes": ([MAIN, "reportes"], "Seleccione una opción:"),
+}
+
+def hasta_la_pregunta(argumentos, pregunta, directorio, espera=30):
+    """Segundos desde que se lanza el proceso hasta que escribe `pregunta`. Después se lo termina."""
+    entorno = dict(os.environ, PYTHONIOENCODING="utf-8")
+    # Como en el kiosco: el precalentamiento deja escritos los .pyc y las corridas medidas los usan
+    entorno.pop("PYTHONDONTWRITEBYTECODE", None)
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen(
+        [sys.executable, *argumentos], cwd=directorio, env=entorno,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    )
+    buscado = pregunta.encode("utf-8")
+    leido = b""
+    try:
+        while buscado not in leido:
+            bloque = os.read(proceso.stdout.fileno(), 65536)
+            if not bloque or time.perf_counter() - inicio > espera:
+                raise RuntimeError(f"{' '.join(argumentos)} terminó sin preguntar '{pregunta}': {leido[-200:]!r}")
+            leido += bloque
+        return time.perf_counter() - inicio
+    finally:
+        proceso.kill()
+        proceso.wait()
+        proceso.stdout.close()
+        proceso.stdin.close()
+
+def medir_arranque(nombre, argumentos, pregunta, directorio, repeticiones):
+    hasta_la_pregunta(argumentos, pregunta, directorio)  # Precalentamiento
+    latencias = sorted(hasta_la_pregunta(argumentos, pregunta, directorio) for _ in range(repeticiones))
+    total = sum(latencias)
+    # Mismo formato que medicion.medir: sirve para guardar_base / comparar
+    return {
+        "nombre": nombre,
+        "ops": repeticiones,
+        "segundos": round(total, 4),
+        "ops_por_seg": round(repeticiones / total, 1) if total else 0.0,
+        "p50_ms": round(medicion.percentil(latencias, 50) * 1000, 3),
+        "p95_ms": round(medicion.percentil(latencias, 95) * 1000, 3),
+        "p99_ms": round(medicion.percentil(latencias, 99) * 1000, 3),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.arranque",
+                                     description="Tiempo hasta la primera pregunta de cada entrada de consola.")
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--individuos", type=int, default=200, help="Personas en la base de prueba.")
+    parser.add_argument("--objetivo-ms", type=float, default=OBJETIVO_MS, help="p50 máximo aceptado.")
+    parser.add_argument("--guardar-base", metavar="JSON", help="Guardar los resultados como línea base.")
+    parser.add_argument("--comparar", metavar="JSON", help="Comparar contra una línea base guardada.")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="Empeoramiento tolerado (0.2 = 20%%).")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="bench_arranque_") as directorio:
+        # La base por defecto (almacenamiento.DB_NAME) es relativa: se crea en el directorio de prueba
+        conn = almacenamiento.conectar(os.path.join(directorio, almacenamiento.DB_NAME))
+        try:
+            almacenamiento.migrar(conn)
+            datos.cargar_individuos(conn, args.individuos)
+        finally:
+            conn.close()
+        resultados = [
+            medir_arranque(nombre, argumentos, pregunta, directorio, args.repeticiones)
+            for nombre, (argumentos, pregunta) in ENTRADAS.items()
+        ]
+
+    medicion.imprimir(resultados)
+    base = resultados[0]["p50_ms"]
+    print(f"\nEl intérprete solo tarda {base:.1f} ms (p50); lo que agrega cada entrada:")
+    lentas = []
+    for resultado in resultados[1:]:
+        estado = "✅" if resultado["p50_ms"] <= args.objetivo_ms else "❌"
+        if estado == "❌":
+            lentas.append(resultado["nombre"])
+        print(f"  {estado} {resultado['nombre']:<22} +{resultado['p50_ms'] - base:7.1f} ms")
+
+    if args.guardar_base:
+        medicion.guardar_base(args.guardar_base, resultados, {"repeticiones": args.repeticiones})
+        print(f"\nLínea base guardada en {args.guardar_base}")
+    if args.comparar and medicion.comparar(args.comparar, resultados, args.tolerancia):
+        return 1
+    if lentas:
+        print(f"\n❌ Superan {args.objetivo_ms:g} ms hasta la primera pregunta: {', '.join(lentas)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+import random
+from datetime import date, timedelta
+
+# --- Generación de datos sintéticos (siempre con la misma semilla: resultados reproducibles) ---
+
+NOMBRES = ["Juan", "María", "José", "Ana", "Luis", "Lucía", "Carlos", "Sofía", "Jorge", "Valentina",
+           "Miguel", "Camila", "Pedro", "Martina", "Diego", "Julieta", "Pablo", "Florencia", "Andrés", "Paula"]
+APELLIDOS = ["González", "Rodríguez", "Gómez", "Fernández", "López", "Díaz", "Martínez", "Pérez", "García",
+             "Sánchez", "Romero", "Sosa", "Torres", "Álvarez", "Ruiz", "Ramírez", "Flores", "Benítez",
+             "Acosta", "Medina", "Herrera", "Suárez", "Aguirre", "Giménez", "Gutiérrez", "Pereyra"]
+GENEROS = ["Masculino", "Femenino", "No binario"]
+ROLES = ["Alumno"] * 18 + ["Profesor", "Administrador"]
+ESTADOS = ["Presente"] * 14 + ["Ausente"] * 3 + ["Tarde"] * 2 + ["Justificado"]
+DNI_BASE = 20_000_000
+LOTE = 50_000
+
+def dni(i):
+    return str(DNI_BASE + i)
+
+def individuos(cantidad, semilla=42, inicio=0):
+    """Genera tuplas (nombre, apellido, dni, fecha_nacimiento, genero, rol)."""
+    rnd = random.Random(semilla + inicio)
+    nacimiento_base = date(1960, 1, 1)
+    for i in range(inicio, inicio + cantidad):
+        yield (
+            rnd.choice(NOMBRES),
+            f"{rnd.choice(APELLIDOS)} {rnd.choice(APELLIDOS)}",
+            dni(i),
+            str(nacimiento_base + timedelta(days=rnd.randrange(0, 365 * 50))),
+            rnd.choice(GENEROS),
+            rnd.choice(ROLES),
+        )
+
+def cargar_individuos(conn, cantidad, semilla=42):
+    """Carga masiva directa (no es lo que se mide: solo prepara la población)."""
+    fuente = individuos(cantidad, semilla)
+    while True:
+        lote = [fila for _, fila in zip(range(LOTE), fuente)]
+        if not lote:
+            break
+        conn.executemany(
+            "INSERT INTO individuos (nombre, apellido, dni, fecha_nacimiento, genero, rol) VALUES (?, ?, ?, ?, ?, ?)", lote
+        )
+    conn.commit()
+
+def dias_habiles(desde, cantidad):
+    """Las primeras `cantidad` fechas de lunes a viernes a partir de `desde` (YYYY-MM-DD)."""
+    dia = date.fromisoformat(desde)
+    fechas = []
+    while len(fechas) < cantidad:
+        if dia.weekday() < 5:
+            fechas.append(str(dia))
+        dia += timedelta(days=1)
+    return fechas
+
+def marcas(usuarios, fecha, semilla=42):
+    """Marcas (usuario_id, estado) de los primeros `usuarios` individuos para una fecha."""
+    rnd = random.Random(f"{semilla}-{fecha}")
+    return [(usuario_id, rnd.choice(ESTADOS)) for usuario_id in range(1, usuarios + 1)]
@@ -0,0 +1,270 @@
+import contextlib
+import io
+import os
+import random
+from datetime import date
+
+import almacenamiento
+import diario_local
+import duplicados
+import grupos_asistencia
+import particiones_asistencia
+import registroasistencia
+import reportes_asistencia
+from EditarEliminar import DatabaseManager
+
+from benchmarks import datos
+from benchmarks.medicion import medir
+
+# --- Escenarios medidos ---
+# Cada escenario recibe el contexto preparado por __main__ y devuelve una lista de resultados.
+
+class Contexto:
+    def __init__(self, directorio, individuos, usuarios_asistencia, dias, repeticiones, semilla=42):
+        self.directorio = directorio
+        self.individuos = individuos
+        self.usuarios_asistencia = usuarios_asistencia
+        self.dias = dias
+        self.repeticiones = repeticiones
+        self.rnd = random.Random(semilla)
+        self.db_individuos = os.path.join(directorio, "registro_asistencia.db")
+        self.fechas = datos.dias_habiles("2025-03-03", dias)
+
+@contextlib.contextmanager
+def _silencio():
+    """Los métodos de DatabaseManager informan con print: no se mezclan con la tabla de resultados."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+def preparar(ctx):
+    """Crea la base con la población sintética y un año lectivo de asistencia."""
+    with _silencio():
+        db = DatabaseManager(ctx.db_individuos)
+    with db._get_connection() as conn:
+        datos.cargar_individuos(conn, ctx.individuos)
+    db.close()
+
+    registroasistencia.DB_NAME = ctx.db_individuos
+    # Todas las jornadas menos la última, que queda para medir el marcado
+    for fecha in ctx.fechas[:-1]:
+        registroasistencia.marcar_asistencia_lote(fecha, datos.marcas(ctx.usuarios_asistencia, fecha))
+
+def altas(ctx):
+    resultados = []
+    with _silencio():
+        db = DatabaseManager(ctx.db_individuos)
+        nuevos = (fila[:5] for fila in datos.individuos(ctx.repeticiones * 101, inicio=ctx.individuos))
+        resultados.append(medir("alta_individual", lambda i: db.add_individuo(*next(nuevos)), ctx.repeticiones))
+
+        def alta_lote(i):
+            with db.transaction():
+                for _ in range(100):
+                    db.add_individuo(*next(nuevos))
+        resultados.append(medir("alta_lote_100", alta_lote, max(1, ctx.repeticiones // 10), 100))
+
+        def correccion_lote(i):
+            ids = ctx.rnd.sample(range(1, ctx.individuos + 1), min(100, ctx.individuos))
+            db.bulk_update_individuos([{'id': j, 'genero': datos.GENEROS[(i + j) % 3], 'rol': None} for j in ids])
+        resultados.append(medir("correccion_lote_100", correccion_lote, max(1, ctx.repeticiones // 10), 100))
+    db.close()
+    return resultados
+
+def busquedas(ctx):
+    resultados = []
+    with _silencio():
+        db = DatabaseManager(ctx.db_individuos)
+        sin_cache = DatabaseManager(ctx.db_individuos, cache_size=0)
+    ids = [ctx.rnd.randint(1, ctx.individuos) for _ in range(ctx.repeticiones)]
+    # Un conjunto chico de DNI que se repite, como en un ingreso con credenciales
+    frecuentes = [datos.dni(ctx.rnd.randrange(ctx.individuos)) for _ in range(50)]
+
+    resultados.append(medir("buscar_por_id", lambda i: sin_cache.get_individuo_by_id(ids[i]), ctx.repeticiones))
+    resultados.append(medir("buscar_por_dni", lambda i: sin_cache.get_individuo_by_dni(datos.dni(ids[i] - 1)), ctx.repeticiones))
+    resultados.append(medir("buscar_por_dni_cache", lambda i: db.get_individuo_by_dni(frecuentes[i % 50]), ctx.repeticiones))
+
+    criterios = [
+        ("criterio_texto_apellido", {"apellido": "Pérez"}),
+        ("criterio_texto_nombre_apellido", {"nombre": "Mar", "apellido": "Gom"}),
+        ("criterio_prefijo_dni", {"dni": datos.dni(ctx.individuos // 2)[:6], "modo": "prefijo"}),
+        ("criterio_exacto_genero", {"genero": "No binario", "modo": "exacto"}),
+    ]
+    for nombre, filtro in criterios:
+        resultados.append(medir(nombre, lambda i: db.get_individuos_page(page_size=50, **filtro), ctx.repeticiones))
+
+    cursor = [None]
+    def pagina(i):
+        _, cursor[0] = db.get_individuos_page(page_size=50, cursor=cursor[0])
+    resultados.append(medir("pagina_siguiente_50", pagina, ctx.repeticiones))
+    db.close()
+    sin_cache.close()
+    return resultados
+
+def asistencia(ctx):
+    registroasistencia.DB_NAME = ctx.db_individuos
+    fecha = ctx.fechas[-1]
+    marcas = datos.marcas(ctx.usuarios_asistencia, fecha)
+    resultados = []
+    repeticiones = min(ctx.repeticiones, len(marcas))
+    resultados.append(medir(
+        "marcar_asistencia_individual",
+        lambda i: registroasistencia.marcar_asistencia(marcas[i][0], fecha, marcas[i][1]),
+        repeticiones,
+    ))
+    resultados.append(medir(
+        "marcar_asistencia_lote",
+        lambda i: registroasistencia.marcar_asistencia_lote(fecha, marcas),
+        3,
+        len(marcas),
+    ))
+    return resultados
+
+def diario(ctx):
+    """Marcas sin conexión en el diario local (un fsync por lote) y su envío a la base."""
+    fecha = ctx.fechas[-1]
+    marcas = datos.marcas(ctx.usuarios_asistencia, fecha)
+    directorio = os.path.join(ctx.directorio, "diario")
+    local = diario_local.DiarioLocal(directorio)
+    resultados = [medir(
+        "diario_marcar",
+        lambda i: local.marcar(marcas[i % len(marcas)][0], fecha, marcas[i % len(marcas)][1]),
+        len(marcas),
+    )]
+    local.rotar()
+    resultados.append(medir(
+        "diario_sincronizar",
+        lambda i: diario_local.sincronizar(directorio, ctx.db_individuos),
+        1,
+        len(marcas),
+    ))
+    return resultados
+
+def grupos(ctx):
+    """Apertura de una clase: toda la institución contra la planilla guardada de un grupo de 30."""
+    registroasistencia.DB_NAME = ctx.db_individuos
+    fecha = ctx.fechas[-2]  # Jornada ya marcada: la planilla trae las marcas
+    grupo_id = grupos_asistencia.crear_grupo(f"bench_{ctx.rnd.random()}", ctx.db_individuos)
+    grupos_asistencia.agregar_miembros(grupo_id, range(1, 31), ctx.db_individuos)
+    resultados = [medir(
+        "abrir_clase_todos", lambda i: grupos_asistencia.abrir_clase(None, fecha, ctx.db_individuos), 20, ctx.individuos,
+    )]
+    resultados.append(medir(
+        "abrir_clase_grupo", lambda i: grupos_asistencia.abrir_clase(grupo_id, fecha, ctx.db_individuos), ctx.repeticiones, 30,
+    ))
+    # Cada vuelta suma o saca a una persona del grupo y la planilla se rearma al abrir la clase
+    def rearmar(i):
+        cambiar = grupos_asistencia.quitar_miembros if i % 2 else grupos_asistencia.agregar_miembros
+        cambiar(grupo_id, [31], ctx.db_individuos)
+        grupos_asistencia.abrir_clase(grupo_id, fecha, ctx.db_individuos)
+    resultados.append(medir("abrir_clase_grupo_modificado", rearmar, 20, 30))
+    return resultados
+
+def reportes(ctx):
+    registroasistencia.DB_NAME = ctx.db_individuos
+    desde, hasta = ctx.fechas[0], ctx.fechas[-1]
+    mes = desde[:7]
+    return [
+        medir("reporte_por_persona", lambda i: reportes_asistencia.resumen_por_persona(desde, hasta), 3),
+        medir("reporte_una_persona", lambda i: reportes_asistencia.resumen_por_persona(desde, hasta, i + 1), 20),
+        medir("reporte_por_rol", lambda i: reportes_asistencia.resumen_por_rol(desde, hasta), 3),
+        medir("reporte_por_fecha", lambda i: reportes_asistencia.resumen_por_fecha(desde, hasta), 3),
+        medir("tablero_mensual_por_rol", lambda i: reportes_asistencia.resumen_mensual_por_rol(mes, mes), 20),
+    ]
+
+PADRON_GRANDE = 20_000
+
+def posibles_duplicados(ctx):
+    """Índice de duplicados: armado desde la base, consulta de un alta y barrido de todo el padrón."""
+    indice = [None]
+    def armar(i):
+        indice[0] = duplicados.IndiceDuplicados()
+        conn = almacenamiento.conectar(ctx.db_individuos)
+        try:
+            indice[0].cargar(conn)
+        finally:
+            conn.close()
+    resultados = [medir("duplicados_armar_indice", armar, 1, ctx.individuos)]
+
+    nuevos = list(datos.individuos(ctx.repeticiones, semilla=7))
+    def consultar(i):
+        nombre, apellido, dni, fecha_nacimiento = nuevos[i][:4]
+        indice[0].candidatos(f"{nombre} {apellido}", dni, fecha_nacimiento)
+    resultados.append(medir("duplicados_consulta_alta", consultar, ctx.repeticiones))
+    resultados.append(medir("duplicados_barrido_completo", lambda i: indice[0].pares(), 1, ctx.individuos))
+
+    # El barrido de un padrón grande se mide siempre a 20k personas, sin base y sea cual sea --individuos
+    grande = duplicados.IndiceDuplicados()
+    for i, (nombre, apellido, dni, fecha_nacimiento, *_) in enumerate(datos.individuos(PADRON_GRANDE, semilla=11)):
+        grande.agregar(i, f"{nombre} {apellido}", dni, fecha_nacimiento)
+    resultados.append(medir("duplicados_barrido_20k", lambda i: grande.pares(), 1, PADRON_GRANDE))
+    return resultados
+
+def analitica(ctx):
+    """Patrones de inasistencia sobre toda la matriz usuarios × jornadas (solo si NumPy está instalado)."""
+    try:
+        import analitica_asistencia
+    except ImportError:
+        print("(Se omite analitica: NumPy no está instalado.)")
+        return []
+
+    matriz = [None]
+    def cargar(i):
+        matriz[0] = analitica_asistencia.cargar_matriz(db_name=ctx.db_individuos)
+    def calcular(i):
+        analitica_asistencia.rachas_de_ausencia(matriz[0])
+        analitica_asistencia.tasa_movil(matriz[0])
+        analitica_asistencia.ausentismo_cronico(matriz[0])
+        analitica_asistencia.tendencia_tardanzas(matriz[0])
+    marcas = ctx.usuarios_asistencia * ctx.dias
+    return [
+        medir("analitica_cargar_matriz", cargar, 3, marcas),
+        medir("analitica_metricas", calcular, 3, marcas),
+    ]
+
+def particiones(ctx):
+    """Archiva el primer año de datos (si ya cerró) y repite el reporte por jornada sobre el archivo."""
+    registroasistencia.DB_NAME = ctx.db_individuos
+    anio = int(ctx.fechas[0][:4])
+    if anio >= date.today().year:
+        print(f"(Se omite particiones: {anio} todavía no cerró.)")
+        return []
+    desde, hasta = f"{anio}-01-01", f"{anio}-12-31"
+    marcas = sum(fecha[:4] == str(anio) for fecha in ctx.fechas) * ctx.usuarios_asistencia
+    resultados = [medir("reporte_anio_en_base", lambda i: reportes_asistencia.resumen_por_fecha(desde, hasta), 3, marcas)]
+    resultados.append(medir("particiones_archivar_anio", lambda i: particiones_asistencia.archivar_anio(anio, ctx.db_individuos), 1, marcas))
+    resultados.append(medir("reporte_anio_archivado", lambda i: reportes_asistencia.resumen_por_fecha(desde, hasta), 3, marcas))
+    return resultados
+
+def registro_http(ctx):
+    """POST /usuarios del servicio Flask (solo si Flask está instalado)."""
+    try:
+        from altadeusuario import create_app, init_db
+    except ImportError:
+        print("(Se omite registro_http: Flask/Flask-SQLAlchemy no están instalados.)")
+        return []
+
+    ruta = os.path.join(ctx.directorio, "usuarios.db")
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{ruta}"})
+    init_db(app)
+    cliente = app.test_client()
+
+    def registrar(i):
+        cliente.post("/usuarios", json={
+            "nombre_completo": f"Usuario {i}",
+            "dni": datos.dni(i),
+            "email": f"usuario{i}@example.com",
+            "rol": "Alumno",
+        })
+    return [medir("registro_http_post_usuarios", registrar, ctx.repeticiones)]
+
+ESCENARIOS = {
+    "altas": altas,
+    "busquedas": busquedas,
+    "asistencia": asistencia,
+    "diario": diario,
+    "grupos": grupos,
+    "reportes": reportes,
+    "analitica": analitica,
+    "duplicados": posibles_duplicados,
+    "particiones": particiones,  # Después de los demás: saca un año de la tabla `asistencia`
+    "registro_http": registro_http,
+}
@@ -0,0 +1,70 @@
+import json
+import time
+
+# --- Medición de latencias y comparación contra una línea base ---
+
+def percentil(valores_ordenados, p):
+    """Percentil por rango más cercano sobre una lista ya ordenada."""
+    if not valores_ordenados:
+        return 0.0
+    indice = max(0, min(len(valores_ordenados) - 1, round(p / 100 * len(valores_ordenados)) - 1))
+    return valores_ordenados[indice]
+
+def medir(nombre, operacion, repeticiones, ops_por_repeticion=1):
+    """
+    Ejecuta `operacion(i)` `repeticiones` veces y devuelve throughput y latencias.
+    `ops_por_repeticion` indica cuántas operaciones lógicas hace cada llamada (por ejemplo,
+    cuántas marcas guarda un lote), para que el throughput sea comparable.
+    """
+    latencias = []
+    inicio = time.perf_counter()
+    for i in range(repeticiones):
+        t0 = time.perf_counter()
+        operacion(i)
+        latencias.append(time.perf_counter() - t0)
+    total = time.perf_counter() - inicio
+    latencias.sort()
+    ops = repeticiones * ops_por_repeticion
+    return {
+        "nombre": nombre,
+        "ops": ops,
+        "segundos": round(total, 4),
+        "ops_por_seg": round(ops / total, 1) if total else 0.0,
+        "p50_ms": round(percentil(latencias, 50) * 1000, 3),
+        "p95_ms": round(percentil(latencias, 95) * 1000, 3),
+        "p99_ms": round(percentil(latencias, 99) * 1000, 3),
+    }
+
+def imprimir(resultados):
+    print(f"\n{'Escenario':<34} {'ops':>8} {'ops/s':>12} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for r in resultados:
+        print(f"{r['nombre']:<34} {r['ops']:>8} {r['ops_por_seg']:>12} {r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9}")
+
+def guardar_base(ruta, resultados, parametros):
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump({"parametros": parametros, "resultados": resultados}, archivo, indent=2, ensure_ascii=False)
+
+def comparar(ruta, resultados, tolerancia=0.2):
+    """
+    Compara contra la línea base guardada. Es regresión si el p50 empeora o el throughput
+    cae más que `tolerancia` (20% por defecto). Devuelve la lista de regresiones.
+    """
+    with open(ruta, encoding="utf-8") as archivo:
+        base = {r["nombre"]: r for r in json.load(archivo)["resultados"]}
+
+    regresiones = []
+    print(f"\n{'Escenario':<34} {'ops/s base':>12} {'ops/s':>12} {'p50 base':>9} {'p50':>9}  Estado")
+    for r in resultados:
+        anterior = base.get(r["nombre"])
+        if anterior is None:
+            print(f"{r['nombre']:<34} {'-':>12} {r['ops_por_seg']:>12} {'-':>9} {r['p50_ms']:>9}  nuevo")
+            continue
+        empeora = (
+            r["ops_por_seg"] < anterior["ops_por_seg"] * (1 - tolerancia)
+            or r["p50_ms"] > anterior["p50_ms"] * (1 + tolerancia)
+        )
+        if empeora:
+            regresiones.append(r["nombre"])
+        print(f"{r['nombre']:<34} {anterior['ops_por_seg']:>12} {r['ops_por_seg']:>12} "
+              f"{anterior['p50_ms']:>9} {r['p50_ms']:>9}  {'REGRESIÓN' if empeora else 'ok'}")
+    return regresiones
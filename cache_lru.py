@@ -0,0 +1,65 @@
+import threading
+import time
+from collections import OrderedDict
+
+_AUSENTE = object()
+
+
+class LRUCache:
+    """Caché LRU acotada, con vencimiento por tiempo (TTL) y contadores de aciertos/fallos."""
+
+    def __init__(self, maxsize=1024, ttl=300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()  # clave -> (vence_en, valor)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Devuelve el valor guardado (y lo marca como recién usado) o `default` si no está o venció."""
+        with self._lock:
+            entrada = self._data.get(key, _AUSENTE)
+            if entrada is not _AUSENTE:
+                vence_en, valor = entrada
+                if vence_en > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return valor
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def __contains__(self, key):
+        with self._lock:
+            entrada = self._data.get(key, _AUSENTE)
+            return entrada is not _AUSENTE and entrada[0] > time.monotonic()
+
+    def set(self, key, value):
+        """Guarda un valor; si se supera `maxsize` se descarta el menos usado."""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, *keys):
+        """Quita de la caché las claves indicadas (las que no estén se ignoran)."""
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """Aciertos, fallos, tasa de aciertos y tamaño actual."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "size": len(self._data),
+            }
@@ -0,0 +1,251 @@
+import argparse
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from datetime import date
+
+import diario_local
+import instrumentacion
+import registroasistencia
+from registroasistencia import ESTADOS_VALIDOS, crear_tablas, marcar_asistencia_lote
+
+# --- Servicio de check-in asíncrono (lectores de credenciales) ---
+# Cada petición HTTP deja su marca en una cola en memoria y espera el acuse.
+# Una única tarea escritora vacía la cola en micro-lotes (por tamaño o por tiempo) con
+# marcar_asistencia_lote: un solo escritor y una transacción por lote, sin pelear por el
+# lock de SQLite. Si la base no está accesible, el lote va al diario local (diario_local.py)
+# y se responde 202: la marca se envía a la base al sincronizar.
+#
+#     python checkin_async.py --port 8081
+#     curl -X POST localhost:8081/checkin -d '{"usuario_id": 7, "estado": "P"}'
+
+logger = logging.getLogger(__name__)
+
+MAX_LOTE = 500
+MAX_ESPERA = 0.05  # segundos que se espera a juntar más marcas antes de escribir
+MAX_CUERPO = 64 * 1024
+
+
+class EscritorAsistencia:
+    """Junta marcas en una cola y las guarda en micro-lotes desde una sola tarea."""
+
+    def __init__(self, max_lote=MAX_LOTE, max_espera=MAX_ESPERA):
+        self.max_lote = max_lote
+        self.max_espera = max_espera
+        self.cola = asyncio.Queue()
+        self.lotes_escritos = 0
+        self.marcas_escritas = 0
+        self._tarea = None
+
+    def iniciar(self):
+        self._tarea = asyncio.create_task(self._escribir_siempre())
+
+    async def detener(self):
+        """Espera (un máximo de 10 s) a que se guarde lo pendiente y termina la tarea escritora."""
+        if self._tarea and not self._tarea.done():
+            try:
+                await asyncio.wait_for(self.cola.join(), 10)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                pass
+            self._tarea.cancel()
+
+    async def marcar(self, usuario_id, fecha, estado):
+        """Encola una marca y espera a que quede guardada (o falle) en la base."""
+        acuse = asyncio.get_running_loop().create_future()
+        await self.cola.put((usuario_id, fecha, estado, acuse))
+        return await acuse
+
+    async def _juntar_lote(self):
+        """Espera la primera marca y junta más hasta llenar el lote o agotar el tiempo."""
+        lote = [await self.cola.get()]
+        limite = time.monotonic() + self.max_espera
+        while len(lote) < self.max_lote:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                lote.append(await asyncio.wait_for(self.cola.get(), restante))
+            except asyncio.TimeoutError:
+                break
+        return lote
+
+    async def _escribir_siempre(self):
+        # La tarea no debe morir: sin ella ninguna petición recibe su acuse
+        while True:
+            lote = await self._juntar_lote()
+            try:
+                await self._escribir_lote(lote)
+            except Exception as e:
+                logger.exception("Error inesperado en el escritor de asistencia")
+                for *_, acuse in lote:
+                    if not acuse.done():
+                        acuse.set_exception(e)
+            finally:
+                self.lotes_escritos += 1
+                self.marcas_escritas += len(lote)
+                for _ in lote:
+                    self.cola.task_done()
+
+    async def _escribir_lote(self, lote):
+        por_fecha = {}
+        for marca in lote:
+            por_fecha.setdefault(marca[1], []).append(marca)
+        for fecha, marcas in por_fecha.items():
+            # Varias marcas de una persona en el mismo lote: queda la última, y todas reciben ese estado
+            finales = {usuario_id: estado for usuario_id, _, estado, _ in marcas}
+            pares = list(finales.items())
+            try:
+                # SQLite es bloqueante: se escribe en un hilo para no frenar el loop
+                resultado = await asyncio.to_thread(marcar_asistencia_lote, fecha, pares)
+                rechazados, error, pendiente = set(resultado["rechazados"]), None, False
+            except sqlite3.OperationalError as e:
+                # El diario no sabe si la persona existe: eso se resuelve al sincronizar
+                try:
+                    await asyncio.to_thread(diario_local.guardar_marcas, fecha, pares)
+                    rechazados, error, pendiente = set(), None, True
+                except Exception as error_diario:
+                    # Ni base ni diario (disco lleno, sin permisos): la marca no quedó en ningún lado
+                    logger.exception("Sin acceso a la base (%s) ni al diario local: no se guardaron %d marcas del %s",
+                                     e, len(marcas), fecha)
+                    rechazados, error, pendiente = set(), error_diario, False
+            except Exception as e:
+                rechazados, error, pendiente = set(), e, False
+            for usuario_id, _, _, acuse in marcas:
+                if acuse.done():
+                    continue
+                if error:
+                    acuse.set_exception(error)
+                else:
+                    acuse.set_result({"usuario_id": usuario_id, "fecha": fecha, "estado": finales[usuario_id],
+                                      "guardado": usuario_id not in rechazados, "pendiente": pendiente})
+
+# --- HTTP mínimo sobre asyncio ---
+MENSAJES = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+def _respuesta(status, cuerpo, keep_alive):
+    # Un str se envía tal cual (las métricas); el resto, como JSON
+    if isinstance(cuerpo, str):
+        datos, tipo = cuerpo.encode("utf-8"), instrumentacion.TIPO_PROMETHEUS
+    else:
+        datos, tipo = json.dumps(cuerpo, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8"
+    encabezados = [
+        f"HTTP/1.1 {status} {MENSAJES.get(status, '')}",
+        f"Content-Type: {tipo}",
+        f"Content-Length: {len(datos)}",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+    ]
+    return ("\r\n".join(encabezados) + "\r\n\r\n").encode("latin-1") + datos
+
+def validar_marca(data):
+    """Devuelve (usuario_id, fecha, estado) o lanza ValueError con el motivo."""
+    if not isinstance(data, dict):
+        raise ValueError("El cuerpo debe ser un objeto JSON.")
+    usuario_id = data.get("usuario_id")
+    if not isinstance(usuario_id, int) or isinstance(usuario_id, bool):
+        raise ValueError("El campo 'usuario_id' es obligatorio y debe ser un número.")
+    estado = str(data.get("estado", "P")).strip()
+    estado = ESTADOS_VALIDOS.get(estado.upper(), estado.capitalize())
+    if estado not in ESTADOS_VALIDOS.values():
+        raise ValueError(f"Estado no válido: '{data.get('estado')}'.")
+    fecha = data.get("fecha") or str(date.today())
+    try:
+        date.fromisoformat(fecha)
+    except (TypeError, ValueError):
+        raise ValueError("La fecha debe tener el formato YYYY-MM-DD.")
+    return usuario_id, fecha, estado
+
+async def _atender(escritor, metodo, ruta, cuerpo):
+    if metodo == "GET" and ruta == "/salud":
+        return 200, {"pendientes": escritor.cola.qsize(), "lotes_escritos": escritor.lotes_escritos,
+                     "marcas_escritas": escritor.marcas_escritas}
+    if metodo == "GET" and ruta == "/metrics":
+        return 200, instrumentacion.REGISTRO.texto_prometheus()
+    if metodo != "POST" or ruta != "/checkin":
+        return 404, {"error": "Ruta no encontrada."}
+    try:
+        usuario_id, fecha, estado = validar_marca(json.loads(cuerpo or b"null"))
+    except ValueError as e:
+        return 400, {"error": str(e)}
+    try:
+        acuse = await escritor.marcar(usuario_id, fecha, estado)
+    except Exception as e:
+        return 500, {"error": f"Error al guardar la asistencia: {e}"}
+    if not acuse["guardado"]:
+        return 404, {"error": f"No existe una persona registrada con ID {usuario_id}."}
+    return (202 if acuse["pendiente"] else 200), acuse
+
+async def _conexion(escritor, reader, writer):
+    try:
+        while True:
+            linea = await reader.readline()
+            if not linea:
+                break
+            try:
+                metodo, ruta, version = linea.decode("latin-1").split()
+            except ValueError:
+                writer.write(_respuesta(400, {"error": "Petición mal formada."}, False))
+                break
+            encabezados = {}
+            while True:
+                h = await reader.readline()
+                if h in (b"\r\n", b"\n", b""):
+                    break
+                nombre, _, valor = h.decode("latin-1").partition(":")
+                encabezados[nombre.strip().lower()] = valor.strip()
+
+            try:
+                largo = int(encabezados.get("content-length") or 0)
+            except ValueError:
+                writer.write(_respuesta(400, {"error": "Content-Length inválido."}, False))
+                break
+            if largo > MAX_CUERPO:
+                writer.write(_respuesta(413, {"error": "Cuerpo demasiado grande."}, False))
+                break
+            cuerpo = await reader.readexactly(largo) if largo else b""
+            keep_alive = encabezados.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+            ruta = ruta.split("?")[0]
+            inicio = time.perf_counter()
+            status, respuesta = await _atender(escritor, metodo, ruta, cuerpo)
+            # Las rutas desconocidas van juntas: una serie por cada URL inventada no sirve
+            instrumentacion.observar_http("checkin", ruta if status != 404 or ruta == "/checkin" else "sin_ruta",
+                                          metodo, status, time.perf_counter() - inicio)
+            writer.write(_respuesta(status, respuesta, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+async def servir(host="0.0.0.0", port=8081, max_lote=MAX_LOTE, max_espera=MAX_ESPERA):
+    crear_tablas()
+    escritor = EscritorAsistencia(max_lote, max_espera)
+    escritor.iniciar()
+    servidor = await asyncio.start_server(lambda r, w: _conexion(escritor, r, w), host, port)
+    print(f"Check-in de asistencia escuchando en http://{host}:{port}/checkin ({registroasistencia.DB_NAME})")
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        await escritor.detener()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servicio HTTP asíncrono de check-in de asistencia.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--lote", type=int, default=MAX_LOTE, help="Máximo de marcas por escritura.")
+    parser.add_argument("--espera-ms", type=float, default=MAX_ESPERA * 1000,
+                        help="Tiempo máximo que una marca espera a que se llene el lote.")
+    args = parser.parse_args(argv)
+    instrumentacion.configurar_logs()
+    try:
+        asyncio.run(servir(args.host, args.port, args.lote, args.espera_ms / 1000))
+    except KeyboardInterrupt:
+        print("\nServicio de check-in detenido.")
+
+if __name__ == "__main__":
+    main()
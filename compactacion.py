@@ -0,0 +1,164 @@
+import argparse
+import logging
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import almacenamiento
+
+# --- Compactación de bajas lógicas ---
+# delete_individuo y eliminar_asistencia no borran: marcan `eliminado_en`. Este proceso borra
+# definitivamente las bajas más viejas que el plazo de retención, de a trozos chicos (una
+# transacción corta por trozo y una pausa entre trozos, para no frenar a quienes marcan asistencia)
+# y después devuelve el espacio libre al sistema de archivos.
+#
+#     python compactacion.py                       # una pasada
+#     python compactacion.py --cada-minutos 60     # en segundo plano, una pasada por hora
+
+logger = logging.getLogger(__name__)
+
+RETENCION_DIAS = 30
+TAMANO_TROZO = 500       # Filas borradas por transacción
+PAUSA_ENTRE_TROZOS = 0.05  # Segundos que se cede la base entre un trozo y el siguiente
+PAGINAS_POR_PASADA = 2000  # Páginas liberadas por incremental_vacuum en horario laboral
+HORARIO_LABORAL = (7, 19)  # De 7 a 19 hs, lunes a viernes: no se hace VACUUM completo
+
+def en_horario_laboral(momento=None):
+    momento = momento or datetime.now()
+    return momento.weekday() < 5 and HORARIO_LABORAL[0] <= momento.hour < HORARIO_LABORAL[1]
+
+def _limite(retencion_dias):
+    """Las bajas anteriores a este momento (mismo formato que almacenamiento.ahora()) se purgan."""
+    return (datetime.now(timezone.utc) - timedelta(days=retencion_dias)).strftime("%Y-%m-%d %H:%M:%S")
+
+def _borrar_en_trozos(conn, tabla, limite, tamano_trozo, pausa, detener):
+    borradas = 0
+    while not (detener and detener.is_set()):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # idx_<tabla>_bajas: solo se recorren las filas dadas de baja
+            cursor = conn.execute(f'''
+                DELETE FROM {tabla} WHERE id IN (
+                    SELECT id FROM {tabla} WHERE eliminado_en IS NOT NULL AND eliminado_en < ? LIMIT ?
+                )
+            ''', (limite, tamano_trozo))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        borradas += cursor.rowcount
+        if cursor.rowcount < tamano_trozo:
+            break
+        time.sleep(pausa)
+    return borradas
+
+def purgar(conn, retencion_dias=RETENCION_DIAS, tamano_trozo=TAMANO_TROZO, pausa=PAUSA_ENTRE_TROZOS, detener=None):
+    """
+    Borra las bajas más viejas que `retencion_dias`. Primero las asistencias (también las de las
+    personas dadas de baja, que tienen la misma marca de tiempo) y después las personas, así el
+    ON DELETE CASCADE nunca tiene que borrar miles de filas en una sola transacción.
+    Devuelve {"asistencias": n, "individuos": n}.
+    """
+    limite = _limite(retencion_dias)
+    return {
+        "asistencias": _borrar_en_trozos(conn, "asistencia", limite, tamano_trozo, pausa, detener),
+        "individuos": _borrar_en_trozos(conn, "individuos", limite, tamano_trozo, pausa, detener),
+    }
+
+def liberar_espacio(conn, completo=False, paginas=PAGINAS_POR_PASADA):
+    """
+    Devuelve al sistema de archivos las páginas libres. Con auto_vacuum INCREMENTAL alcanza con
+    incremental_vacuum (rápido, de a `paginas`). El VACUUM completo reescribe toda la base y la
+    bloquea mientras tanto: solo con completo=True; la primera vez además activa auto_vacuum INCREMENTAL.
+    Devuelve la cantidad de páginas libres que quedan.
+    """
+    if completo:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    elif conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        conn.execute(f"PRAGMA incremental_vacuum({int(paginas)})").fetchall()
+    return conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+def compactar(db_name=None, retencion_dias=RETENCION_DIAS, tamano_trozo=TAMANO_TROZO,
+              pausa=PAUSA_ENTRE_TROZOS, vacuum_completo=None, detener=None):
+    """
+    Una pasada completa: purga y libera espacio. El VACUUM completo se hace solo fuera del
+    horario laboral (o si se pide explícitamente con vacuum_completo=True).
+    """
+    if vacuum_completo is None:
+        vacuum_completo = not en_horario_laboral()
+    conn = almacenamiento.conectar(db_name)
+    conn.isolation_level = None  # Transacciones explícitas; VACUUM no puede correr dentro de una
+    try:
+        almacenamiento.migrar(conn)
+        resumen = purgar(conn, retencion_dias, tamano_trozo, pausa, detener)
+        resumen["paginas_libres"] = liberar_espacio(conn, completo=vacuum_completo and not (detener and detener.is_set()))
+        return resumen
+    finally:
+        conn.close()
+
+class Compactador:
+    """Corre compactar() cada `intervalo` segundos en un hilo en segundo plano."""
+
+    def __init__(self, db_name=None, intervalo=3600, **opciones):
+        self.db_name = db_name
+        self.intervalo = intervalo
+        self.opciones = opciones
+        self.ultimo_resumen = None
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._correr_siempre, name="compactador", daemon=True)
+        self._hilo.start()
+
+    def detener(self, espera=30):
+        """Pide que termine (corta entre dos trozos) y espera al hilo."""
+        self._detener.set()
+        if self._hilo:
+            self._hilo.join(espera)
+
+    def _correr_siempre(self):
+        while not self._detener.is_set():
+            try:
+                self.ultimo_resumen = compactar(self.db_name, detener=self._detener, **self.opciones)
+            except Exception:
+                logger.exception("Error en la compactación")
+            self._detener.wait(self.intervalo)
+
+# --- Uso desde la consola ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Purga las bajas lógicas viejas y compacta la base.")
+    parser.add_argument("--db", default=almacenamiento.DB_NAME)
+    parser.add_argument("--retencion-dias", type=float, default=RETENCION_DIAS)
+    parser.add_argument("--trozo", type=int, default=TAMANO_TROZO, help="Filas borradas por transacción.")
+    parser.add_argument("--vacuum", choices=["auto", "si", "no"], default="auto",
+                        help="VACUUM completo: 'auto' solo fuera del horario laboral.")
+    parser.add_argument("--cada-minutos", type=float, help="Repetir en segundo plano con este intervalo.")
+    args = parser.parse_args(argv)
+
+    opciones = {
+        "retencion_dias": args.retencion_dias,
+        "tamano_trozo": args.trozo,
+        "vacuum_completo": {"auto": None, "si": True, "no": False}[args.vacuum],
+    }
+    if args.cada_minutos:
+        compactador = Compactador(args.db, args.cada_minutos * 60, **opciones)
+        compactador.iniciar()
+        print(f"Compactación cada {args.cada_minutos:g} minutos. Ctrl+C para terminar.")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            compactador.detener()
+        return 0
+
+    resumen = compactar(args.db, **opciones)
+    print(f"✅ Purgadas {resumen['individuos']} personas y {resumen['asistencias']} asistencias "
+          f"dadas de baja hace más de {args.retencion_dias:g} días ({resumen['paginas_libres']} páginas libres).")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import instrumentacion
+
+# PRAGMAs que se aplican una sola vez, al abrir cada conexión del pool.
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",       # Lectores y escritor no se bloquean entre sí
+    "synchronous": "NORMAL",     # Seguro con WAL y evita un fsync por commit
+    "cache_size": -20000,        # ~20 MB de caché de páginas por conexión
+    "mmap_size": 268435456,      # 256 MB de lectura mapeada en memoria
+    "busy_timeout": 5000,        # Espera hasta 5 s si la base está bloqueada
+    "temp_store": "MEMORY",
+    "foreign_keys": "ON",        # Necesario para ON DELETE CASCADE en asistencia
+}
+
+# Sentencias preparadas que cada conexión guarda (por texto SQL) para no volver a compilarlas.
+# Como las conexiones del pool viven mucho, las consultas repetidas se compilan una sola vez.
+CACHED_STATEMENTS = 256
+
+
+class ConnectionPool:
+    """Pool de conexiones SQLite reutilizables y seguro entre hilos."""
+
+    def __init__(self, db_name, size=5, pragmas=None, timeout=30.0):
+        self.db_name = db_name
+        self.size = size
+        self.timeout = timeout
+        self.pragmas = dict(DEFAULT_PRAGMAS)
+        if pragmas:
+            self.pragmas.update(pragmas)
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._all = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._closed = False
+
+    def _connect(self):
+        """Abre una conexión nueva y le aplica los PRAGMAs configurados."""
+        conn = sqlite3.connect(
+            self.db_name, timeout=self.timeout, check_same_thread=False, cached_statements=CACHED_STATEMENTS,
+            factory=instrumentacion.fabrica_conexion(),  # Tiempos y filas de cada sentencia
+        )
+        conn.row_factory = sqlite3.Row  # Para acceder a las columnas por nombre
+        for pragma, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
+        with self._lock:
+            self._all.append(conn)
+        return conn
+
+    def acquire(self):
+        """Toma una conexión libre del pool (o abre una si aún hay lugar)."""
+        if self._closed:
+            raise RuntimeError("El pool de conexiones está cerrado.")
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"No hay conexiones libres en el pool de {self.db_name}.")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            try:
+                return self._connect()
+            except Exception:
+                self._slots.release()
+                raise
+
+    def release(self, conn):
+        """Devuelve una conexión al pool, descartando cualquier transacción abierta."""
+        if self._closed:
+            conn.close()
+        else:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """
+        Presta una conexión al hilo actual. Si el hilo ya tiene una prestada
+        (por ejemplo, dentro de una transacción) se reutiliza la misma, y vuelve
+        al pool recién cuando termina el último de los préstamos anidados.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self.acquire()
+            self._local.conn = conn
+            self._local.depth = 0
+        self._local.depth += 1
+        try:
+            yield conn
+        finally:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                self._local.conn = None
+                self.release(conn)
+
+    def close(self):
+        """Cierra todas las conexiones abiertas por el pool."""
+        self._closed = True
+        with self._lock:
+            conns, self._all = self._all, []
+        for conn in conns:
+            conn.close()
@@ -0,0 +1,327 @@
+import argparse
+import atexit
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+import almacenamiento
+
+# --- Diario local de asistencia (kiosco sin conexión) ---
+# Si el kiosco pierde acceso a la base compartida, las marcas se anotan en un diario local de
+# solo agregado (JSON Lines) y se envían a la base central más tarde. marcar() solo deja la marca
+# en memoria; se escriben de a lotes con un único fsync por lote (por cantidad o por tiempo).
+#
+# El diario es una carpeta de segmentos. Cada proceso escribe el suyo (`*.abierto`) y lo cierra
+# (`*.jsonl`) al rotarlo o al terminar. sincronizar() aplica los segmentos cerrados en una sola
+# transacción con el mismo UPSERT sobre UNIQUE(usuario_id, fecha) que marcar_asistencia y, una vez
+# confirmada, los borra. Gana la escritura más reciente (`asistencia.actualizado_en`), así que
+# reenviar un segmento (por un corte entre el COMMIT y el borrado) no cambia nada.
+#
+#     python diario_local.py estado
+#     python diario_local.py sincronizar
+#     python diario_local.py sincronizar --db copia_local.db --cada-segundos 60
+
+DIRECTORIO = os.environ.get("ASISTENCIA_DIARIO", "diario_asistencia")
+LOTE_FSYNC = 64                   # Marcas por fsync
+ESPERA_FSYNC = 0.2                # Segundos que una marca puede esperar en memoria antes del fsync
+MAX_SEGMENTO = 4 * 1024 * 1024    # Bytes de un segmento antes de rotarlo
+INACTIVO_SEGUNDOS = 60            # Un segmento abierto sin escrituras por más tiempo también se envía
+TAMANO_LOTE = 500                 # Marcas por sentencia al sincronizar (límite de parámetros del IN)
+
+ABIERTO, CERRADO = ".abierto", ".jsonl"
+
+def _sincronizar_directorio(directorio):
+    """fsync de la carpeta: sin esto, un segmento recién creado o renombrado puede perderse en un corte de luz."""
+    if os.name == "nt":  # En Windows no se puede abrir una carpeta; NTFS ya registra el cambio
+        return
+    fd = os.open(directorio, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+class DiarioLocal:
+    """Diario de un proceso. marcar() anota en memoria; vaciar() (o el lote lleno, o el temporizador) escribe y hace fsync."""
+
+    def __init__(self, directorio=None, lote_fsync=LOTE_FSYNC, espera_fsync=ESPERA_FSYNC, max_segmento=MAX_SEGMENTO):
+        self.directorio = directorio or DIRECTORIO
+        self.lote_fsync = lote_fsync
+        self.espera_fsync = espera_fsync
+        self.max_segmento = max_segmento
+        self.marcas_escritas = 0
+        self.fsyncs = 0
+        self._pendientes = []
+        self._lock = threading.Lock()
+        self._temporizador = None
+        self._segmento = None  # Ruta sin extensión del segmento abierto
+        self._bytes = 0
+        self._segmentos_creados = 0
+        os.makedirs(self.directorio, exist_ok=True)
+
+    def marcar(self, usuario_id, fecha, estado, marcado_en=None):
+        """Anota una marca y devuelve su momento (el que decide qué escritura gana al sincronizar)."""
+        marcado_en = marcado_en or almacenamiento.ahora_preciso()
+        with self._lock:
+            self._pendientes.append((usuario_id, fecha, estado, marcado_en))
+            if len(self._pendientes) >= self.lote_fsync:
+                self._escribir()
+            elif self._temporizador is None:
+                self._temporizador = threading.Timer(self.espera_fsync, self.vaciar)
+                self._temporizador.daemon = True
+                self._temporizador.start()
+        return marcado_en
+
+    def vaciar(self):
+        """Escribe en el segmento las marcas en memoria y espera a que lleguen al disco."""
+        with self._lock:
+            self._escribir()
+
+    def rotar(self):
+        """Vacía y cierra el segmento actual: queda listo para sincronizar. La próxima marca abre otro."""
+        with self._lock:
+            self._escribir()
+            self._cerrar_segmento()
+
+    def cerrar(self):
+        self.rotar()
+
+    @property
+    def pendientes(self):
+        """Marcas que todavía no llegaron al disco."""
+        return len(self._pendientes)
+
+    def _escribir(self):
+        if self._temporizador is not None:
+            self._temporizador.cancel()
+            self._temporizador = None
+        if not self._pendientes:
+            return
+        datos = "".join(
+            json.dumps({"usuario_id": usuario_id, "fecha": fecha, "estado": estado, "marcado_en": marcado_en},
+                       ensure_ascii=False) + "\n"
+            for usuario_id, fecha, estado, marcado_en in self._pendientes
+        ).encode("utf-8")
+        if self._segmento is not None and self._bytes and self._bytes + len(datos) > self.max_segmento:
+            self._cerrar_segmento()
+        nuevo = self._segmento is None
+        if nuevo:
+            self._segmentos_creados += 1
+            nombre = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{os.getpid()}-{self._segmentos_creados:04d}"
+            self._segmento = os.path.join(self.directorio, nombre)
+            self._bytes = 0
+        # Se abre en cada lote: si sincronizar() se llevó el segmento por inactivo, se vuelve a crear
+        with open(self._segmento + ABIERTO, "ab") as archivo:
+            archivo.write(datos)
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        if nuevo:
+            _sincronizar_directorio(self.directorio)
+        self._bytes += len(datos)
+        self.marcas_escritas += len(self._pendientes)
+        self.fsyncs += 1
+        self._pendientes = []
+
+    def _cerrar_segmento(self):
+        if self._segmento is None:
+            return
+        with contextlib.suppress(FileNotFoundError):  # Ya lo tomó la sincronización
+            os.replace(self._segmento + ABIERTO, self._segmento + CERRADO)
+            _sincronizar_directorio(self.directorio)
+        self._segmento = None
+        self._bytes = 0
+
+# Diario del proceso (kiosco de consola, servicio de check-in), creado con la primera marca sin conexión
+_compartido = None
+_lock_compartido = threading.Lock()
+
+def diario_compartido():
+    """El DiarioLocal de este proceso. Se cierra solo al terminar el programa."""
+    global _compartido
+    with _lock_compartido:
+        if _compartido is None:
+            _compartido = DiarioLocal()
+            atexit.register(_compartido.cerrar)
+        return _compartido
+
+def guardar_marcas(fecha, marcas, marcado_en=None):
+    """Anota en el diario del proceso una lista de (usuario_id, estado) de la misma fecha."""
+    diario = diario_compartido()
+    marcado_en = marcado_en or almacenamiento.ahora_preciso()
+    for usuario_id, estado in marcas:
+        diario.marcar(usuario_id, fecha, estado, marcado_en)
+    diario.vaciar()  # El llamador informa que quedó guardado: tiene que estar en disco
+
+# --- Envío a la base central ---
+def segmentos_pendientes(directorio=None, inactivo_segundos=INACTIVO_SEGUNDOS):
+    """
+    Segmentos listos para enviar, en orden de creación. Los abiertos sin escrituras hace más de
+    `inactivo_segundos` (un proceso que terminó sin cerrarlo) se cierran acá.
+    """
+    directorio = directorio or DIRECTORIO
+    if not os.path.isdir(directorio):
+        return []
+    limite = time.time() - inactivo_segundos
+    tomados = False
+    for nombre in os.listdir(directorio):
+        if nombre.endswith(ABIERTO):
+            ruta = os.path.join(directorio, nombre)
+            with contextlib.suppress(FileNotFoundError):
+                if os.path.getmtime(ruta) < limite:
+                    os.replace(ruta, ruta[:-len(ABIERTO)] + CERRADO)
+                    tomados = True
+    if tomados:
+        # Un escritor que lo abrió justo antes del rename termina su lote (y su fsync) en este tiempo
+        time.sleep(ESPERA_FSYNC)
+    return sorted(os.path.join(directorio, n) for n in os.listdir(directorio) if n.endswith(CERRADO))
+
+def leer_segmento(ruta):
+    """Marcas (usuario_id, fecha, estado, marcado_en) de un segmento y cantidad de líneas ilegibles."""
+    marcas, ilegibles = [], 0
+    with open(ruta, "rb") as archivo:
+        for linea in archivo:
+            try:
+                registro = json.loads(linea)
+                marcas.append((int(registro["usuario_id"]), registro["fecha"], registro["estado"], registro["marcado_en"]))
+            except (ValueError, KeyError, TypeError):
+                # Típicamente la última línea a medio escribir de un proceso cortado antes del fsync
+                ilegibles += 1
+    return marcas, ilegibles
+
+# Gana la escritura más reciente; las filas sin `actualizado_en` (anteriores a la migración 8) pierden siempre
+SQL_REPRODUCIR = '''
+    INSERT INTO asistencia (usuario_id, fecha, estado, actualizado_en)
+    SELECT ?1, ?2, ?3, ?4 WHERE EXISTS (SELECT 1 FROM individuos WHERE id = ?1 AND eliminado_en IS NULL)
+    ON CONFLICT(usuario_id, fecha) DO UPDATE SET
+        estado = excluded.estado, eliminado_en = NULL, actualizado_en = excluded.actualizado_en
+    WHERE asistencia.actualizado_en IS NULL OR excluded.actualizado_en > asistencia.actualizado_en
+'''
+
+def sincronizar(directorio=None, db_name=None, tamano_lote=TAMANO_LOTE, inactivo_segundos=INACTIVO_SEGUNDOS):
+    """
+    Envía a la base (por defecto, la central) los segmentos pendientes del diario y los borra.
+    Devuelve un resumen: marcas aplicadas, sin efecto (había una escritura más reciente),
+    rechazadas (IDs sin persona vigente), descartadas por ser de un año archivado y líneas ilegibles.
+    """
+    resumen = {"segmentos": 0, "marcas": 0, "aplicadas": 0, "sin_efecto": 0, "rechazadas": [], "archivadas": 0,
+               "ilegibles": 0}
+    segmentos = segmentos_pendientes(directorio, inactivo_segundos)
+    if not segmentos:
+        return resumen
+
+    # De varias marcas a la misma persona y fecha alcanza con enviar la más reciente
+    ultimas = {}
+    for ruta in segmentos:
+        marcas, ilegibles = leer_segmento(ruta)
+        resumen["ilegibles"] += ilegibles
+        resumen["marcas"] += len(marcas)
+        for marca in marcas:
+            clave = marca[:2]
+            if clave not in ultimas or marca[3] >= ultimas[clave][3]:
+                ultimas[clave] = marca
+    marcas = list(ultimas.values())
+
+    conn = almacenamiento.conectar(db_name)
+    try:
+        almacenamiento.asegurar_esquema(db_name, conn)
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        # Un año archivado (particiones_asistencia.py) no acepta marcas: se descartan en vez de
+        # abortar la transacción y trabar el diario para siempre
+        archivados = {fila[0] for fila in cursor.execute("SELECT anio FROM asistencia_archivos")}
+        if archivados:
+            resumen["archivadas"] = sum(marca[1][:4] in archivados for marca in marcas)
+            marcas = [marca for marca in marcas if marca[1][:4] not in archivados]
+        for inicio in range(0, len(marcas), tamano_lote):
+            lote = marcas[inicio:inicio + tamano_lote]
+            ids = list({marca[0] for marca in lote})
+            cursor.execute(
+                f"SELECT id FROM individuos WHERE id IN ({', '.join('?' * len(ids))}) AND eliminado_en IS NULL", ids
+            )
+            vigentes = {fila[0] for fila in cursor.fetchall()}
+            validas = [marca for marca in lote if marca[0] in vigentes]
+            resumen["rechazadas"].extend(marca[0] for marca in lote if marca[0] not in vigentes)
+            cursor.executemany(SQL_REPRODUCIR, validas)
+            aplicadas = max(cursor.rowcount, 0)
+            resumen["aplicadas"] += aplicadas
+            resumen["sin_efecto"] += len(validas) - aplicadas
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    # Recién con la transacción confirmada se borran (si se corta acá, reenviarlos no cambia nada)
+    for ruta in segmentos:
+        with contextlib.suppress(FileNotFoundError):  # Otra sincronización ya lo borró
+            os.remove(ruta)
+    resumen["segmentos"] = len(segmentos)
+    return resumen
+
+def estado(directorio=None):
+    """Segmentos y marcas que esperan ser enviados (sin tomar los abiertos)."""
+    directorio = directorio or DIRECTORIO
+    if not os.path.isdir(directorio):
+        return {"abiertos": 0, "cerrados": 0, "marcas": 0}
+    nombres = os.listdir(directorio)
+    marcas = 0
+    for nombre in nombres:
+        if nombre.endswith((ABIERTO, CERRADO)):
+            with open(os.path.join(directorio, nombre), "rb") as archivo:
+                marcas += sum(1 for _ in archivo)
+    return {
+        "abiertos": sum(n.endswith(ABIERTO) for n in nombres),
+        "cerrados": sum(n.endswith(CERRADO) for n in nombres),
+        "marcas": marcas,
+    }
+
+# --- Uso desde la consola ---
+def _informar(resumen):
+    if not resumen["segmentos"]:
+        print("No hay marcas pendientes en el diario local.")
+        return
+    print(f"✅ {resumen['segmentos']} segmentos enviados: {resumen['aplicadas']} marcas aplicadas, "
+          f"{resumen['sin_efecto']} sin efecto (había una más reciente), {len(resumen['rechazadas'])} rechazadas.")
+    if resumen["rechazadas"]:
+        print(f"IDs sin una persona vigente: {', '.join(map(str, sorted(set(resumen['rechazadas']))))}")
+    if resumen["archivadas"]:
+        print(f"⚠️ {resumen['archivadas']} marcas de años ya archivados descartadas.")
+    if resumen["ilegibles"]:
+        print(f"⚠️ {resumen['ilegibles']} líneas ilegibles descartadas.")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Diario local de asistencia para kioscos sin conexión.")
+    parser.add_argument("accion", nargs="?", default="sincronizar", choices=["estado", "sincronizar"])
+    parser.add_argument("--diario", default=DIRECTORIO, help="Carpeta del diario.")
+    parser.add_argument("--db", default=almacenamiento.DB_NAME, help="Base a la que se envían las marcas.")
+    parser.add_argument("--inactivo-segundos", type=float, default=INACTIVO_SEGUNDOS,
+                        help="Enviar también los segmentos abiertos sin escrituras hace este tiempo.")
+    parser.add_argument("--cada-segundos", type=float, help="Repetir la sincronización con este intervalo.")
+    args = parser.parse_args(argv)
+
+    if args.accion == "estado":
+        pendiente = estado(args.diario)
+        print(f"{pendiente['marcas']} marcas pendientes en {pendiente['cerrados']} segmentos cerrados "
+              f"y {pendiente['abiertos']} abiertos ({args.diario}).")
+        return 0
+
+    while True:
+        try:
+            _informar(sincronizar(args.diario, args.db, inactivo_segundos=args.inactivo_segundos))
+        except Exception as e:
+            if not args.cada_segundos:
+                raise
+            # Sin acceso a la base todavía: se reintenta en la próxima vuelta
+            print(f"No se pudo sincronizar: {e}", file=sys.stderr)
+        if not args.cada_segundos:
+            return 0
+        try:
+            time.sleep(args.cada_segundos)
+        except KeyboardInterrupt:
+            return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+import argparse
+import re
+import sys
+import threading
+import time
+import unicodedata
+from collections import defaultdict, namedtuple
+from functools import lru_cache
+
+import almacenamiento
+
+# --- Detección de personas duplicadas ---
+# "Juan Pérez", "juan perez" y "Pérez, Juan" son la misma persona para la base pero no para el
+# índice UNIQUE del DNI. Este índice en memoria compara nombres normalizados (sin acentos ni
+# mayúsculas, con las palabras ordenadas) por trigramas, y solo contra las personas que
+# comparten un "bloque": misma fecha de nacimiento, mismo comienzo de DNI, mismas claves
+# fonéticas o mismas primeras letras de cada palabra (que resisten letras invertidas). Así una consulta revisa decenas de personas en lugar de todo el padrón y el
+# barrido completo (python duplicados.py) no compara todos contra todos.
+#
+#     python duplicados.py                  # lista los grupos de posibles duplicados
+#     python duplicados.py --umbral 0.9
+
+UMBRAL_NOMBRE = 0.85     # Similitud de nombres (0 a 1) que alcanza por sí sola
+UMBRAL_CON_DATOS = 0.6   # Alcanza si además coincide la fecha de nacimiento o el DNI es casi igual
+PREFIJO_DNI = 5          # Dígitos iniciales del DNI que forman un bloque
+MAX_BLOQUE = 50          # Bloques más grandes (nombres muy comunes) no se usan: no distinguen a nadie
+RECARGA_SEGUNDOS = 300   # Cada cuánto indice_compartido() se reconstruye desde la base
+
+Entrada = namedtuple("Entrada", "clave nombre plegado fonetica letras trigramas dni fecha_nacimiento bloques")
+
+# --- Normalización ---
+def plegar(texto):
+    """Minúsculas, sin acentos ni signos y con las palabras ordenadas: 'Pérez, Juan' -> 'juan perez'."""
+    # NFKD separa cada letra de su acento; al pasar a ASCII los acentos se descartan
+    texto = unicodedata.normalize("NFKD", texto or "").encode("ascii", "ignore").decode("ascii").lower()
+    return " ".join(sorted(re.findall(r"[a-z0-9]+", texto)))
+
+# Reglas en orden: cada una ve el resultado de las anteriores
+_REGLAS_FONETICAS = [
+    (re.compile(r"ch"), "X"), (re.compile(r"qu"), "k"), (re.compile(r"gu(?=[ei])"), "g"),
+    (re.compile(r"g(?=[ei])"), "j"), (re.compile(r"c(?=[ei])"), "s"), (re.compile(r"c"), "k"),
+    (re.compile(r"ll"), "y"), (re.compile(r"h"), ""), (re.compile(r"[vw]"), "b"),
+    (re.compile(r"z"), "s"), (re.compile(r"x"), "ks"), (re.compile(r"y$"), "i"),
+    (re.compile(r"(.)\1+"), r"\1"),
+]
+
+@lru_cache(maxsize=65536)  # Los nombres y apellidos se repiten mucho
+def clave_fonetica(palabra):
+    """Clave de cómo suena una palabra ya plegada en castellano: 'gonzalez' y 'gonsales' -> 'gonsales'."""
+    for patron, reemplazo in _REGLAS_FONETICAS:
+        palabra = patron.sub(reemplazo, palabra)
+    return palabra
+
+def clave_tipeo(plegado):
+    """Primeras tres letras de cada palabra, ordenadas: 'jaun perez' y 'juan perez' -> 'aju epr'."""
+    return " ".join(sorted("".join(sorted(palabra[:3])) for palabra in plegado.split()))
+
+def clave_letras(plegado):
+    """Letras de cada palabra, ordenadas: iguales si solo difieren en letras invertidas."""
+    return " ".join(sorted("".join(sorted(palabra)) for palabra in plegado.split()))
+
+def trigramas(plegado):
+    relleno = f"  {plegado} "
+    return frozenset(relleno[i:i + 3] for i in range(len(relleno) - 2))
+
+def similitud(trigramas_a, trigramas_b):
+    """Coeficiente de Dice entre dos conjuntos de trigramas (1 = iguales)."""
+    if not trigramas_a or not trigramas_b:
+        return 0.0
+    return 2 * len(trigramas_a & trigramas_b) / (len(trigramas_a) + len(trigramas_b))
+
+def _normalizar_dni(dni):
+    return re.sub(r"[^0-9A-Z]", "", str(dni).upper()) if dni else ""
+
+def dni_parecido(a, b):
+    """Iguales salvo un dígito cambiado o dos dígitos vecinos invertidos (errores de tipeo)."""
+    if len(a) != len(b) or a == b:
+        return a == b
+    # Las diferencias caben en dos posiciones vecinas: una de las dos mitades tiene que coincidir
+    mitad = len(a) // 2
+    if a[:mitad - 1] != b[:mitad - 1] and a[mitad:] != b[mitad:]:
+        return False
+    diferencias = [i for i, (x, y) in enumerate(zip(a, b)) if x != y]
+    if len(diferencias) == 1:
+        return True
+    i, j = (diferencias + [None])[:2]
+    return len(diferencias) == 2 and j == i + 1 and a[i] == b[j] and a[j] == b[i]
+
+# --- Índice ---
+class IndiceDuplicados:
+    """Índice en memoria de personas para buscar posibles duplicados por nombre, DNI y fecha."""
+
+    def __init__(self, umbral=UMBRAL_NOMBRE, max_bloque=MAX_BLOQUE):
+        self.umbral = umbral
+        self.max_bloque = max_bloque
+        self._entradas = {}
+        self._bloques = defaultdict(set)
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def __contains__(self, clave):
+        return clave in self._entradas
+
+    @staticmethod
+    def _entrada(clave, nombre, dni, fecha_nacimiento):
+        plegado = plegar(nombre)
+        dni = _normalizar_dni(dni)
+        palabras = [clave_fonetica(palabra) for palabra in plegado.split()]
+        fonetica = " ".join(sorted(palabras))
+        bloques = {("fonetica", fonetica), ("tipeo", clave_tipeo(plegado))}
+        if fecha_nacimiento:
+            bloques.add(("fecha", fecha_nacimiento))
+        if len(dni) > PREFIJO_DNI:
+            bloques.add(("dni", dni[:PREFIJO_DNI]))
+        return Entrada(clave, nombre, plegado, fonetica, clave_letras(plegado), trigramas(plegado), dni, fecha_nacimiento or None, frozenset(bloques))
+
+    def agregar(self, clave, nombre, dni=None, fecha_nacimiento=None):
+        """Agrega (o reemplaza) a una persona. `clave` suele ser el ID en la base."""
+        self.quitar(clave)
+        entrada = self._entrada(clave, nombre, dni, fecha_nacimiento)
+        self._entradas[clave] = entrada
+        for bloque in entrada.bloques:
+            self._bloques[bloque].add(clave)
+
+    def quitar(self, clave):
+        entrada = self._entradas.pop(clave, None)
+        if entrada is None:
+            return
+        for bloque in entrada.bloques:
+            miembros = self._bloques[bloque]
+            miembros.discard(clave)
+            if not miembros:
+                del self._bloques[bloque]
+
+    def _comparar(self, a, b):
+        """Devuelve (puntaje, motivos) si `a` y `b` parecen la misma persona, o None."""
+        mismo_dni = bool(a.dni) and a.dni == b.dni
+        parecido = 1.0 if a.plegado == b.plegado else similitud(a.trigramas, b.trigramas)
+        suena_igual = a.fonetica == b.fonetica  # "Gómez" y "Gomes"
+        invertido = not suena_igual and a.letras == b.letras  # "Jaun" y "Juan"
+        if not (mismo_dni or suena_igual or invertido) and parecido < UMBRAL_CON_DATOS:
+            return None  # Lo más común: se descarta sin mirar el DNI
+        dni_cerca = not mismo_dni and bool(a.dni and b.dni) and dni_parecido(a.dni, b.dni)
+        misma_fecha = a.fecha_nacimiento is not None and a.fecha_nacimiento == b.fecha_nacimiento
+        if not (mismo_dni or dni_cerca) and a.fecha_nacimiento and b.fecha_nacimiento and not misma_fecha:
+            return None  # Mismo nombre pero distinta fecha de nacimiento: homónimos
+        if not (mismo_dni or suena_igual or invertido or parecido >= self.umbral or misma_fecha or dni_cerca):
+            return None
+        if suena_igual or invertido:
+            parecido = max(parecido, self.umbral)
+        motivos = []
+        if mismo_dni:
+            motivos.append("mismo DNI")
+        elif dni_cerca:
+            motivos.append("DNI casi igual")
+        if a.plegado == b.plegado:
+            motivos.append("mismo nombre")
+        else:
+            if suena_igual:
+                motivos.append("nombre que suena igual")
+            elif invertido:
+                motivos.append("nombre con letras invertidas")
+            else:
+                motivos.append(f"nombre parecido ({parecido:.2f})")
+        if misma_fecha:
+            motivos.append("misma fecha de nacimiento")
+        puntaje = min(1.0, parecido + 0.1 * misma_fecha + 0.1 * dni_cerca + 0.5 * mismo_dni)
+        return round(puntaje, 3), motivos
+
+    def _vecinos(self, entrada):
+        vecinos = set()
+        for bloque in entrada.bloques:
+            miembros = self._bloques.get(bloque)
+            if miembros and len(miembros) <= self.max_bloque:
+                vecinos |= miembros
+        vecinos.discard(entrada.clave)
+        return vecinos
+
+    def candidatos(self, nombre, dni=None, fecha_nacimiento=None, limite=10):
+        """
+        Posibles duplicados de una persona (registrada o no), del más al menos probable:
+        [{'clave', 'nombre', 'puntaje', 'motivos'}, ...].
+        """
+        consulta = self._entrada(None, nombre, dni, fecha_nacimiento)
+        resultado = []
+        for clave in self._vecinos(consulta):
+            otra = self._entradas[clave]
+            comparacion = self._comparar(consulta, otra)
+            if comparacion:
+                resultado.append({"clave": clave, "nombre": otra.nombre, "puntaje": comparacion[0], "motivos": comparacion[1]})
+        resultado.sort(key=lambda candidato: -candidato["puntaje"])
+        return resultado[:limite]
+
+    def pares(self):
+        """
+        Todos los pares de posibles duplicados del índice: [(clave_a, clave_b, puntaje, motivos)].
+        Cada persona se compara solo con las de sus bloques, y cada par una sola vez.
+        """
+        resultado = []
+        revisadas = set()
+        for clave, entrada in self._entradas.items():
+            revisadas.add(clave)
+            for otra_clave in self._vecinos(entrada) - revisadas:
+                comparacion = self._comparar(entrada, self._entradas[otra_clave])
+                if comparacion:
+                    resultado.append((clave, otra_clave) + comparacion)
+        return resultado
+
+    def cargar(self, conn, desde_id=0):
+        """Agrega las personas vigentes de la base con ID mayor a `desde_id`. Devuelve el último ID."""
+        ultimo = desde_id
+        cursor = conn.execute('''
+            SELECT id, nombre || ' ' || apellido, dni, fecha_nacimiento
+            FROM individuos WHERE id > ? AND eliminado_en IS NULL ORDER BY id
+        ''', (desde_id,))
+        for individuo_id, nombre, dni, fecha_nacimiento in cursor:
+            self.agregar(individuo_id, nombre, dni, fecha_nacimiento)
+            ultimo = individuo_id
+        return ultimo
+
+def agrupar(pares):
+    """Une los pares en grupos (si A~B y B~C, los tres van juntos). Devuelve una lista de listas de claves."""
+    padres = {}
+
+    def raiz(clave):
+        padres.setdefault(clave, clave)
+        while padres[clave] != clave:
+            padres[clave] = padres[padres[clave]]
+            clave = padres[clave]
+        return clave
+
+    for a, b, *_ in pares:
+        padres[raiz(a)] = raiz(b)
+    grupos = defaultdict(list)
+    for clave in padres:
+        grupos[raiz(clave)].append(clave)
+    return sorted((sorted(grupo, key=str) for grupo in grupos.values()), key=lambda grupo: str(grupo[0]))
+
+# --- Índice compartido del proceso ---
+# Lo usan el alta (consola y servicio) y la importación. Cada llamada agrega las personas nuevas;
+# las ediciones y bajas se reflejan al reconstruirlo, cada RECARGA_SEGUNDOS.
+_compartidos = {}
+_lock = threading.Lock()
+
+def indice_compartido(db_name=None, recarga=RECARGA_SEGUNDOS):
+    db_name = db_name or almacenamiento.DB_NAME
+    with _lock:
+        estado = _compartidos.get(db_name)
+        conn = almacenamiento.conectar(db_name)
+        try:
+            if estado is None or time.monotonic() - estado["cargado_en"] > recarga:
+                indice = IndiceDuplicados()
+                estado = _compartidos[db_name] = {"indice": indice, "ultimo_id": indice.cargar(conn), "cargado_en": time.monotonic()}
+            else:
+                estado["ultimo_id"] = estado["indice"].cargar(conn, estado["ultimo_id"])
+        finally:
+            conn.close()
+        return estado["indice"]
+
+def posibles_duplicados(nombre, dni=None, fecha_nacimiento=None, db_name=None, limite=10):
+    """Candidatos de la base para una persona nueva; la 'clave' de cada uno es su ID."""
+    return indice_compartido(db_name).candidatos(nombre, dni, fecha_nacimiento, limite)
+
+# --- Uso desde la consola ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Busca personas posiblemente duplicadas en el padrón.")
+    parser.add_argument("--db", default=almacenamiento.DB_NAME)
+    parser.add_argument("--umbral", type=float, default=UMBRAL_NOMBRE, help="Similitud de nombres (0 a 1).")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    indice = IndiceDuplicados(umbral=args.umbral)
+    conn = almacenamiento.conectar(args.db)
+    try:
+        almacenamiento.migrar(conn)
+        indice.cargar(conn)
+        pares = indice.pares()
+        datos = {fila[0]: fila[1:] for fila in conn.execute(
+            "SELECT id, nombre, apellido, dni, fecha_nacimiento FROM individuos WHERE eliminado_en IS NULL"
+        )}
+    finally:
+        conn.close()
+
+    motivos = {frozenset(par[:2]): par[3] for par in pares}
+    grupos = agrupar(pares)
+    for numero, grupo in enumerate(grupos, start=1):
+        print(f"\nGrupo {numero}:")
+        for individuo_id in grupo:
+            nombre, apellido, dni, fecha_nacimiento = datos[individuo_id]
+            print(f"  ID {individuo_id}: {nombre} {apellido} (DNI: {dni}, Fecha Nac: {fecha_nacimiento or '-'})")
+        if len(grupo) == 2:
+            print(f"  Motivo: {', '.join(motivos[frozenset(grupo)])}")
+    print(f"\n{len(grupos)} grupos de posibles duplicados entre {len(indice)} personas "
+          f"({time.perf_counter() - inicio:.2f} s).")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
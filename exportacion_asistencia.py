@@ -0,0 +1,255 @@
+import argparse
+import itertools
+import json
+import os
+import sys
+from datetime import date, datetime
+
+import almacenamiento
+import particiones_asistencia
+from rollups_asistencia import ESTADOS
+
+# --- Exportación columnar de la asistencia (Parquet o Arrow IPC) ---
+# Las estadísticas pesadas se corren sobre estos archivos, fuera de la base de producción.
+# Cada jornada se lee en una sola transacción de lectura (con WAL no frena a los check-ins),
+# de a trozos con fetchmany, y se escribe en un archivo por rol:
+#
+#     exportacion/mes=2025-03/rol=Alumno/fecha=2025-03-03.parquet
+#
+# Las carpetas siguen el formato de particiones "Hive": pyarrow.dataset, pandas o DuckDB
+# recuperan `mes` y `rol` como columnas. La exportación es incremental: solo se reescriben las
+# jornadas con cambios desde la corrida anterior (tabla asistencia_dias_modificados).
+#
+#     pip install pyarrow
+#     python exportacion_asistencia.py exportacion/
+#     python exportacion_asistencia.py exportacion/ --formato arrow --completo
+
+FORMATOS = {"parquet": ".parquet", "arrow": ".arrow"}
+TAMANO_TROZO = 50_000  # Filas leídas de SQLite (y escritas) por vez
+ARCHIVO_ESTADO = "_estado_exportacion.json"  # El "_" inicial hace que pyarrow.dataset lo ignore
+
+CONSULTA_JORNADA = '''
+    SELECT COALESCE(u.rol, 'Sin rol') AS rol, a.usuario_id, a.estado,
+           u.dni, u.nombre, u.apellido, u.genero, u.fecha_nacimiento
+    FROM {fuente} a
+    JOIN individuos u ON u.id = a.usuario_id
+    WHERE a.fecha = ? AND a.eliminado_en IS NULL
+    ORDER BY rol, a.usuario_id
+'''
+
+def _importar_pyarrow():
+    """pyarrow es opcional: solo hace falta para exportar o leer lo exportado."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("La exportación necesita pyarrow (pip install pyarrow).") from None
+    return pyarrow, pyarrow.parquet
+
+def esquema(pa):
+    """Columnas de cada archivo. `estado` y `genero` tienen pocos valores: van como diccionario."""
+    return pa.schema([
+        ("usuario_id", pa.int64()),
+        ("fecha", pa.date32()),
+        ("estado", pa.dictionary(pa.int8(), pa.string())),
+        ("dni", pa.string()),
+        ("nombre", pa.string()),
+        ("apellido", pa.string()),
+        ("genero", pa.dictionary(pa.int16(), pa.string())),
+        ("fecha_nacimiento", pa.string()),
+    ])
+
+def _diccionario(pa, tipo, valores, conocidos=()):
+    """
+    Arma el arreglo codificado en diccionario directamente, sin pasar por strings repetidos.
+    Los valores `conocidos` van primero: así tienen el mismo código en todos los archivos.
+    """
+    posiciones = {valor: i for i, valor in enumerate(conocidos)}
+    indices = [None if valor is None else posiciones.setdefault(valor, len(posiciones)) for valor in valores]
+    return pa.DictionaryArray.from_arrays(
+        pa.array(indices, tipo.index_type), pa.array(list(posiciones), tipo.value_type)
+    )
+
+def _lote(pa, esquema_lote, fecha, filas):
+    """Convierte filas (usuario_id, estado, dni, ...) de una jornada en un RecordBatch."""
+    usuario_id, estado, dni, nombre, apellido, genero, fecha_nacimiento = zip(*filas)
+    campos = {campo.name: campo.type for campo in esquema_lote}
+    return pa.RecordBatch.from_arrays([
+        pa.array(usuario_id, pa.int64()),
+        pa.array([fecha] * len(filas), pa.date32()),
+        _diccionario(pa, campos["estado"], estado, conocidos=ESTADOS.values()),
+        pa.array(dni, pa.string()),
+        pa.array(nombre, pa.string()),
+        pa.array(apellido, pa.string()),
+        _diccionario(pa, campos["genero"], genero),
+        pa.array(fecha_nacimiento, pa.string()),
+    ], schema=esquema_lote)
+
+class _Escritor:
+    """
+    Escribe un archivo Parquet o Arrow IPC en un temporal y lo publica al cerrarlo.
+    Un archivo IPC admite un solo diccionario por columna: sus lotes se juntan y se escriben al
+    cerrar (es una jornada de un rol, no toda la exportación).
+    """
+
+    def __init__(self, pa, pq, formato, ruta, esquema_archivo):
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        self.ruta = ruta
+        # El "." inicial hace que pyarrow.dataset no lo lea a medio escribir
+        self.temporal = os.path.join(os.path.dirname(ruta), "." + os.path.basename(ruta) + ".tmp")
+        self._pa = pa
+        self._esquema = esquema_archivo
+        self._lotes = None
+        if formato == "parquet":
+            self._escritor = pq.ParquetWriter(self.temporal, esquema_archivo, compression="zstd")
+        else:
+            self._escritor = None
+            self._lotes = []
+
+    def escribir(self, lote):
+        if self._lotes is not None:
+            self._lotes.append(lote)
+        else:
+            self._escritor.write_batch(lote)
+
+    def cerrar(self):
+        if self._lotes is not None:
+            tabla = self._pa.Table.from_batches(self._lotes, schema=self._esquema).unify_dictionaries().combine_chunks()
+            with self._pa.OSFile(self.temporal, "wb") as archivo, self._pa.ipc.new_file(archivo, self._esquema) as escritor:
+                escritor.write_table(tabla)
+        else:
+            self._escritor.close()
+        os.replace(self.temporal, self.ruta)
+
+def _segmento(valor):
+    return str(valor).replace("/", "_").replace(os.sep, "_")
+
+def ruta_jornada(destino, fecha, rol, formato):
+    return os.path.join(
+        destino, f"mes={fecha[:7]}", f"rol={_segmento(rol)}", f"fecha={fecha}{FORMATOS[formato]}"
+    )
+
+def _borrar_jornada(destino, fecha):
+    """Quita los archivos ya exportados de una jornada (de cualquier rol y formato)."""
+    carpeta_mes = os.path.join(destino, f"mes={fecha[:7]}")
+    if not os.path.isdir(carpeta_mes):
+        return
+    for carpeta_rol in os.listdir(carpeta_mes):
+        for extension in FORMATOS.values():
+            ruta = os.path.join(carpeta_mes, carpeta_rol, f"fecha={fecha}{extension}")
+            if os.path.exists(ruta):
+                os.remove(ruta)
+
+def _leer_estado(destino):
+    try:
+        with open(os.path.join(destino, ARCHIVO_ESTADO), encoding="utf-8") as archivo:
+            return json.load(archivo)
+    except FileNotFoundError:
+        return {}
+
+def _guardar_estado(destino, estado):
+    ruta = os.path.join(destino, ARCHIVO_ESTADO)
+    with open(ruta + ".tmp", "w", encoding="utf-8") as archivo:
+        json.dump(estado, archivo, ensure_ascii=False, indent=2)
+    os.replace(ruta + ".tmp", ruta)
+
+def exportar(destino, db_name=None, formato="parquet", completo=False, tamano_trozo=TAMANO_TROZO):
+    """
+    Exporta a `destino` las jornadas nuevas o modificadas desde la última exportación (todas si
+    `completo` o si cambió el formato). Devuelve {"jornadas", "filas", "archivos", "version"}.
+    Los cambios en los datos de las personas (rol, nombre) solo llegan a las jornadas ya
+    exportadas con una exportación completa.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no soportado: '{formato}'. Opciones: {', '.join(FORMATOS)}")
+    pa, pq = _importar_pyarrow()
+    esquema_archivo = esquema(pa)
+    os.makedirs(destino, exist_ok=True)
+    estado = _leer_estado(destino)
+    desde = 0 if completo or estado.get("formato") != formato else estado.get("version", 0)
+    resumen = {"jornadas": 0, "filas": 0, "archivos": 0, "version": desde}
+
+    conn = almacenamiento.conectar(db_name)
+    conn.isolation_level = None  # Transacción de lectura explícita
+    try:
+        almacenamiento.migrar(conn)
+        # Todo se lee de la misma foto de la base, aunque sigan llegando marcas mientras tanto
+        conn.execute("BEGIN")
+        jornadas = conn.execute(
+            "SELECT fecha, version FROM asistencia_dias_modificados WHERE version > ? ORDER BY fecha", (desde,)
+        ).fetchall()
+        # Las jornadas de años archivados conservan su versión: una exportación completa las lee del archivo
+        rango = (jornadas[0][0], jornadas[-1][0]) if jornadas else (None, None)
+        consulta_jornada = CONSULTA_JORNADA.format(fuente=particiones_asistencia.fuente(conn, *rango))
+        for fecha, version in jornadas:
+            _borrar_jornada(destino, fecha)
+            dia = date.fromisoformat(fecha)
+            escritor, rol_actual = None, None
+            cursor = conn.execute(consulta_jornada, (fecha,))
+            while True:
+                filas = cursor.fetchmany(tamano_trozo)
+                if not filas:
+                    break
+                # Vienen ordenadas por rol: un archivo abierto por vez
+                for rol, grupo in itertools.groupby(filas, key=lambda fila: fila[0]):
+                    if rol != rol_actual:
+                        if escritor:
+                            escritor.cerrar()
+                            resumen["archivos"] += 1
+                        escritor = _Escritor(pa, pq, formato, ruta_jornada(destino, fecha, rol, formato), esquema_archivo)
+                        rol_actual = rol
+                    grupo = [fila[1:] for fila in grupo]
+                    escritor.escribir(_lote(pa, esquema_archivo, dia, grupo))
+                    resumen["filas"] += len(grupo)
+            if escritor:
+                escritor.cerrar()
+                resumen["archivos"] += 1
+            resumen["jornadas"] += 1
+            resumen["version"] = max(resumen["version"], version)
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+    # El estado se guarda al final: si la corrida se corta, la próxima repite lo pendiente
+    _guardar_estado(destino, {
+        "version": resumen["version"],
+        "formato": formato,
+        "exportado_en": datetime.now().isoformat(timespec="seconds"),
+    })
+    return resumen
+
+def leer_exportacion(destino, formato="parquet", columnas=None, filtro=None):
+    """
+    Lee lo exportado como una tabla de pyarrow, con `mes` y `rol` tomados de las carpetas.
+    Ejemplo: leer_exportacion("exportacion", filtro=pyarrow.dataset.field("rol") == "Alumno").to_pandas()
+    """
+    _importar_pyarrow()
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(destino, format="parquet" if formato == "parquet" else "ipc", partitioning="hive")
+    return dataset.to_table(columns=columnas, filter=filtro)
+
+# --- Uso desde la consola ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta la asistencia a Parquet o Arrow IPC para análisis.")
+    parser.add_argument("destino", help="Carpeta de la exportación.")
+    parser.add_argument("--db", default=almacenamiento.DB_NAME)
+    parser.add_argument("--formato", choices=list(FORMATOS), default="parquet")
+    parser.add_argument("--completo", action="store_true", help="Re-exportar todas las jornadas.")
+    parser.add_argument("--trozo", type=int, default=TAMANO_TROZO, help="Filas leídas por vez.")
+    args = parser.parse_args(argv)
+
+    try:
+        resumen = exportar(args.destino, args.db, args.formato, args.completo, args.trozo)
+    except ImportError as e:
+        print(f"❌ {e}")
+        return 1
+    if not resumen["jornadas"]:
+        print("No hay jornadas nuevas ni modificadas desde la última exportación.")
+    else:
+        print(f"✅ {resumen['jornadas']} jornadas exportadas ({resumen['filas']} filas, "
+              f"{resumen['archivos']} archivos) en {args.destino}.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+import argparse
+import contextlib
+import sys
+from datetime import datetime
+
+import almacenamiento
+
+# --- Grupos (cursos) y planillas de clase ---
+# Cada persona puede integrar uno o más grupos (tabla grupo_miembros). La planilla de un grupo, la
+# lista ordenada de sus integrantes activos, se guarda ya armada en `grupo_planillas` junto con la
+# versión del grupo. Los triggers de la migración 10 suben esa versión con cada alta, baja o pase
+# de integrantes y con cada baja, reactivación o cambio de nombre de una persona del grupo: la
+# planilla se rearma solo cuando quedó vieja, no en cada clase.
+#
+# abrir_clase() lee la planilla y, en la misma consulta, las marcas que ya tiene ese día cada
+# integrante (por el índice único usuario_id + fecha): no recorre `individuos` ni `asistencia`.
+#
+#     python grupos_asistencia.py crear "3° A"
+#     python grupos_asistencia.py agregar "3° A" 12 13 14
+#     python grupos_asistencia.py mover 12 "3° A" "3° B"
+#     python grupos_asistencia.py ver "3° A" --fecha 2025-03-03
+
+# Integrantes activos de un grupo, en el orden en que se pasa lista
+SQL_ARMAR_PLANILLA = '''
+    INSERT INTO grupo_planillas (grupo_id, version, miembros)
+    SELECT g.id, g.version, (
+        SELECT json_group_array(json_array(id, nombre)) FROM (
+            SELECT i.id, i.nombre || ' ' || i.apellido AS nombre
+            FROM grupo_miembros m JOIN individuos i ON i.id = m.usuario_id
+            WHERE m.grupo_id = g.id AND i.estado = 'Activo' AND i.eliminado_en IS NULL
+            ORDER BY i.apellido, i.nombre
+        )
+    )
+    FROM grupos g WHERE g.id = ?
+    ON CONFLICT(grupo_id) DO UPDATE SET version = excluded.version, miembros = excluded.miembros
+'''
+
+SQL_PLANILLA = '''
+    SELECT json_extract(j.value, '$[0]'), json_extract(j.value, '$[1]')
+    FROM grupo_planillas p, json_each(p.miembros) j
+    WHERE p.grupo_id = ? ORDER BY j.key
+'''
+
+# La planilla con la marca (o NULL) de cada integrante en la fecha ?1
+SQL_CLASE = '''
+    SELECT j.usuario_id, j.nombre, a.estado
+    FROM (
+        SELECT j.key AS orden, json_extract(j.value, '$[0]') AS usuario_id, json_extract(j.value, '$[1]') AS nombre
+        FROM grupo_planillas p, json_each(p.miembros) j
+        WHERE p.grupo_id = ?2
+    ) j
+    LEFT JOIN asistencia a ON a.usuario_id = j.usuario_id AND a.fecha = ?1 AND a.eliminado_en IS NULL
+    ORDER BY j.orden
+'''
+
+# Sin grupo: todas las personas activas, como antes de que existieran los grupos
+SQL_CLASE_TODOS = '''
+    SELECT i.id, i.nombre || ' ' || i.apellido, a.estado
+    FROM individuos i
+    LEFT JOIN asistencia a ON a.usuario_id = i.id AND a.fecha = ? AND a.eliminado_en IS NULL
+    WHERE i.estado = 'Activo' AND i.eliminado_en IS NULL
+    ORDER BY i.apellido, i.nombre
+'''
+
+def _asegurar_planilla(conn, grupo_id):
+    """Rearma la planilla guardada del grupo si su versión quedó atrás. Lanza ValueError si el grupo no existe."""
+    fila = conn.execute(
+        "SELECT g.version, p.version FROM grupos g LEFT JOIN grupo_planillas p ON p.grupo_id = g.id WHERE g.id = ?",
+        (grupo_id,),
+    ).fetchone()
+    if fila is None:
+        raise ValueError(f"No existe el grupo {grupo_id}.")
+    if fila[0] == fila[1]:
+        return False
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(SQL_ARMAR_PLANILLA, (grupo_id,))  # Con la versión vigente dentro de esta transacción
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return True
+
+def planilla(grupo_id, db_name=None):
+    """Integrantes activos del grupo: lista de (usuario_id, "Nombre Apellido")."""
+    conn = almacenamiento.conectar(db_name)
+    try:
+        _asegurar_planilla(conn, grupo_id)
+        return conn.execute(SQL_PLANILLA, (grupo_id,)).fetchall()
+    finally:
+        conn.close()
+
+def abrir_clase(grupo_id, fecha, db_name=None):
+    """
+    Planilla para tomar asistencia: lista de (usuario_id, "Nombre Apellido", estado ya marcado o None).
+    Sin grupo (grupo_id None) incluye a todas las personas activas.
+    """
+    conn = almacenamiento.conectar(db_name)
+    try:
+        if grupo_id is None:
+            return conn.execute(SQL_CLASE_TODOS, (fecha,)).fetchall()
+        _asegurar_planilla(conn, grupo_id)
+        return conn.execute(SQL_CLASE, (fecha, grupo_id)).fetchall()
+    finally:
+        conn.close()
+
+# --- Grupos e integrantes ---
+# Las altas y bajas cierran su conexión al salir; el `with conn` interno confirma o deshace la transacción.
+def listar_grupos(db_name=None):
+    """Lista de (id, nombre, integrantes)."""
+    conn = almacenamiento.conectar(db_name)
+    try:
+        return conn.execute('''
+            SELECT g.id, g.nombre, COUNT(m.usuario_id)
+            FROM grupos g LEFT JOIN grupo_miembros m ON m.grupo_id = g.id
+            GROUP BY g.id ORDER BY g.nombre
+        ''').fetchall()
+    finally:
+        conn.close()
+
+def buscar_grupo(clave, db_name=None):
+    """ID del grupo indicado por su ID o por su nombre exacto, o None si no existe."""
+    conn = almacenamiento.conectar(db_name)
+    try:
+        fila = conn.execute(
+            "SELECT id FROM grupos WHERE id = ? OR nombre = ? ORDER BY nombre = ? DESC LIMIT 1",
+            (clave, str(clave), str(clave)),
+        ).fetchone()
+        return fila[0] if fila else None
+    finally:
+        conn.close()
+
+def crear_grupo(nombre, db_name=None):
+    """Crea un grupo vacío y devuelve su ID. Lanza sqlite3.IntegrityError si el nombre ya existe."""
+    with contextlib.closing(almacenamiento.conectar(db_name)) as conn, conn:
+        return conn.execute("INSERT INTO grupos (nombre) VALUES (?)", (nombre,)).lastrowid
+
+def agregar_miembros(grupo_id, usuario_ids, db_name=None):
+    """
+    Suma personas vigentes al grupo en una sola transacción. Devuelve las agregadas y los IDs
+    rechazados por no corresponder a ninguna persona vigente; las que ya estaban se ignoran.
+    """
+    resultado = {"agregados": 0, "rechazados": []}
+    with contextlib.closing(almacenamiento.conectar(db_name)) as conn, conn:
+        for usuario_id in usuario_ids:
+            cursor = conn.execute('''
+                INSERT INTO grupo_miembros (grupo_id, usuario_id)
+                SELECT ?1, ?2 WHERE EXISTS (SELECT 1 FROM individuos WHERE id = ?2 AND eliminado_en IS NULL)
+                ON CONFLICT DO NOTHING
+            ''', (grupo_id, usuario_id))
+            if cursor.rowcount:
+                resultado["agregados"] += 1
+            elif not conn.execute("SELECT 1 FROM individuos WHERE id = ? AND eliminado_en IS NULL", (usuario_id,)).fetchone():
+                resultado["rechazados"].append(usuario_id)
+    return resultado
+
+def quitar_miembros(grupo_id, usuario_ids, db_name=None):
+    """Saca personas del grupo. Devuelve cuántas estaban."""
+    with contextlib.closing(almacenamiento.conectar(db_name)) as conn, conn:
+        cursor = conn.executemany(
+            "DELETE FROM grupo_miembros WHERE grupo_id = ? AND usuario_id = ?",
+            ((grupo_id, usuario_id) for usuario_id in usuario_ids),
+        )
+        return cursor.rowcount
+
+def mover_miembro(usuario_id, desde, hasta, db_name=None):
+    """Pasa a una persona de un grupo a otro. Devuelve False si no estaba en el grupo de origen."""
+    with contextlib.closing(almacenamiento.conectar(db_name)) as conn, conn:
+        if not conn.execute("DELETE FROM grupo_miembros WHERE grupo_id = ? AND usuario_id = ?", (desde, usuario_id)).rowcount:
+            return False
+        conn.execute("INSERT INTO grupo_miembros (grupo_id, usuario_id) VALUES (?, ?) ON CONFLICT DO NOTHING", (hasta, usuario_id))
+        return True
+
+# --- Uso desde la consola ---
+def _grupo(parser, clave, db_name):
+    grupo_id = buscar_grupo(clave, db_name)
+    if grupo_id is None:
+        parser.error(f"No existe el grupo '{clave}'.")
+    return grupo_id
+
+def _ids(parser, valores):
+    try:
+        return [int(valor) for valor in valores]
+    except ValueError:
+        parser.error("Los integrantes se indican por su ID numérico.")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grupos o cursos, sus integrantes y la planilla de cada clase.")
+    parser.add_argument("accion", choices=["listar", "crear", "agregar", "quitar", "mover", "ver"])
+    parser.add_argument("argumentos", nargs="*",
+                        help="crear NOMBRE | agregar GRUPO ID... | quitar GRUPO ID... | mover ID DESDE HASTA | ver GRUPO")
+    parser.add_argument("--fecha", default=str(datetime.today().date()), help="Fecha de la clase para 'ver' (YYYY-MM-DD).")
+    parser.add_argument("--db", default=almacenamiento.DB_NAME)
+    args = parser.parse_args(argv)
+    almacenamiento.asegurar_esquema(args.db)
+    argumentos = args.argumentos
+
+    if args.accion == "listar":
+        grupos = listar_grupos(args.db)
+        if not grupos:
+            print("No hay grupos creados.")
+        for grupo_id, nombre, integrantes in grupos:
+            print(f"{grupo_id:>4}  {nombre:<30} {integrantes:>5} integrantes")
+    elif args.accion == "crear":
+        if len(argumentos) != 1:
+            parser.error("Uso: crear NOMBRE")
+        print(f"✅ Grupo '{argumentos[0]}' creado con ID {crear_grupo(argumentos[0], args.db)}.")
+    elif args.accion in ("agregar", "quitar"):
+        if len(argumentos) < 2:
+            parser.error(f"Uso: {args.accion} GRUPO ID...")
+        grupo_id = _grupo(parser, argumentos[0], args.db)
+        ids = _ids(parser, argumentos[1:])
+        if args.accion == "agregar":
+            resultado = agregar_miembros(grupo_id, ids, args.db)
+            print(f"✅ {resultado['agregados']} integrantes agregados.")
+            if resultado["rechazados"]:
+                print(f"⚠️ Sin persona vigente con ID: {', '.join(map(str, resultado['rechazados']))}")
+        else:
+            print(f"✅ {quitar_miembros(grupo_id, ids, args.db)} integrantes quitados.")
+    elif args.accion == "mover":
+        if len(argumentos) != 3:
+            parser.error("Uso: mover ID DESDE HASTA")
+        usuario_id = _ids(parser, argumentos[:1])[0]
+        desde, hasta = (_grupo(parser, clave, args.db) for clave in argumentos[1:])
+        if not mover_miembro(usuario_id, desde, hasta, args.db):
+            print(f"La persona {usuario_id} no está en el grupo '{argumentos[1]}'.")
+            return 1
+        print(f"✅ Persona {usuario_id} pasada a '{argumentos[2]}'.")
+    else:
+        if len(argumentos) != 1:
+            parser.error("Uso: ver GRUPO [--fecha YYYY-MM-DD]")
+        clase = abrir_clase(_grupo(parser, argumentos[0], args.db), args.fecha, args.db)
+        for usuario_id, nombre, estado in clase:
+            print(f"{usuario_id:>6}  {nombre:<40} {estado or '-'}")
+        print(f"\n{len(clase)} integrantes activos; {sum(estado is not None for _, _, estado in clase)} ya marcados el {args.fecha}.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+import argparse
+import csv
+import io
+import json
+import sys
+
+from sqlalchemy import insert, or_, select
+from sqlalchemy.exc import IntegrityError
+
+import almacenamiento
+import duplicados
+
+# --- Importación masiva de usuarios desde CSV o JSONL ---
+# El archivo se lee línea por línea (nunca entero en memoria) y se inserta de a lotes:
+# una transacción por lote en lugar de una por usuario.
+
+CAMPOS_OBLIGATORIOS = ['nombre_completo', 'dni', 'email', 'rol']
+FORMATOS = ('csv', 'jsonl')
+TAMANO_LOTE = 5000
+
+def leer_csv(stream):
+    """Genera (número de línea, fila) a partir de un CSV con encabezado."""
+    lector = csv.DictReader(stream)
+    for fila in lector:
+        yield lector.line_num, fila
+
+def leer_jsonl(stream):
+    """Genera (número de línea, fila) a partir de un archivo con un objeto JSON por línea."""
+    for numero, linea in enumerate(stream, start=1):
+        linea = linea.strip()
+        if not linea:
+            continue
+        try:
+            fila = json.loads(linea)
+        except ValueError:
+            fila = None
+        # Las líneas que no son un objeto JSON se informan como error en validar()
+        yield numero, fila if isinstance(fila, dict) else {}
+
+def leer_filas(stream, formato):
+    """Elige el lector según el formato ('csv' o 'jsonl')."""
+    if formato == 'csv':
+        return leer_csv(stream)
+    if formato == 'jsonl':
+        return leer_jsonl(stream)
+    raise ValueError(f"Formato no soportado: '{formato}'. Opciones: {', '.join(FORMATOS)}")
+
+def validar(fila):
+    """Devuelve el mensaje de error de la fila, o None si es válida."""
+    if not fila:
+        return "La línea no es un registro válido."
+    for field in CAMPOS_OBLIGATORIOS:
+        valor = fila.get(field)
+        if valor is None or not str(valor).strip():
+            return f"El campo '{field}' es obligatorio."
+    return None
+
+def _normalizar(fila):
+    datos = {field: str(fila[field]).strip() for field in CAMPOS_OBLIGATORIOS}
+    # En la tabla `individuos` el nombre completo se guarda separado en nombre y apellido
+    datos['nombre'], datos['apellido'] = almacenamiento.separar_nombre_completo(datos.pop('nombre_completo'))
+    if fila.get('estado'):
+        datos['estado'] = str(fila['estado']).strip()
+    return datos
+
+def _insertar_lote(session, tabla, lote, reporte, vistos_dni, vistos_email):
+    """Inserta un lote ya validado; los DNI/email repetidos se informan por fila sin abortar el lote."""
+    dnis = [datos['dni'] for _, datos in lote]
+    emails = [datos['email'] for _, datos in lote]
+    existentes = session.execute(
+        select(tabla.c.dni, tabla.c.email).where(or_(tabla.c.dni.in_(dnis), tabla.c.email.in_(emails)))
+    ).all()
+    dni_existentes = {dni for dni, _ in existentes}
+    email_existentes = {email for _, email in existentes}
+
+    nuevos = []
+    for linea, datos in lote:
+        if datos['dni'] in dni_existentes or datos['dni'] in vistos_dni:
+            reporte['errores'].append({'linea': linea, 'dni': datos['dni'], 'error': "El DNI ya está registrado."})
+        elif datos['email'] in email_existentes or datos['email'] in vistos_email:
+            reporte['errores'].append({'linea': linea, 'dni': datos['dni'], 'error': "El email ya está registrado."})
+        else:
+            vistos_dni.add(datos['dni'])
+            vistos_email.add(datos['email'])
+            nuevos.append((linea, datos))
+
+    if not nuevos:
+        return
+    try:
+        session.execute(insert(tabla), [datos for _, datos in nuevos])
+        session.commit()
+        reporte['insertados'] += len(nuevos)
+    except IntegrityError:
+        # Alguien registró un usuario igual mientras importábamos: se reintenta fila por fila
+        session.rollback()
+        for linea, datos in nuevos:
+            try:
+                with session.begin_nested():
+                    session.execute(insert(tabla), datos)
+                reporte['insertados'] += 1
+            except IntegrityError:
+                reporte['errores'].append({'linea': linea, 'dni': datos['dni'], 'error': "El email o DNI ya están registrados."})
+        session.commit()
+
+def _buscar_duplicados(linea, datos, indice, en_archivo, reporte):
+    """Anota la fila si se parece a alguien de la base (`indice`) o a una fila anterior del archivo."""
+    nombre = f"{datos['nombre']} {datos['apellido']}"
+    candidatos = [{'id': c['clave'], 'motivos': c['motivos']} for c in indice.candidatos(nombre, datos['dni'])]
+    candidatos += [{'linea': c['clave'], 'motivos': c['motivos']} for c in en_archivo.candidatos(nombre, datos['dni'])]
+    if candidatos:
+        reporte['posibles_duplicados'].append({'linea': linea, 'dni': datos['dni'], 'candidatos': candidatos})
+    en_archivo.agregar(linea, nombre, datos['dni'])
+
+def importar_usuarios(session, tabla, filas, tamano_lote=TAMANO_LOTE, indice=None):
+    """
+    Importa usuarios a `tabla` (por ejemplo, Usuario.__table__) a partir de un iterable
+    de (número de línea, fila). Devuelve {'insertados': n, 'errores': [{'linea', 'dni', 'error'}, ...],
+    'posibles_duplicados': [{'linea', 'dni', 'candidatos'}, ...]}. Los posibles duplicados (contra
+    `indice`, ver duplicados.py, y entre filas del archivo) se importan igual: solo se informan.
+    """
+    reporte = {'insertados': 0, 'errores': [], 'posibles_duplicados': []}
+    vistos_dni = set()
+    vistos_email = set()
+    en_archivo = duplicados.IndiceDuplicados()
+    lote = []
+    for linea, fila in filas:
+        error = validar(fila)
+        if error:
+            reporte['errores'].append({'linea': linea, 'dni': (fila or {}).get('dni'), 'error': error})
+            continue
+        datos = _normalizar(fila)
+        if indice is not None:
+            _buscar_duplicados(linea, datos, indice, en_archivo, reporte)
+        lote.append((linea, datos))
+        if len(lote) >= tamano_lote:
+            _insertar_lote(session, tabla, lote, reporte, vistos_dni, vistos_email)
+            lote = []
+    if lote:
+        _insertar_lote(session, tabla, lote, reporte, vistos_dni, vistos_email)
+    return reporte
+
+def abrir_texto(stream_binario):
+    """Envuelve un stream de bytes (por ejemplo, el cuerpo de la petición) para leerlo como texto."""
+    return io.TextIOWrapper(stream_binario, encoding='utf-8-sig', newline='')
+
+# --- Uso desde la consola ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importa usuarios desde un archivo CSV o JSONL.")
+    parser.add_argument("archivo")
+    parser.add_argument("--formato", choices=FORMATOS, help="Por defecto se deduce de la extensión del archivo.")
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE, help="Usuarios por transacción.")
+    args = parser.parse_args(argv)
+
+    formato = args.formato or ('jsonl' if args.archivo.endswith(('.jsonl', '.ndjson')) else 'csv')
+
+    from altadeusuario import Usuario, create_app, db, init_db
+
+    app = create_app()
+    init_db(app)
+    with app.app_context(), open(args.archivo, encoding='utf-8-sig', newline='') as archivo:
+        indice = duplicados.indice_compartido(db.engine.url.database) if db.engine.url.get_backend_name() == 'sqlite' else None
+        reporte = importar_usuarios(db.session, Usuario.__table__, leer_filas(archivo, formato), args.lote, indice)
+
+    for error in reporte['errores']:
+        print(f"Línea {error['linea']} (DNI: {error['dni']}): {error['error']}")
+    for posible in reporte['posibles_duplicados']:
+        similares = ", ".join(f"ID {c['id']}" if 'id' in c else f"línea {c['linea']}" for c in posible['candidatos'])
+        print(f"Línea {posible['linea']} (DNI: {posible['dni']}): posible duplicado de {similares}")
+    print(f"\n✅ {reporte['insertados']} usuarios importados, {len(reporte['errores'])} con errores.")
+    return 0 if not reporte['errores'] else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,455 @@
+import bisect
+import itertools
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+
+# --- Instrumentación: tiempos de SQL y HTTP, consultas lentas y métricas ---
+# Cada sentencia SQL (sqlite3 o SQLAlchemy) y cada petición HTTP se mide y se pasa a los
+# observadores registrados. Los observadores de fábrica:
+#   - acumulan métricas en REGISTRO, que se publican en formato Prometheus en /metrics;
+#   - registran en el log "asistencia.sql" las consultas que superan UMBRAL_LENTA_MS, junto
+#     con su EXPLAIN QUERY PLAN (y cada sentencia, en nivel DEBUG).
+# Se pueden agregar otros con agregar_observador(funcion).
+#
+#     ASISTENCIA_INSTRUMENTACION=0       desactiva la medición (conexiones sqlite3 comunes)
+#     ASISTENCIA_UMBRAL_LENTA_MS=200     umbral de consulta lenta
+#     ASISTENCIA_LOG_FORMATO=json|texto  formato de configurar_logs()
+#
+# Con gunicorn cada worker tiene su propio REGISTRO: /metrics muestra el del worker que atiende.
+
+ACTIVA = os.environ.get("ASISTENCIA_INSTRUMENTACION", "1") != "0"
+UMBRAL_LENTA_MS = float(os.environ.get("ASISTENCIA_UMBRAL_LENTA_MS", 200))
+
+# Límites (en segundos) de los histogramas
+LIMITES_SQL = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+LIMITES_HTTP = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+log_sql = logging.getLogger("asistencia.sql")
+log_http = logging.getLogger("asistencia.http")
+
+# --- Métricas en formato Prometheus ---
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _etiquetas_texto(nombres, valores, extra=()):
+    pares = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in itertools.chain(zip(nombres, valores), extra)]
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+class Contador:
+    """Valor que solo crece, uno por combinación de etiquetas."""
+    tipo = "counter"
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def inc(self, valor=1, **etiquetas):
+        self._sumar(tuple(etiquetas[nombre] for nombre in self.etiquetas), valor)
+
+    def _sumar(self, clave, valor):
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + valor
+
+    def valor(self, **etiquetas):
+        return self._valores.get(tuple(etiquetas[nombre] for nombre in self.etiquetas), 0)
+
+    def lineas(self):
+        with self._lock:
+            valores = sorted(self._valores.items())
+        for clave, valor in valores:
+            yield f"{self.nombre}{_etiquetas_texto(self.etiquetas, clave)} {valor:g}"
+
+class Histograma:
+    """Distribución de duraciones: cantidad por límite ("le"), suma y total."""
+    tipo = "histogram"
+
+    def __init__(self, nombre, ayuda, etiquetas=(), limites=LIMITES_SQL):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.limites = tuple(sorted(limites))
+        self._series = {}  # clave -> [cantidades por límite (+Inf al final), suma]
+        self._lock = threading.Lock()
+
+    def observar(self, valor, **etiquetas):
+        self._agregar(tuple(etiquetas[nombre] for nombre in self.etiquetas), valor)
+
+    def _agregar(self, clave, valor):
+        posicion = bisect.bisect_left(self.limites, valor)
+        with self._lock:
+            serie = self._series.get(clave)
+            if serie is None:
+                serie = self._series[clave] = [[0] * (len(self.limites) + 1), 0.0]
+            serie[0][posicion] += 1
+            serie[1] += valor
+
+    def lineas(self):
+        with self._lock:
+            series = sorted((clave, list(cantidades), suma) for clave, (cantidades, suma) in self._series.items())
+        for clave, cantidades, suma in series:
+            acumulado = 0
+            for limite, cantidad in zip(self.limites + ("+Inf",), cantidades):
+                acumulado += cantidad
+                le = limite if limite == "+Inf" else f"{limite:g}"
+                yield f"{self.nombre}_bucket{_etiquetas_texto(self.etiquetas, clave, [('le', le)])} {acumulado}"
+            yield f"{self.nombre}_sum{_etiquetas_texto(self.etiquetas, clave)} {suma:.6f}"
+            yield f"{self.nombre}_count{_etiquetas_texto(self.etiquetas, clave)} {acumulado}"
+
+class Registro:
+    """Conjunto de métricas de un proceso. Pedir dos veces la misma métrica devuelve la misma."""
+
+    def __init__(self):
+        self._metricas = {}
+        self._lock = threading.Lock()
+
+    def _obtener(self, clase, nombre, *args, **kwargs):
+        with self._lock:
+            metrica = self._metricas.get(nombre)
+            if metrica is None:
+                metrica = self._metricas[nombre] = clase(nombre, *args, **kwargs)
+            elif not isinstance(metrica, clase):
+                raise ValueError(f"La métrica '{nombre}' ya existe con otro tipo.")
+            return metrica
+
+    def contador(self, nombre, ayuda, etiquetas=()):
+        return self._obtener(Contador, nombre, ayuda, etiquetas)
+
+    def histograma(self, nombre, ayuda, etiquetas=(), limites=LIMITES_SQL):
+        return self._obtener(Histograma, nombre, ayuda, etiquetas, limites)
+
+    def texto_prometheus(self):
+        """Todas las métricas en el formato de texto de Prometheus (versión 0.0.4)."""
+        with self._lock:
+            metricas = sorted(self._metricas.values(), key=lambda metrica: metrica.nombre)
+        lineas = []
+        for metrica in metricas:
+            lineas.append(f"# HELP {metrica.nombre} {metrica.ayuda}")
+            lineas.append(f"# TYPE {metrica.nombre} {metrica.tipo}")
+            lineas.extend(metrica.lineas())
+        return "\n".join(lineas) + "\n"
+
+REGISTRO = Registro()
+TIPO_PROMETHEUS = "text/plain; version=0.0.4; charset=utf-8"
+
+SQL_DURACION = REGISTRO.histograma(
+    "asistencia_sql_duracion_segundos", "Duración de las sentencias SQL (ejecución y lectura de filas).",
+    ("origen", "operacion", "tabla"), LIMITES_SQL,
+)
+SQL_FILAS = REGISTRO.contador(
+    "asistencia_sql_filas_total", "Filas leídas o modificadas por las sentencias SQL.", ("origen", "operacion", "tabla")
+)
+SQL_ERRORES = REGISTRO.contador(
+    "asistencia_sql_errores_total", "Sentencias SQL que terminaron con error.", ("origen", "operacion", "tabla")
+)
+SQL_LENTAS = REGISTRO.contador(
+    "asistencia_sql_lentas_total", "Sentencias SQL que superaron el umbral de consulta lenta.", ("origen", "operacion", "tabla")
+)
+HTTP_DURACION = REGISTRO.histograma(
+    "asistencia_http_duracion_segundos", "Duración de las peticiones HTTP por endpoint.",
+    ("servicio", "endpoint", "metodo", "codigo"), LIMITES_HTTP,
+)
+
+# --- Observadores ---
+_observadores = []
+
+def agregar_observador(funcion):
+    """`funcion(evento)` se llama al terminar cada sentencia SQL (ver registrar_sentencia)."""
+    _observadores.append(funcion)
+    return funcion
+
+def quitar_observador(funcion):
+    _observadores.remove(funcion)
+
+_COMENTARIO = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_TABLA = re.compile(r"\b(?:FROM|INTO|UPDATE(?!\s+OF\b)|JOIN|TABLE(?:\s+IF\s+NOT\s+EXISTS)?)\s+[\"`\[]?(\w+)", re.IGNORECASE)
+
+@lru_cache(maxsize=1024)
+def clasificar(sql):
+    """(operación, tabla principal) de una sentencia, para etiquetar las métricas."""
+    sql = _COMENTARIO.sub(" ", sql)
+    palabras = sql.lstrip(" \t\r\n(").split(None, 1)
+    operacion = palabras[0].upper() if palabras else ""
+    tabla = _TABLA.search(sql)
+    return operacion, tabla.group(1).lower() if tabla else ""
+
+def registrar_sentencia(origen, sql, duracion, filas=None, error=None, explicar=None):
+    """
+    Informa a los observadores que terminó una sentencia. `filas` es None si no se conoce;
+    `explicar()`, si se pasa, devuelve el EXPLAIN QUERY PLAN (solo se llama si hace falta).
+    """
+    operacion, tabla = clasificar(sql)
+    evento = {
+        "origen": origen, "sql": sql, "operacion": operacion, "tabla": tabla,
+        "duracion": duracion, "filas": filas, "error": error, "explicar": explicar,
+    }
+    for observador in _observadores:
+        try:
+            observador(evento)
+        except Exception:
+            log_sql.exception("Error en un observador de la instrumentación")
+
+@agregar_observador
+def _metricas_sql(evento):
+    # Se llama en cada sentencia: la clave de etiquetas se arma una vez y en el orden declarado
+    clave = (evento["origen"], evento["operacion"], evento["tabla"])
+    SQL_DURACION._agregar(clave, evento["duracion"])
+    if evento["filas"]:
+        SQL_FILAS._sumar(clave, evento["filas"])
+    if evento["error"] is not None:
+        SQL_ERRORES._sumar(clave, 1)
+    if evento["duracion"] * 1000 >= UMBRAL_LENTA_MS:
+        SQL_LENTAS._sumar(clave, 1)
+
+@agregar_observador
+def _log_sql(evento):
+    lenta = evento["duracion"] * 1000 >= UMBRAL_LENTA_MS
+    if not lenta and not log_sql.isEnabledFor(logging.DEBUG):
+        return
+    datos = {
+        "origen": evento["origen"], "operacion": evento["operacion"], "tabla": evento["tabla"],
+        "duracion_ms": round(evento["duracion"] * 1000, 3), "filas": evento["filas"],
+        "sql": " ".join(evento["sql"].split()),
+    }
+    if evento["error"] is not None:
+        datos["error"] = str(evento["error"])
+    if lenta:
+        if evento["explicar"] and evento["error"] is None:
+            try:
+                datos["plan"] = [fila[-1] for fila in evento["explicar"]()]
+            except Exception as e:  # La conexión pudo cerrarse o la sentencia no admite EXPLAIN
+                datos["plan_error"] = str(e)
+        log_sql.warning("Consulta lenta (%.1f ms): %s", datos["duracion_ms"], datos["sql"][:200], extra={"datos": datos})
+    else:
+        log_sql.debug("%s %s (%.3f ms)", evento["operacion"], evento["tabla"], datos["duracion_ms"], extra={"datos": datos})
+
+# Solo estas sentencias tienen un plan que valga la pena mirar
+_EXPLICABLES = {"SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE"}
+
+def _explicador(conn, sql, parametros):
+    if clasificar(sql)[0] not in _EXPLICABLES:
+        return None
+    def explicar():
+        # Cursor sqlite3 común: el EXPLAIN no se mide ni se cuenta
+        return conn.cursor(sqlite3.Cursor).execute("EXPLAIN QUERY PLAN " + sql, parametros).fetchall()
+    return explicar
+
+# --- sqlite3: conexiones y cursores instrumentados ---
+class CursorInstrumentado(sqlite3.Cursor):
+    """
+    Mide cada execute/executemany/executescript. En las consultas que devuelven filas, la
+    medición sigue mientras se leen (fetch* o iterando) y se registra al terminar de leerlas,
+    al ejecutar otra sentencia o al cerrar el cursor.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._consulta = None  # [sql, parametros, duración acumulada, filas leídas]
+
+    def _medir(self, metodo, sql, parametros, argumento):
+        self._terminar()
+        inicio = time.perf_counter()
+        try:
+            resultado = metodo(sql, argumento) if argumento is not None else metodo(sql)
+        except Exception as e:
+            registrar_sentencia("sqlite3", sql, time.perf_counter() - inicio, error=e)
+            raise
+        duracion = time.perf_counter() - inicio
+        if self.description is None:
+            explicar = None if parametros is None else _explicador(self.connection, sql, parametros)
+            registrar_sentencia("sqlite3", sql, duracion, max(self.rowcount, 0), explicar=explicar)
+        else:
+            self._consulta = [sql, parametros, duracion, 0]
+        return resultado
+
+    def _leidas(self, inicio, cantidad, terminado):
+        consulta = self._consulta
+        if consulta is None:
+            return
+        consulta[2] += time.perf_counter() - inicio
+        consulta[3] += cantidad
+        if terminado:
+            self._terminar()
+
+    def _terminar(self):
+        consulta, self._consulta = self._consulta, None
+        if consulta is not None:
+            sql, parametros, duracion, filas = consulta
+            registrar_sentencia("sqlite3", sql, duracion, filas, explicar=_explicador(self.connection, sql, parametros))
+
+    def execute(self, sql, parameters=()):
+        return self._medir(super().execute, sql, parameters, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        # Se mira el primer juego de parámetros (para el EXPLAIN) sin consumir el iterable
+        parametros = iter(seq_of_parameters)
+        primero = next(parametros, None)
+        if primero is not None:
+            parametros = itertools.chain([primero], parametros)
+        return self._medir(super().executemany, sql, primero, parametros if primero is not None else [])
+
+    def executescript(self, sql_script):
+        return self._medir(super().executescript, sql_script, None, None)
+
+    def fetchone(self):
+        inicio = time.perf_counter()
+        fila = super().fetchone()
+        self._leidas(inicio, fila is not None, fila is None)
+        return fila
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        inicio = time.perf_counter()
+        filas = super().fetchmany(size)
+        self._leidas(inicio, len(filas), len(filas) < size)
+        return filas
+
+    def fetchall(self):
+        inicio = time.perf_counter()
+        filas = super().fetchall()
+        self._leidas(inicio, len(filas), True)
+        return filas
+
+    def __next__(self):
+        inicio = time.perf_counter()
+        try:
+            fila = super().__next__()
+        except StopIteration:
+            self._leidas(inicio, 0, True)
+            raise
+        self._leidas(inicio, 1, False)
+        return fila
+
+    def close(self):
+        self._terminar()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._terminar()
+        except Exception:
+            pass
+
+class ConexionInstrumentada(sqlite3.Connection):
+    """Conexión sqlite3 cuyos cursores (también los de conn.execute) son CursorInstrumentado."""
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or CursorInstrumentado)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+def fabrica_conexion():
+    """Clase a pasar como `factory` a sqlite3.connect."""
+    return ConexionInstrumentada if ACTIVA else sqlite3.Connection
+
+# --- SQLAlchemy: eventos del motor ---
+def instrumentar_motor(engine):
+    """Mide las sentencias de un motor de SQLAlchemy con sus eventos de cursor."""
+    if not ACTIVA:
+        return engine
+    from sqlalchemy import event
+
+    es_sqlite = engine.dialect.name == "sqlite"
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("instrumentacion_inicio", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        duracion = time.perf_counter() - conn.info["instrumentacion_inicio"].pop()
+        explicar = None
+        if es_sqlite:
+            parametros = parameters[0] if executemany and parameters else parameters
+            explicar = _explicador(cursor.connection, statement, parametros)
+        # En los SELECT el driver no informa filas: se leen después, fuera de este evento
+        filas = cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else None
+        registrar_sentencia("sqlalchemy", statement, duracion, filas, explicar=explicar)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(contexto):
+        inicios = contexto.connection.info.get("instrumentacion_inicio") if contexto.connection is not None else None
+        if inicios and contexto.statement:
+            registrar_sentencia("sqlalchemy", contexto.statement, time.perf_counter() - inicios.pop(),
+                                error=contexto.original_exception)
+
+    return engine
+
+# --- HTTP ---
+def observar_http(servicio, endpoint, metodo, codigo, duracion):
+    """Registra una petición atendida: histograma por endpoint y una línea de log estructurada."""
+    HTTP_DURACION.observar(duracion, servicio=servicio, endpoint=endpoint, metodo=metodo, codigo=str(codigo))
+    if log_http.isEnabledFor(logging.INFO):
+        log_http.info("%s %s %s (%.1f ms)", metodo, endpoint, codigo, duracion * 1000, extra={"datos": {
+            "servicio": servicio, "endpoint": endpoint, "metodo": metodo, "codigo": codigo,
+            "duracion_ms": round(duracion * 1000, 3),
+        }})
+
+def instrumentar_app(app, ruta_metricas="/metrics"):
+    """Mide cada petición de una app Flask por regla de ruta y publica REGISTRO en `ruta_metricas`."""
+    if not ACTIVA:
+        return app
+    from flask import Response, g, request
+
+    @app.before_request
+    def _inicio_peticion():
+        g.instrumentacion_inicio = time.perf_counter()
+
+    @app.after_request
+    def _fin_peticion(respuesta):
+        inicio = g.pop("instrumentacion_inicio", None)
+        if inicio is not None:
+            # La regla ("/usuarios/<int:id>"), no la URL: así no hay una serie por cada ID
+            endpoint = request.url_rule.rule if request.url_rule is not None else "sin_ruta"
+            observar_http(app.name, endpoint, request.method, respuesta.status_code, time.perf_counter() - inicio)
+        return respuesta
+
+    def metricas():
+        return Response(REGISTRO.texto_prometheus(), content_type=TIPO_PROMETHEUS)
+
+    app.add_url_rule(ruta_metricas, "metricas", metricas, methods=["GET"])
+    return app
+
+# --- Logs estructurados ---
+class FormatoJSON(logging.Formatter):
+    """Una línea JSON por registro; los datos pasados en extra={"datos": {...}} van como campos."""
+
+    def format(self, record):
+        salida = {
+            "momento": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensaje": record.getMessage(),
+        }
+        salida.update(getattr(record, "datos", None) or {})
+        if record.exc_info:
+            salida["excepcion"] = self.formatException(record.exc_info)
+        return json.dumps(salida, ensure_ascii=False, default=str)
+
+def configurar_logs(nivel=None, formato=None):
+    """Configura el log raíz de un servicio: JSON por defecto (ASISTENCIA_LOG_FORMATO) hacia stderr."""
+    nivel = nivel or os.environ.get("ASISTENCIA_LOG_NIVEL", "INFO")
+    formato = formato or os.environ.get("ASISTENCIA_LOG_FORMATO", "json")
+    manejador = logging.StreamHandler()
+    if formato == "json":
+        manejador.setFormatter(FormatoJSON())
+    else:
+        manejador.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    raiz = logging.getLogger()
+    raiz.handlers[:] = [manejador]
+    raiz.setLevel(nivel.upper() if isinstance(nivel, str) else nivel)
@@ -0,0 +1,92 @@
+import importlib
+import sys
+
+# --- Punto de entrada único del sistema de asistencia ---
+# Cada pantalla o subcomando importa su módulo recién cuando se usa: el menú del kiosco no carga
+# Flask, SQLAlchemy, NumPy ni pyarrow, y el esquema se verifica una sola vez por proceso
+# (almacenamiento.asegurar_esquema). `python -m benchmarks.arranque` mide el tiempo hasta el menú.
+#
+#     python main.py                        # menú principal
+#     python main.py asistencia             # directo a tomar asistencia
+#     python main.py servidor --workers 4   # el resto de los argumentos van al módulo
+#     python main.py exportar --help
+
+# Pantallas interactivas: nombre -> (módulo, función, descripción)
+PANTALLAS = {
+    "individuos": ("EditarEliminar", "run_system", "Alta, edición, bajas y búsqueda de individuos"),
+    "asistencia": ("registroasistencia", "registrar_asistencia", "Registrar asistencia"),
+    "reportes": ("reportes_asistencia", "consultar_asistencia", "Consultar asistencia"),
+}
+
+# Subcomandos que delegan en el main(argv) de otro módulo: nombre -> (módulo, descripción)
+COMANDOS = {
+    "migrar": ("almacenamiento", "Versión y migraciones del esquema de la base"),
+    "importar": ("importacion_usuarios", "Importar usuarios desde CSV o JSONL"),
+    "duplicados": ("duplicados", "Buscar personas posiblemente duplicadas"),
+    "analitica": ("analitica_asistencia", "Patrones de inasistencia (necesita NumPy)"),
+    "exportar": ("exportacion_asistencia", "Exportar la asistencia a Parquet o Arrow (necesita pyarrow)"),
+    "rollups": ("rollups_asistencia", "Verificar o reconstruir los resúmenes de asistencia"),
+    "compactar": ("compactacion", "Purgar bajas lógicas viejas y compactar la base"),
+    "grupos": ("grupos_asistencia", "Grupos o cursos, sus integrantes y la planilla de cada clase"),
+    "particiones": ("particiones_asistencia", "Años de asistencia archivados (listar | archivar AÑO)"),
+    "servidor": ("servidor_usuarios", "Servicio HTTP de alta de usuarios (necesita Flask)"),
+    "checkin": ("checkin_async", "Servicio HTTP de check-in de asistencia"),
+    "sincronizar": ("diario_local", "Enviar a la base las marcas del diario local del kiosco"),
+}
+
+# Opciones del menú principal, en orden
+MENU = ["individuos", "asistencia", "reportes"]
+
+def abrir_pantalla(nombre):
+    modulo, funcion, _ = PANTALLAS[nombre]
+    return getattr(importlib.import_module(modulo), funcion)()
+
+def mostrar_menu():
+    print("\n--- Sistema de Gestión de Asistencia ---")
+    for numero, nombre in enumerate(MENU, start=1):
+        print(f"{numero}. {PANTALLAS[nombre][2]}")
+    print(f"{len(MENU) + 1}. Salir")
+    return input("Seleccione una opción: ").strip()
+
+def menu():
+    while True:
+        opcion = mostrar_menu()
+        if opcion == str(len(MENU) + 1):
+            print("Saliendo del sistema.")
+            return 0
+        if opcion.isdigit() and 1 <= int(opcion) <= len(MENU):
+            abrir_pantalla(MENU[int(opcion) - 1])
+        else:
+            print("Opción inválida. Intente de nuevo.")
+
+def _ayuda():
+    print("Uso: python main.py [comando] [argumentos del comando]\n")
+    print("Sin comando se abre el menú principal.\n")
+    print("Pantallas:")
+    for nombre, (_, _, descripcion) in PANTALLAS.items():
+        print(f"  {nombre:<12} {descripcion}")
+    print("\nComandos (`python main.py <comando> --help` muestra sus opciones):")
+    for nombre, (_, descripcion) in COMANDOS.items():
+        print(f"  {nombre:<12} {descripcion}")
+
+def main(argv=None):
+    # Sin argparse: la línea de comandos es "comando + resto" y el resto lo interpreta cada
+    # módulo con su propio argparse. El menú arranca sin importar nada más.
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        return menu()
+    comando, resto = argv[0], argv[1:]
+    if comando in ("-h", "--help", "ayuda"):
+        _ayuda()
+        return 0
+    if comando in PANTALLAS and not resto:
+        abrir_pantalla(comando)
+        return 0
+    if comando in COMANDOS:
+        return importlib.import_module(COMANDOS[comando][0]).main(resto) or 0
+    print(f"Comando desconocido: '{' '.join(argv)}'\n", file=sys.stderr)
+    _ayuda()
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+import argparse
+import os
+import stat
+import sqlite3
+import sys
+from datetime import date
+from urllib.parse import quote
+
+import almacenamiento
+
+# --- Particiones anuales de asistencia ---
+# La tabla `asistencia` guarda solo los años abiertos. Un año cerrado se copia a un archivo SQLite
+# propio de solo lectura (archivo_asistencia/asistencia_2024.db, junto a la base) y se borra de la
+# tabla principal: el UPSERT de marcar_asistencia, sus índices y los check-ins trabajan solo con
+# los años en curso. En el archivo, cada fecha es un número de día (días desde 1970-01-01) y cada
+# estado un código de la tabla `estados`, en tablas WITHOUT ROWID y con VACUUM al final. El
+# calendario `dias` (una fila por jornada) devuelve la fecha YYYY-MM-DD sin calcularla fila por fila.
+#
+# Los reportes le piden a fuentes() qué leer para su rango de fechas: "asistencia" y, si el rango
+# toca años archivados, los adjunta (ATTACH de solo lectura) y suma una subconsulta por año con las
+# mismas columnas que `asistencia`. Agregar cada fuente por separado y sumar los conteos es ~2 veces
+# más rápido que agregar su UNION ALL (fuente()), que SQLite no puede aplanar. Los resúmenes
+# (rollups) de los años archivados se conservan: los triggers de borrado no restan lo que se archiva.
+#
+#     python particiones_asistencia.py listar
+#     python particiones_asistencia.py archivar 2024
+
+CARPETA = "archivo_asistencia"
+# SQLite adjunta hasta 10 bases por conexión (SQLITE_MAX_ATTACHED): se dejan dos libres
+MAX_ADJUNTOS = 8
+
+ESQUEMA_ARCHIVO = [
+    "CREATE TABLE {esquema}.estados (codigo INTEGER PRIMARY KEY, estado TEXT NOT NULL UNIQUE)",
+    "CREATE TABLE {esquema}.dias (dia INTEGER PRIMARY KEY, fecha TEXT NOT NULL UNIQUE)",
+    '''CREATE TABLE {esquema}.asistencia (
+        dia INTEGER NOT NULL, -- días desde 1970-01-01
+        usuario_id INTEGER NOT NULL,
+        estado INTEGER NOT NULL, -- estados.codigo
+        PRIMARY KEY (dia, usuario_id)
+    ) WITHOUT ROWID''',
+]
+# Se crea después de copiar las filas (más rápido que mantenerlo fila a fila)
+INDICE_ARCHIVO = "CREATE INDEX {esquema}.idx_asistencia_usuario_dia ON asistencia (usuario_id, dia, estado)"
+
+def numero_de_dia(fecha):
+    """'1970-01-02' -> 1. Es lo mismo que CAST(strftime('%s', fecha) / 86400 AS INTEGER) en SQL."""
+    return date.fromisoformat(fecha).toordinal() - date(1970, 1, 1).toordinal()
+
+def _dia_o(fecha, defecto):
+    """Número de día de `fecha`, o `defecto` si no hay fecha o no es YYYY-MM-DD (el reporte la filtra igual)."""
+    try:
+        return numero_de_dia(fecha) if fecha else defecto
+    except ValueError:
+        return defecto
+
+def carpeta_archivo(db_name=None):
+    return os.path.join(os.path.dirname(os.path.abspath(db_name or almacenamiento.DB_NAME)), CARPETA)
+
+def _ruta_base(conn):
+    """Archivo de la base principal de una conexión ('' si es :memory:)."""
+    return next(fila[2] for fila in conn.execute("PRAGMA database_list") if fila[1] == "main")
+
+def anios_archivados(conn):
+    """[(anio, archivo)] de los años ya archivados, en orden."""
+    return conn.execute(
+        "SELECT anio, archivo FROM asistencia_archivos WHERE estado = 'archivado' ORDER BY anio"
+    ).fetchall()
+
+def adjuntar(conn, anio, ruta):
+    """Adjunta (una sola vez por conexión) el archivo de un año como `archivo_<anio>`, de solo lectura."""
+    esquema = f"archivo_{int(anio)}"
+    if any(fila[1] == esquema for fila in conn.execute("PRAGMA database_list")):
+        return esquema
+    if not os.path.exists(ruta):
+        raise FileNotFoundError(f"Falta el archivo del año {anio}: {ruta}")
+    ruta = os.path.abspath(ruta).replace(os.sep, "/")
+    if not ruta.startswith("/"):  # C:/... en Windows
+        ruta = "/" + ruta
+    # immutable=1: el archivo no cambia nunca, SQLite no lo bloquea ni revisa si otro lo modificó
+    conn.execute("ATTACH DATABASE ? AS " + esquema, (f"file:{quote(ruta)}?mode=ro&immutable=1",))
+    return esquema
+
+def fuentes(conn, desde=None, hasta=None):
+    """
+    Lo que hay que leer para la asistencia de [desde, hasta] (YYYY-MM-DD, ambos opcionales):
+    "asistencia" y una subconsulta por cada año archivado del rango, todas con las columnas
+    usuario_id, fecha, estado y eliminado_en. Cada una va sola en un FROM. Dentro de una transacción
+    de lectura, la lista de años archivados sale de la misma foto que la tabla principal.
+    """
+    archivados = [
+        (anio, archivo) for anio, archivo in anios_archivados(conn)
+        if (not desde or anio >= desde[:4]) and (not hasta or anio <= hasta[:4])
+    ]
+    if not archivados:
+        return ["asistencia"]
+    if len(archivados) > MAX_ADJUNTOS:
+        raise ValueError(f"El rango abarca {len(archivados)} años archivados (máximo {MAX_ADJUNTOS}): acótelo.")
+
+    carpeta = carpeta_archivo(_ruta_base(conn))
+    lista = ["asistencia"]
+    for anio, archivo in archivados:
+        esquema = adjuntar(conn, anio, os.path.join(carpeta, archivo))
+        # Un CASE con los pocos estados del archivo evita un JOIN por fila
+        estado = " ".join(
+            f"WHEN {int(codigo)} THEN '{texto.replace(chr(39), chr(39) * 2)}'"
+            for codigo, texto in conn.execute(f"SELECT codigo, estado FROM {esquema}.estados")
+        )
+        # Enteros calculados acá, no texto del usuario: van en la consulta y usan la clave (dia, usuario_id)
+        primero = _dia_o(desde, numero_de_dia(f"{anio}-01-01"))
+        ultimo = _dia_o(hasta, numero_de_dia(f"{anio}-12-31"))
+        lista.append(
+            f"(SELECT p.usuario_id, d.fecha, CASE p.estado {estado} END AS estado, NULL AS eliminado_en "
+            f"FROM {esquema}.dias d JOIN {esquema}.asistencia p ON p.dia = d.dia "
+            f"WHERE d.dia BETWEEN {int(primero)} AND {int(ultimo)})"
+        )
+    return lista
+
+def fuente(conn, desde=None, hasta=None):
+    """Las fuentes() juntas en un UNION ALL, para leer filas sueltas (para agregar conviene cada una por separado)."""
+    lista = fuentes(conn, desde, hasta)
+    if len(lista) == 1:
+        return lista[0]
+    return "(" + " UNION ALL ".join(f"SELECT usuario_id, fecha, estado, eliminado_en FROM {f}" for f in lista) + ")"
+
+# --- Archivar un año cerrado ---
+def _borrar(ruta):
+    if os.path.exists(ruta):
+        os.chmod(ruta, stat.S_IREAD | stat.S_IWRITE)  # En Windows no se borra un archivo de solo lectura
+        os.remove(ruta)
+
+def archivar_anio(anio, db_name=None):
+    """
+    Mueve las asistencias vigentes de un año cerrado a su archivo y las borra de `asistencia`
+    (también las bajas lógicas de ese año). Si se corta a mitad de camino, volver a correrla termina
+    el trabajo. Devuelve {"anio", "archivo", "filas", "bytes"}.
+    """
+    anio = int(anio)
+    if anio >= date.today().year:
+        raise ValueError(f"Solo se archivan años cerrados: {anio} todavía está en curso.")
+    db_name = db_name or almacenamiento.DB_NAME
+    carpeta = carpeta_archivo(db_name)
+    os.makedirs(carpeta, exist_ok=True)
+    archivo = f"asistencia_{anio}.db"
+    ruta = os.path.join(carpeta, archivo)
+    temporal = ruta + ".tmp"
+    desde, hasta = f"{anio}-01-01", f"{anio}-12-31"
+
+    conn = almacenamiento.conectar(db_name)
+    try:
+        almacenamiento.asegurar_esquema(db_name, conn)
+        fila = conn.execute("SELECT estado FROM asistencia_archivos WHERE anio = ?", (str(anio),)).fetchone()
+        if fila and fila[0] == "archivado":
+            raise ValueError(f"El año {anio} ya está archivado en {archivo}.")
+
+        # 1. Desde acá el año no acepta marcas (trigger asistencia_archivada_ai): ninguna queda fuera de la copia
+        with conn:
+            conn.execute(
+                "INSERT INTO asistencia_archivos (anio, archivo) VALUES (?, ?) ON CONFLICT(anio) DO NOTHING",
+                (str(anio), archivo),
+            )
+
+        # 2. Copia al archivo nuevo, con días numerados y estados codificados
+        _borrar(temporal)
+        conn.execute("ATTACH DATABASE ? AS archivo_nuevo", (temporal,))
+        try:
+            with conn:
+                for sentencia in ESQUEMA_ARCHIVO:
+                    conn.execute(sentencia.format(esquema="archivo_nuevo"))
+                conn.execute(
+                    "INSERT INTO archivo_nuevo.estados (estado) SELECT DISTINCT estado FROM asistencia "
+                    "WHERE fecha BETWEEN ? AND ? AND eliminado_en IS NULL ORDER BY estado",
+                    (desde, hasta),
+                )
+                conn.execute(
+                    "INSERT INTO archivo_nuevo.dias (dia, fecha) SELECT DISTINCT CAST(strftime('%s', fecha) / 86400 AS INTEGER), "
+                    "fecha FROM asistencia WHERE fecha BETWEEN ? AND ? AND eliminado_en IS NULL",
+                    (desde, hasta),
+                )
+                copiadas = conn.execute('''
+                    INSERT INTO archivo_nuevo.asistencia (dia, usuario_id, estado)
+                    SELECT d.dia, a.usuario_id, e.codigo
+                    FROM asistencia a
+                    JOIN archivo_nuevo.dias d ON d.fecha = a.fecha
+                    JOIN archivo_nuevo.estados e ON e.estado = a.estado
+                    WHERE a.fecha BETWEEN ? AND ? AND a.eliminado_en IS NULL
+                    ORDER BY 1, 2
+                ''', (desde, hasta)).rowcount
+                conn.execute(INDICE_ARCHIVO.format(esquema="archivo_nuevo"))
+        finally:
+            conn.execute("DETACH DATABASE archivo_nuevo")
+        compactar = sqlite3.connect(temporal)
+        try:
+            compactar.execute("VACUUM")
+        finally:
+            compactar.close()
+        _borrar(ruta)
+        os.replace(temporal, ruta)
+        os.chmod(ruta, stat.S_IREAD | stat.S_IRGRP | stat.S_IROTH)
+        tamano = os.path.getsize(ruta)
+
+        # 3. Con el archivo en su lugar, se borra el año de la tabla principal
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            vigentes = conn.execute(
+                "SELECT COUNT(*) FROM asistencia WHERE fecha BETWEEN ? AND ? AND eliminado_en IS NULL", (desde, hasta)
+            ).fetchone()[0]
+            if vigentes != copiadas:
+                raise RuntimeError(f"El archivo de {anio} tiene {copiadas} filas y la base {vigentes}: no se borró nada.")
+            conn.execute("DELETE FROM asistencia WHERE fecha BETWEEN ? AND ?", (desde, hasta))
+            conn.execute(
+                "UPDATE asistencia_archivos SET estado = 'archivado', filas = ?, bytes = ?, archivado_en = ? WHERE anio = ?",
+                (copiadas, tamano, almacenamiento.ahora(), str(anio)),
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    finally:
+        conn.close()
+    return {"anio": anio, "archivo": ruta, "filas": copiadas, "bytes": tamano}
+
+# --- Uso desde la consola ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archiva los años cerrados de asistencia en archivos de solo lectura.")
+    parser.add_argument("accion", choices=["listar", "archivar"])
+    parser.add_argument("anios", nargs="*", type=int, help="Años a archivar.")
+    parser.add_argument("--db", default=almacenamiento.DB_NAME)
+    args = parser.parse_args(argv)
+
+    if args.accion == "archivar":
+        if not args.anios:
+            parser.error("Indique al menos un año a archivar.")
+        for anio in sorted(args.anios):
+            resumen = archivar_anio(anio, args.db)
+            print(f"✅ {anio}: {resumen['filas']} asistencias en {resumen['archivo']} ({resumen['bytes'] / 1024:.0f} KiB).")
+        return 0
+
+    almacenamiento.asegurar_esquema(args.db)
+    conn = almacenamiento.conectar(args.db)
+    try:
+        filas = conn.execute(
+            "SELECT anio, estado, filas, bytes, archivado_en FROM asistencia_archivos ORDER BY anio"
+        ).fetchall()
+        abiertos = conn.execute(
+            "SELECT substr(fecha, 1, 4), COUNT(*) FROM asistencia GROUP BY 1 ORDER BY 1"
+        ).fetchall()
+    finally:
+        conn.close()
+    for anio, cantidad in abiertos:
+        print(f"{anio}  en la base      {cantidad:>9} asistencias")
+    for anio, estado, cantidad, tamano, archivado_en in filas:
+        if estado == "archivado":
+            print(f"{anio}  archivado       {cantidad:>9} asistencias  {tamano / 1024:>8.0f} KiB  ({archivado_en})")
+        else:
+            print(f"{anio}  sin terminar de archivar: vuelva a correr 'archivar {anio}'")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
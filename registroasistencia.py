@@ -1,73 +1,188 @@
+import logging
 import sqlite3
 from datetime import datetime
 
-# --- Configuración inicial de la base de datos (puede ir en otro archivo) ---
-DB_NAME = "asistencia.db"
+import almacenamiento
+import diario_local
+import grupos_asistencia
+
+logger = logging.getLogger(__name__)
+
+# --- Configuración de la base de datos: la misma base unificada que usa EditarEliminar.py ---
+DB_NAME = almacenamiento.DB_NAME
 
 def conectar():
-    return sqlite3.connect(DB_NAME)
+    return almacenamiento.conectar(DB_NAME)
 
-# --- Crear tabla si no existe ---
+# --- Crear (o actualizar) el esquema si hace falta (una vez por proceso) ---
 def crear_tablas():
-    with conectar() as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS asistencia (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                usuario_id INTEGER,
-                fecha TEXT,
-                estado TEXT,
-                UNIQUE(usuario_id, fecha)
-            )
-        ''')
-        conn.commit()
+    almacenamiento.asegurar_esquema(DB_NAME)
 
-# --- Obtener lista de usuarios activos (filtrado por rol o curso, simplificado) ---
-def obtener_usuarios_activos():
+# --- Obtener lista de usuarios activos (de un grupo o de toda la institución) ---
+def obtener_usuarios_activos(grupo_id=None):
+    if grupo_id is not None:
+        # Planilla guardada del grupo (grupos_asistencia.py): se rearma solo si el grupo cambió
+        return grupos_asistencia.planilla(grupo_id, DB_NAME)
     with conectar() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT id, nombre FROM usuarios WHERE estado = 'Activo'")
+        cursor.execute(
+            "SELECT id, nombre || ' ' || apellido FROM individuos WHERE estado = 'Activo' AND eliminado_en IS NULL ORDER BY apellido, nombre"
+        )
         return cursor.fetchall()
 
 # --- Registrar o actualizar asistencia ---
+ESTADOS_VALIDOS = {'P': 'Presente', 'A': 'Ausente', 'T': 'Tarde', 'J': 'Justificado'}
+
+# Solo se marca a personas vigentes; volver a marcar una asistencia dada de baja la restaura.
+# ?4 es el momento de la marca (almacenamiento.ahora_preciso()), el que compara diario_local.py.
+SQL_UPSERT_ASISTENCIA = '''
+    INSERT INTO asistencia (usuario_id, fecha, estado, actualizado_en)
+    SELECT ?1, ?2, ?3, ?4 WHERE EXISTS (SELECT 1 FROM individuos WHERE id = ?1 AND eliminado_en IS NULL)
+    ON CONFLICT(usuario_id, fecha) DO UPDATE SET
+        estado = excluded.estado, eliminado_en = NULL, actualizado_en = excluded.actualizado_en
+'''
+
 def marcar_asistencia(usuario_id, fecha, estado):
+    marcado_en = almacenamiento.ahora_preciso()
+    try:
+        with conectar() as conn:
+            cursor = conn.cursor()
+            cursor.execute(SQL_UPSERT_ASISTENCIA, (usuario_id, fecha, estado, marcado_en))
+            conn.commit()
+            if cursor.rowcount == 0:
+                print(f"No hay una persona vigente con ID {usuario_id}: no se guardó la asistencia.")
+    except sqlite3.OperationalError:
+        # Sin acceso a la base compartida: la marca queda en el diario local hasta la sincronización
+        logger.warning("Sin acceso a %s: la asistencia de %s en %s va al diario local", DB_NAME, usuario_id, fecha,
+                       exc_info=True)
+        diario_local.guardar_marcas(fecha, [(usuario_id, estado)], marcado_en)
+        print("Sin acceso a la base: la asistencia quedó en el diario local y se enviará al sincronizar.")
+    except Exception:
+        logger.exception("Error al guardar la asistencia de %s en %s", usuario_id, fecha)
+
+def eliminar_asistencia(usuario_id, fecha):
+    """Da de baja (sin borrarla) la asistencia de una persona en una fecha. Devuelve True si existía."""
     with conectar() as conn:
+        cursor = conn.execute(
+            "UPDATE asistencia SET eliminado_en = ?, actualizado_en = ? "
+            "WHERE usuario_id = ? AND fecha = ? AND eliminado_en IS NULL",
+            (almacenamiento.ahora(), almacenamiento.ahora_preciso(), usuario_id, fecha),
+        )
+        conn.commit()
+        return cursor.rowcount > 0
+
+# --- Registrar o actualizar la asistencia de muchos usuarios a la vez ---
+TAMANO_LOTE = 500  # También respeta el límite de parámetros de SQLite en el IN (...)
+
+def marcar_asistencia_lote(fecha, marcas, tamano_lote=TAMANO_LOTE):
+    """
+    Registra la asistencia de varios usuarios para una fecha en una sola transacción.
+    `marcas` es una lista (o iterable) de tuplas (usuario_id, estado).
+    Devuelve un diccionario con la cantidad de registros insertados y actualizados, y la
+    lista de IDs rechazados por no corresponder a ninguna persona vigente (inexistente o dada de baja).
+    """
+    resultado = {"insertados": 0, "actualizados": 0, "rechazados": []}
+    marcas = list(marcas)
+    if not marcas:
+        return resultado
+    marcado_en = almacenamiento.ahora_preciso()
+
+    conn = conectar()
+    try:
         cursor = conn.cursor()
-        try:
-            cursor.execute('''
-                INSERT INTO asistencia (usuario_id, fecha, estado)
-                VALUES (?, ?, ?)
-                ON CONFLICT(usuario_id, fecha) DO UPDATE SET estado = excluded.estado
-            ''', (usuario_id, fecha, estado))
-            conn.commit()
-        except Exception as e:
-            print(f"Error al guardar la asistencia: {e}")
+        cursor.execute("BEGIN IMMEDIATE")
+        for inicio in range(0, len(marcas), tamano_lote):
+            lote = dict(marcas[inicio:inicio + tamano_lote])  # Si un usuario se repite, gana la última marca
+            ids = list(lote)
+            marcadores = ", ".join("?" * len(ids))
+            cursor.execute(
+                f"SELECT usuario_id FROM asistencia WHERE fecha = ? AND usuario_id IN ({marcadores})",
+                [fecha, *ids],
+            )
+            existentes = {fila[0] for fila in cursor.fetchall()}
+            # Los IDs inexistentes o dados de baja se informan aparte en lugar de perderse en silencio
+            cursor.execute(f"SELECT id FROM individuos WHERE id IN ({marcadores}) AND eliminado_en IS NULL", ids)
+            registrados = {fila[0] for fila in cursor.fetchall()}
+            rechazados = [usuario_id for usuario_id in ids if usuario_id not in registrados]
+            existentes &= registrados  # Una persona dada de baja puede tener fila ese día: es rechazada, no actualizada
+            cursor.executemany(
+                SQL_UPSERT_ASISTENCIA,
+                ((usuario_id, fecha, estado, marcado_en) for usuario_id, estado in lote.items() if usuario_id in registrados),
+            )
+            resultado["rechazados"].extend(rechazados)
+            resultado["actualizados"] += len(existentes)
+            resultado["insertados"] += len(ids) - len(existentes) - len(rechazados)
+        conn.commit()
+        return resultado
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
 
 # --- Interfaz simple de consola ---
+def elegir_grupo():
+    """Pregunta el grupo de la clase si hay grupos creados. None: todas las personas activas."""
+    grupos = grupos_asistencia.listar_grupos(DB_NAME)
+    if not grupos:
+        return None
+    print("\nGrupos:")
+    for grupo_id, nombre, integrantes in grupos:
+        print(f"  {grupo_id}. {nombre} ({integrantes} integrantes)")
+    while True:
+        opcion = input("Número de grupo [Por defecto: todas las personas activas]: ").strip()
+        if not opcion:
+            return None
+        if opcion.isdigit() and any(grupo_id == int(opcion) for grupo_id, _, _ in grupos):
+            return int(opcion)
+        print("Grupo no válido. Intente de nuevo.")
+
 def registrar_asistencia():
     crear_tablas()
-    usuarios = obtener_usuarios_activos()
-    if not usuarios:
-        print("No hay usuarios activos registrados.")
-        return
-
     fecha = input(f"Ingrese la fecha (YYYY-MM-DD) [Por defecto: hoy {datetime.today().date()}]: ").strip()
     if not fecha:
         fecha = str(datetime.today().date())
 
+    # Planilla del grupo junto con lo que ya se marcó ese día (una sola lectura por índices)
+    clase = grupos_asistencia.abrir_clase(elegir_grupo(), fecha, DB_NAME)
+    if not clase:
+        print("No hay usuarios activos registrados.")
+        return
+
     print("\nOpciones de asistencia: [P]resente | [A]usente | [T]arde | [J]ustificado")
-    for usuario in usuarios:
-        usuario_id, nombre = usuario
-        estado = input(f"{nombre}: ").strip().upper()
-        estados_validos = {'P': 'Presente', 'A': 'Ausente', 'T': 'Tarde', 'J': 'Justificado'}
+    if any(actual for _, _, actual in clase):
+        print("Entre corchetes, la marca ya guardada para ese día: Enter la conserva.")
+    marcas = []
+    for usuario_id, nombre, actual in clase:
+        estado = input(f"{nombre}{f' [{actual}]' if actual else ''}: ").strip().upper()
+        if not estado and actual:
+            continue  # Sin cambios: no se vuelve a escribir
 
-        if estado not in estados_validos:
+        if estado not in ESTADOS_VALIDOS:
             print("Estado no válido. Se marcará como 'Ausente' por defecto.")
             estado = 'A'
 
-        marcar_asistencia(usuario_id, fecha, estados_validos[estado])
+        if ESTADOS_VALIDOS[estado] != actual:
+            marcas.append((usuario_id, ESTADOS_VALIDOS[estado]))
+
+    if not marcas:
+        print("\nNo hubo cambios en la asistencia.")
+        return
+
+    # Se guarda todo junto al final: una sola transacción para toda la lista
+    try:
+        resultado = marcar_asistencia_lote(fecha, marcas)
+    except sqlite3.OperationalError as e:
+        logger.warning("Sin acceso a %s: %d marcas del %s van al diario local", DB_NAME, len(marcas), fecha, exc_info=True)
+        diario_local.guardar_marcas(fecha, marcas)
+        print(f"\n⚠️ Sin acceso a la base ({e}): las {len(marcas)} marcas quedaron en el diario local "
+              "y se enviarán al sincronizar (python main.py sincronizar).")
+        return
+    except Exception as e:
+        print(f"Error al guardar la asistencia: {e}")
+        return
 
-    print("\n✅ Asistencia registrada con éxito.")
+    print(f"\n✅ Asistencia registrada con éxito ({resultado['insertados']} nuevas, {resultado['actualizados']} actualizadas).")
 
 # --- Ejecutar el flujo principal ---
 if __name__ == "__main__":
@@ -0,0 +1,177 @@
+import particiones_asistencia
+from registroasistencia import conectar, crear_tablas
+
+# --- Columnas agregadas comunes a todos los reportes ---
+# Los conteos y porcentajes se calculan en SQL (GROUP BY), nunca trayendo filas sueltas a Python.
+# Cada fuente (la tabla `asistencia` y cada año archivado) se cuenta por separado con CONTEOS;
+# COLUMNAS_RESUMEN suma esos conteos y calcula los porcentajes.
+CONTEOS = '''
+    COUNT(*) AS total,
+    SUM(a.estado = 'Presente') AS presentes,
+    SUM(a.estado = 'Ausente') AS ausentes,
+    SUM(a.estado = 'Tarde') AS tardes,
+    SUM(a.estado = 'Justificado') AS justificados
+'''
+COLUMNAS_RESUMEN = '''
+    SUM(total) AS total,
+    SUM(presentes) AS presentes,
+    SUM(ausentes) AS ausentes,
+    SUM(tardes) AS tardes,
+    SUM(justificados) AS justificados,
+    ROUND(100.0 * SUM(presentes) / SUM(total), 2) AS tasa_presente,
+    ROUND(100.0 * SUM(ausentes) / SUM(total), 2) AS tasa_ausente,
+    ROUND(100.0 * SUM(tardes) / SUM(total), 2) AS tasa_tarde,
+    ROUND(100.0 * SUM(justificados) / SUM(total), 2) AS tasa_justificado
+'''
+
+def _filtro_fechas(desde=None, hasta=None):
+    """Arma la condición WHERE para un rango de fechas (YYYY-MM-DD, ambos extremos incluidos)."""
+    # Las asistencias dadas de baja no cuentan (y así se usan los índices parciales)
+    condiciones = ["a.eliminado_en IS NULL"]
+    params = []
+    if desde:
+        condiciones.append("a.fecha >= ?")
+        params.append(desde)
+    if hasta:
+        condiciones.append("a.fecha <= ?")
+        params.append(hasta)
+    return condiciones, params
+
+def _consultar(select, condiciones, params, group_by, desde=None, hasta=None, select_total=None):
+    """
+    Ejecuta un reporte agregado y devuelve una lista de diccionarios. Si [desde, hasta] toca años
+    archivados, también los lee (particiones_asistencia.fuentes). `select_total` combina las
+    columnas de `select` de todas las fuentes; por defecto, la columna del GROUP BY.
+    """
+    clave = group_by.split(".")[-1] if group_by else None
+    conn = conectar()
+    try:
+        partes = []
+        for fuente in particiones_asistencia.fuentes(conn, desde, hasta):
+            parte = f"SELECT {select}, {CONTEOS} FROM {fuente} a"
+            if "u." in select:
+                parte += " JOIN individuos u ON u.id = a.usuario_id"
+            if condiciones:
+                parte += " WHERE " + " AND ".join(condiciones)
+            if group_by:
+                parte += f" GROUP BY {group_by}"
+            partes.append(parte)
+        query = f"SELECT {select_total or clave}, {COLUMNAS_RESUMEN} FROM ({' UNION ALL '.join(partes)})"
+        if group_by:
+            query += f" GROUP BY {clave} ORDER BY {clave}"
+        cursor = conn.execute(query, params * len(partes))
+        columnas = [c[0] for c in cursor.description]
+        return [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+    finally:
+        conn.close()
+
+# --- Reportes ---
+def resumen_por_persona(desde=None, hasta=None, usuario_id=None):
+    """Presentes, ausentes, tardes y justificados (cantidades y %) de cada persona."""
+    condiciones, params = _filtro_fechas(desde, hasta)
+    if usuario_id is not None:
+        condiciones.insert(0, "a.usuario_id = ?")
+        params.insert(0, usuario_id)
+    return _consultar("a.usuario_id", condiciones, params, "a.usuario_id", desde, hasta)
+
+def resumen_por_rol(desde=None, hasta=None):
+    """Resumen de asistencia agrupado por rol (Alumno, Profesor, Administrador)."""
+    condiciones, params = _filtro_fechas(desde, hasta)
+    return _consultar("u.rol", condiciones, params, "u.rol", desde, hasta)
+
+def resumen_por_fecha(desde=None, hasta=None):
+    """Resumen de asistencia de cada jornada del rango."""
+    condiciones, params = _filtro_fechas(desde, hasta)
+    return _consultar("a.fecha", condiciones, params, "a.fecha", desde, hasta)
+
+def resumen_general(desde=None, hasta=None):
+    """Resumen de asistencia de todo el rango en una sola fila."""
+    condiciones, params = _filtro_fechas(desde, hasta)
+    return _consultar("MIN(a.fecha) AS desde, MAX(a.fecha) AS hasta", condiciones, params, None, desde, hasta,
+                      select_total="MIN(desde) AS desde, MAX(hasta) AS hasta")[0]
+
+# --- Reportes para tableros, leídos de las tablas de resumen (rollups_asistencia) ---
+def _consultar_rollup(tabla, claves, filtros):
+    """Lee una tabla de resumen y agrega los porcentajes; `filtros` es una lista de (condición, valor)."""
+    query = f"SELECT * FROM {tabla}"
+    filtros = [(condicion, valor) for condicion, valor in filtros if valor is not None]
+    if filtros:
+        query += " WHERE " + " AND ".join(condicion for condicion, _ in filtros)
+    query += f" ORDER BY {claves}"
+
+    conn = conectar()
+    try:
+        cursor = conn.execute(query, [valor for _, valor in filtros])
+        columnas = [c[0] for c in cursor.description]
+        filas = [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+    finally:
+        conn.close()
+    for fila in filas:
+        for conteo, tasa in (("presentes", "tasa_presente"), ("ausentes", "tasa_ausente"),
+                             ("tardes", "tasa_tarde"), ("justificados", "tasa_justificado")):
+            fila[tasa] = round(100.0 * fila[conteo] / fila["total"], 2) if fila["total"] else None
+    return filas
+
+def resumen_diario_por_rol(desde=None, hasta=None, rol=None):
+    """Resumen por jornada y rol, leído de `asistencia_diaria_rol`."""
+    return _consultar_rollup("asistencia_diaria_rol", "fecha, rol",
+                             [("fecha >= ?", desde), ("fecha <= ?", hasta), ("rol = ?", rol)])
+
+def resumen_mensual_por_rol(desde_mes=None, hasta_mes=None, rol=None):
+    """Resumen por mes (YYYY-MM) y rol, leído de `asistencia_mensual_rol`."""
+    return _consultar_rollup("asistencia_mensual_rol", "mes, rol",
+                             [("mes >= ?", desde_mes), ("mes <= ?", hasta_mes), ("rol = ?", rol)])
+
+def resumen_mensual_por_persona(desde_mes=None, hasta_mes=None, usuario_id=None):
+    """Resumen por mes (YYYY-MM) y persona, leído de `asistencia_mensual_usuario`."""
+    return _consultar_rollup("asistencia_mensual_usuario", "usuario_id, mes",
+                             [("usuario_id = ?", usuario_id), ("mes >= ?", desde_mes), ("mes <= ?", hasta_mes)])
+
+# --- Interfaz simple de consola ---
+def _imprimir(filas, clave, titulo):
+    if not filas:
+        print("No hay registros de asistencia para ese rango.")
+        return
+    print(f"\n{titulo:<15} {'Total':>6} {'P':>6} {'A':>6} {'T':>6} {'J':>6} {'% Pres.':>8}")
+    for fila in filas:
+        print(f"{str(fila[clave]):<15} {fila['total']:>6} {fila['presentes']:>6} {fila['ausentes']:>6} "
+              f"{fila['tardes']:>6} {fila['justificados']:>6} {fila['tasa_presente']:>8}")
+
+def consultar_asistencia():
+    crear_tablas()
+    print("\n--- Consultar Asistencia ---")
+    print("1. Por persona")
+    print("2. Por rol")
+    print("3. Por fecha")
+    print("4. Patrones de inasistencia (ausentismo crónico, rachas, tardanzas)")
+    opcion = input("Seleccione una opción: ").strip()
+
+    desde = input("Desde (YYYY-MM-DD, opcional): ").strip() or None
+    hasta = input("Hasta (YYYY-MM-DD, opcional): ").strip() or None
+
+    if opcion == "1":
+        usuario_id = input("ID de la persona (vacío para todas): ").strip()
+        if usuario_id and not usuario_id.isdigit():
+            print("ID inválido. Debe ser un número.")
+            return
+        filas = resumen_por_persona(desde, hasta, int(usuario_id) if usuario_id else None)
+        _imprimir(filas, "usuario_id", "Persona (ID)")
+    elif opcion == "2":
+        _imprimir(resumen_por_rol(desde, hasta), "rol", "Rol")
+    elif opcion == "3":
+        _imprimir(resumen_por_fecha(desde, hasta), "fecha", "Fecha")
+    elif opcion == "4":
+        try:
+            import analitica_asistencia  # Necesita NumPy: solo se importa si se usa
+        except ImportError:
+            print("Esta opción necesita NumPy (pip install numpy).")
+            return
+        import registroasistencia
+        analitica_asistencia.imprimir_patrones(
+            analitica_asistencia.patrones(desde, hasta, db_name=registroasistencia.DB_NAME)
+        )
+    else:
+        print("Opción inválida.")
+
+if __name__ == "__main__":
+    consultar_asistencia()
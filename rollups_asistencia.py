@@ -0,0 +1,200 @@
+import argparse
+import sys
+
+import almacenamiento
+
+# --- Tablas de resumen (rollups) de asistencia ---
+# Se mantienen al día con triggers sobre `asistencia`, así los tableros leen unas pocas
+# filas ya sumadas en lugar de recorrer todos los registros diarios.
+# Las asistencias dadas de baja (eliminado_en no nulo) no se cuentan.
+# Los años archivados (particiones_asistencia.py) ya no están en `asistencia`: sus resúmenes se
+# conservan tal cual y reconstruir/verificar no los tocan.
+# Nota: el rol se toma al momento de marcar; si se cambia el rol de un usuario,
+# `python main.py rollups reconstruir` recalcula los resúmenes con el rol actual.
+
+ESTADOS = {
+    "presentes": "Presente",
+    "ausentes": "Ausente",
+    "tardes": "Tarde",
+    "justificados": "Justificado",
+}
+
+# Para cada tabla: columna clave -> (expresión dentro del trigger, expresión al reconstruir)
+ROL_TRIGGER = "COALESCE((SELECT rol FROM individuos WHERE id = {f}.usuario_id), 'Sin rol')"
+ROL_RECONSTRUIR = "COALESCE(u.rol, 'Sin rol')"
+MES = "substr({f}.fecha, 1, 7)"
+
+ROLLUPS = {
+    "asistencia_diaria_rol": {
+        "fecha": ("{f}.fecha", "a.fecha"),
+        "rol": (ROL_TRIGGER, ROL_RECONSTRUIR),
+    },
+    "asistencia_mensual_usuario": {
+        "usuario_id": ("{f}.usuario_id", "a.usuario_id"),
+        "mes": (MES, MES.format(f="a")),
+    },
+    "asistencia_mensual_rol": {
+        "mes": (MES, MES.format(f="a")),
+        "rol": (ROL_TRIGGER, ROL_RECONSTRUIR),
+    },
+}
+
+def _sumar(tabla, claves, fila, signo):
+    """Sentencias de trigger que suman (+) o restan (-) la fila NEW/OLD en una tabla de resumen."""
+    valores = {col: expr.format(f=fila) for col, (expr, _) in claves.items()}
+    where = " AND ".join(f"{col} = {valor}" for col, valor in valores.items())
+    sets = ", ".join(
+        [f"total = total {signo} 1"]
+        + [f"{col} = {col} {signo} ({fila}.estado = '{estado}')" for col, estado in ESTADOS.items()]
+    )
+    sentencias = []
+    if signo == "+":
+        # No se usa INSERT OR IGNORE: dentro de un trigger, el ON CONFLICT del upsert que lo
+        # disparó tiene prioridad sobre el del trigger
+        sentencias.append(
+            f"INSERT INTO {tabla} ({', '.join(valores)}) SELECT {', '.join(valores.values())} "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {tabla} WHERE {where});"
+        )
+    sentencias.append(f"UPDATE {tabla} SET {sets} WHERE {where};")
+    if signo == "-":
+        sentencias.append(f"DELETE FROM {tabla} WHERE {where} AND total = 0;")
+    return "\n".join(sentencias)
+
+def _hay_archivos(cursor):
+    return cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'asistencia_archivos'").fetchone() is not None
+
+def _vigentes(cursor, claves):
+    """Condición sobre una tabla de resumen que deja afuera las filas de los años archivados."""
+    if not _hay_archivos(cursor):
+        return "true"
+    columna = "fecha" if "fecha" in claves else "mes"
+    return f"substr({columna}, 1, 4) NOT IN (SELECT anio FROM asistencia_archivos WHERE estado = 'archivado')"
+
+def crear_rollups(cursor):
+    """
+    Crea las tablas de resumen y los triggers que las mantienen (si no existen), tal como son hoy.
+    Las bases del sistema los reciben de las migraciones de almacenamiento.py, que guardan su propia copia.
+    """
+    existian = cursor.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN (%s)" % ", ".join("?" * len(ROLLUPS)),
+        list(ROLLUPS),
+    ).fetchone()[0] == len(ROLLUPS)
+    for tabla, claves in ROLLUPS.items():
+        columnas_claves = ", ".join(f"{col} {'INTEGER' if col == 'usuario_id' else 'TEXT'} NOT NULL" for col in claves)
+        columnas_conteo = ", ".join(f"{col} INTEGER NOT NULL DEFAULT 0" for col in ["total", *ESTADOS])
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {tabla} (
+                {columnas_claves},
+                {columnas_conteo},
+                PRIMARY KEY ({", ".join(claves)})
+            ) WITHOUT ROWID
+        ''')
+
+    sumar_nueva = "\n".join(_sumar(t, c, "NEW", "+") for t, c in ROLLUPS.items())
+    restar_vieja = "\n".join(_sumar(t, c, "OLD", "-") for t, c in ROLLUPS.items())
+    cambio = "OLD.estado IS NOT NEW.estado OR OLD.fecha IS NOT NEW.fecha OR OLD.usuario_id IS NOT NEW.usuario_id"
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS asistencia_rollup_ai AFTER INSERT ON asistencia
+        WHEN NEW.eliminado_en IS NULL BEGIN
+            {sumar_nueva}
+        END
+    ''')
+    # Cubre también el camino ON CONFLICT ... DO UPDATE de marcar_asistencia (se resta el estado
+    # viejo y se suma el nuevo) y las bajas y restauraciones (solo se resta o solo se suma)
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS asistencia_rollup_au_resta AFTER UPDATE OF usuario_id, fecha, estado, eliminado_en ON asistencia
+        WHEN OLD.eliminado_en IS NULL AND ({cambio} OR NEW.eliminado_en IS NOT NULL)
+        BEGIN
+            {restar_vieja}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS asistencia_rollup_au_suma AFTER UPDATE OF usuario_id, fecha, estado, eliminado_en ON asistencia
+        WHEN NEW.eliminado_en IS NULL AND ({cambio} OR OLD.eliminado_en IS NOT NULL)
+        BEGIN
+            {sumar_nueva}
+        END
+    ''')
+    # Lo que se borra al archivar un año (particiones_asistencia.py) sigue contando en los resúmenes
+    archivado = ""
+    if _hay_archivos(cursor):
+        archivado = " AND NOT EXISTS (SELECT 1 FROM asistencia_archivos WHERE anio = substr(OLD.fecha, 1, 4))"
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS asistencia_rollup_ad AFTER DELETE ON asistencia
+        WHEN OLD.eliminado_en IS NULL{archivado} BEGIN
+            {restar_vieja}
+        END
+    ''')
+    if not existian:
+        # Bases que ya tenían asistencias antes de los resúmenes: se cargan una sola vez
+        _poblar(cursor)
+
+def _consulta_esperada(claves):
+    """SELECT que calcula una tabla de resumen directamente desde la tabla `asistencia` (sin las bajas)."""
+    columnas = [f"{expr} AS {col}" for col, (_, expr) in claves.items()]
+    conteos = ["COUNT(*) AS total"] + [f"SUM(a.estado = '{estado}') AS {col}" for col, estado in ESTADOS.items()]
+    return (
+        f"SELECT {', '.join(columnas + conteos)} FROM asistencia a "
+        f"LEFT JOIN individuos u ON u.id = a.usuario_id "
+        f"WHERE a.eliminado_en IS NULL "
+        f"GROUP BY {', '.join(claves)}"
+    )
+
+def _poblar(cursor):
+    """Vacía las tablas de resumen y las vuelve a calcular desde `asistencia`."""
+    for tabla, claves in ROLLUPS.items():
+        cursor.execute(f"DELETE FROM {tabla} WHERE {_vigentes(cursor, claves)}")
+        cursor.execute(
+            f"INSERT INTO {tabla} ({', '.join([*claves, 'total', *ESTADOS])}) {_consulta_esperada(claves)}"
+        )
+
+def reconstruir_rollups(conn):
+    """Recalcula todas las tablas de resumen desde cero en una sola transacción."""
+    with conn:
+        _poblar(conn.cursor())
+
+def verificar_rollups(conn):
+    """
+    Compara las tablas de resumen con la tabla `asistencia`.
+    Devuelve un diccionario {tabla: cantidad de filas que no coinciden}; vacío si todo está bien.
+    """
+    diferencias = {}
+    for tabla, claves in ROLLUPS.items():
+        columnas = ", ".join([*claves, "total", *ESTADOS])
+        esperada = _consulta_esperada(claves)
+        faltan = conn.execute(
+            f"SELECT COUNT(*) FROM ({esperada} EXCEPT SELECT {columnas} FROM {tabla} WHERE {_vigentes(conn, claves)})"
+        ).fetchone()[0]
+        sobran = conn.execute(
+            f"SELECT COUNT(*) FROM (SELECT {columnas} FROM {tabla} WHERE {_vigentes(conn, claves)} EXCEPT {esperada})"
+        ).fetchone()[0]
+        if faltan or sobran:
+            diferencias[tabla] = faltan + sobran
+    return diferencias
+
+# --- Uso desde la consola ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verifica o reconstruye los resúmenes (rollups) de asistencia.")
+    parser.add_argument("accion", nargs="?", default="verificar", choices=["verificar", "reconstruir"])
+    parser.add_argument("--db", default=almacenamiento.DB_NAME)
+    args = parser.parse_args(argv)
+    almacenamiento.asegurar_esquema(args.db)
+    conn = almacenamiento.conectar(args.db)
+    try:
+        if args.accion == "reconstruir":
+            reconstruir_rollups(conn)
+            print("✅ Resúmenes de asistencia reconstruidos.")
+            return 0
+        diferencias = verificar_rollups(conn)
+        if not diferencias:
+            print("✅ Los resúmenes coinciden con la tabla de asistencia.")
+            return 0
+        for tabla, cantidad in diferencias.items():
+            print(f"❌ {tabla}: {cantidad} filas no coinciden.")
+        print("Ejecute 'python main.py rollups reconstruir' para corregirlos.")
+        return 1
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+import argparse
+import multiprocessing
+import os
+
+import instrumentacion
+from altadeusuario import create_app, init_db
+
+# --- Servidor de producción para el servicio de usuarios ---
+# Uso:
+#     python servidor_usuarios.py --workers 4 --threads 8
+# o directamente con gunicorn:
+#     gunicorn -w 4 --threads 8 -b 0.0.0.0:8000 servidor_usuarios:app
+#
+# Se usa gunicorn (varios procesos x varios hilos) si está instalado; si no, waitress
+# (un proceso con varios hilos, funciona también en Windows).
+
+app = create_app()
+
+def _workers_por_defecto():
+    return int(os.environ.get('USUARIOS_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+
+def servir_con_gunicorn(host, port, workers, threads):
+    from gunicorn.app.base import BaseApplication
+
+    class _Aplicacion(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f'{host}:{port}')
+            self.cfg.set('workers', workers)
+            self.cfg.set('threads', threads)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('accesslog', '-')
+
+        def load(self):
+            return app
+
+    _Aplicacion().run()
+
+def servir_con_waitress(host, port, threads):
+    from waitress import serve
+
+    serve(app, host=host, port=port, threads=threads)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor WSGI de producción para el alta de usuarios.")
+    parser.add_argument('--host', default=os.environ.get('USUARIOS_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('USUARIOS_PORT', 8000)))
+    parser.add_argument('--workers', type=int, default=_workers_por_defecto(), help="Procesos (solo gunicorn).")
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('USUARIOS_THREADS', 8)), help="Hilos por proceso.")
+    args = parser.parse_args(argv)
+    instrumentacion.configurar_logs()  # Logs estructurados (JSON) en stderr
+
+    # Las tablas se crean una sola vez, antes de levantar los workers
+    init_db(app)
+
+    try:
+        servir_con_gunicorn(args.host, args.port, args.workers, args.threads)
+        return
+    except ImportError:
+        pass
+    try:
+        servir_con_waitress(args.host, args.port, args.threads)
+    except ImportError:
+        raise SystemExit("Instale gunicorn o waitress para el modo producción: pip install gunicorn")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+
+# Los módulos del sistema están en la raíz del repositorio, no en un paquete
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import almacenamiento
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Ruta de una base nueva con el esquema al día."""
+    ruta = str(tmp_path / "registro_asistencia.db")
+    almacenamiento.inicializar(ruta)
+    return ruta
+
+
+def cargar_personas(db, cantidad, estado="Activo"):
+    """Da de alta `cantidad` personas y devuelve sus IDs."""
+    conn = almacenamiento.conectar(db)
+    try:
+        ids = [
+            conn.execute(
+                "INSERT INTO individuos (nombre, apellido, dni, rol, estado) VALUES (?, ?, ?, 'Alumno', ?)",
+                (f"Nombre{i}", f"Apellido{i}", f"{30000000 + i}", estado),
+            ).lastrowid
+            for i in range(cantidad)
+        ]
+        conn.commit()
+        return ids
+    finally:
+        conn.close()
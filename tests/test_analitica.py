@@ -0,0 +1,59 @@
+import pytest
+
+import registroasistencia
+
+from conftest import cargar_personas
+
+np = pytest.importorskip("numpy")
+import analitica_asistencia as analitica
+from analitica_asistencia import AUSENTE as A, JUSTIFICADO as J, PRESENTE as P, SIN_REGISTRO as S, TARDE as T
+
+
+def _matriz():
+    codigos = np.array([
+        [P, P, P, P, P, P],
+        [A, A, P, A, A, A],
+        [A, J, A, A, S, P],  # La justificada y el día sin registro cortan la racha
+        [T, P, A, T, P, T],
+    ], dtype=np.int8)
+    fechas = [f"2025-03-0{dia}" for dia in range(3, 9)]
+    return analitica.MatrizAsistencia(np.array([1, 2, 3, 4]), np.array(["Alumno"] * 4, dtype=object), fechas, codigos)
+
+
+def test_rachas_y_tasas_de_una_matriz_calculada_a_mano():
+    matriz = _matriz()
+
+    mas_larga, actual = analitica.rachas_de_ausencia(matriz)
+    assert mas_larga.tolist() == [0, 3, 2, 1]
+    assert actual.tolist() == [0, 3, 0, 0]
+    np.testing.assert_allclose(analitica.tasa_asistencia(matriz), [1, 1 / 6, 1 / 4, 5 / 6])
+
+    movil = analitica.tasa_movil(matriz, ventana=2)
+    np.testing.assert_allclose(movil[1], [0, 0, 0.5, 0.5, 0, 0])
+    np.testing.assert_allclose(movil[2], [0, 0, 0, 0, 0, 1])
+
+
+def test_ausentismo_cronico_con_umbral_y_minimo_de_jornadas():
+    matriz = _matriz()
+
+    ids, tasas = analitica.ausentismo_cronico(matriz, umbral=0.9, minimo_jornadas=4)
+    assert ids.tolist() == [2, 3, 4]
+    np.testing.assert_allclose(tasas, [1 / 6, 1 / 4, 5 / 6])
+    # La persona 3 tiene solo 4 jornadas computables (sin la justificada ni la que no tiene registro)
+    assert analitica.ausentismo_cronico(matriz, umbral=0.9, minimo_jornadas=5)[0].tolist() == [2, 4]
+    assert analitica.ausentismo_cronico(matriz, umbral=0.5, minimo_jornadas=4)[0].tolist() == [2, 3]
+
+
+def test_cargar_matriz_desde_la_base(db, monkeypatch):
+    monkeypatch.setattr(registroasistencia, "DB_NAME", db)
+    a, b, c = cargar_personas(db, 3)
+    registroasistencia.marcar_asistencia_lote("2025-03-03", [(a, "Presente"), (b, "Ausente"), (c, "Tarde")])
+    registroasistencia.marcar_asistencia_lote("2025-03-05", [(a, "Justificado"), (c, "Ausente")])
+    registroasistencia.eliminar_asistencia(c, "2025-03-05")
+
+    matriz = analitica.cargar_matriz(db_name=db)
+
+    assert matriz.usuarios.tolist() == [a, b, c]
+    assert matriz.fechas == ["2025-03-03", "2025-03-05"]
+    assert matriz.codigos.tolist() == [[P, J], [A, S], [T, S]]
+    assert analitica.cargar_matriz(desde="2025-03-04", db_name=db).codigos.tolist() == [[J], [S], [S]]
@@ -0,0 +1,20 @@
+import almacenamiento
+import registroasistencia
+
+from conftest import cargar_personas
+
+
+def test_lote_cuenta_insertadas_actualizadas_y_rechazadas(db, monkeypatch):
+    monkeypatch.setattr(registroasistencia, "DB_NAME", db)
+    baja, nueva, existente = cargar_personas(db, 3)
+    fecha = "2025-03-03"
+    registroasistencia.marcar_asistencia_lote(fecha, [(baja, "Presente"), (existente, "Presente")])
+    conn = almacenamiento.conectar(db)
+    conn.execute("UPDATE individuos SET eliminado_en = ? WHERE id = ?", (almacenamiento.ahora(), baja))
+    conn.commit()
+    conn.close()
+
+    resultado = registroasistencia.marcar_asistencia_lote(
+        fecha, [(baja, "Tarde"), (nueva, "Ausente"), (existente, "Tarde"), (999, "Presente")]
+    )
+    assert resultado == {"insertados": 1, "actualizados": 1, "rechazados": [baja, 999]}
@@ -0,0 +1,92 @@
+import asyncio
+import errno
+import sqlite3
+import time
+
+import pytest
+
+import almacenamiento
+import checkin_async
+import diario_local
+import registroasistencia
+
+from conftest import cargar_personas
+
+
+def _sin_base(fecha, marcas):
+    raise sqlite3.OperationalError("unable to open database file")
+
+
+def _disco_lleno(fecha, marcas, marcado_en=None):
+    raise OSError(errno.ENOSPC, "No space left on device")
+
+
+def _guardar(fecha, marcas):
+    return {"insertados": len(marcas), "actualizados": 0, "rechazados": []}
+
+
+def test_el_escritor_sobrevive_si_falla_el_diario(monkeypatch):
+    async def probar():
+        escritor = checkin_async.EscritorAsistencia(max_espera=0.01)
+        escritor.iniciar()
+        monkeypatch.setattr(checkin_async, "marcar_asistencia_lote", _sin_base)
+        monkeypatch.setattr(diario_local, "guardar_marcas", _disco_lleno)
+        with pytest.raises(OSError):
+            await asyncio.wait_for(escritor.marcar(1, "2025-03-03", "Presente"), 2)
+
+        # La tarea sigue viva: la próxima marca se guarda y detener() no espera de más
+        monkeypatch.setattr(checkin_async, "marcar_asistencia_lote", _guardar)
+        acuse = await asyncio.wait_for(escritor.marcar(2, "2025-03-03", "Presente"), 2)
+        assert acuse["guardado"] and not acuse["pendiente"]
+        inicio = time.monotonic()
+        await escritor.detener()
+        assert time.monotonic() - inicio < 1
+
+    asyncio.run(probar())
+
+
+def test_el_escritor_sobrevive_a_un_error_inesperado(monkeypatch):
+    async def probar():
+        escritor = checkin_async.EscritorAsistencia(max_espera=0.01)
+        escritor.iniciar()
+        escribir_lote = escritor._escribir_lote
+
+        async def fallar_una_vez(lote):
+            monkeypatch.setattr(escritor, "_escribir_lote", escribir_lote)
+            raise RuntimeError("falla inesperada")
+        monkeypatch.setattr(escritor, "_escribir_lote", fallar_una_vez)
+        monkeypatch.setattr(checkin_async, "marcar_asistencia_lote", _guardar)
+
+        with pytest.raises(RuntimeError):
+            await asyncio.wait_for(escritor.marcar(1, "2025-03-03", "Presente"), 2)
+        acuse = await asyncio.wait_for(escritor.marcar(2, "2025-03-03", "Presente"), 2)
+        assert acuse["guardado"]
+        await asyncio.wait_for(escritor.cola.join(), 1)  # task_done() también para el lote fallido
+        await escritor.detener()
+
+    asyncio.run(probar())
+
+
+def test_marcas_repetidas_en_un_lote_informan_la_que_quedo(db, monkeypatch):
+    monkeypatch.setattr(registroasistencia, "DB_NAME", db)
+    usuario_id, otro = cargar_personas(db, 2)
+
+    async def probar():
+        escritor = checkin_async.EscritorAsistencia(max_espera=0.2)
+        escritor.iniciar()
+        acuses = await asyncio.wait_for(asyncio.gather(
+            escritor.marcar(usuario_id, "2025-03-03", "Presente"),
+            escritor.marcar(otro, "2025-03-03", "Presente"),
+            escritor.marcar(usuario_id, "2025-03-03", "Tarde"),
+        ), 2)
+        await escritor.detener()
+        return acuses
+
+    acuses = asyncio.run(probar())
+    assert [acuse["estado"] for acuse in acuses] == ["Tarde", "Presente", "Tarde"]
+    conn = almacenamiento.conectar(db)
+    try:
+        guardadas = conn.execute("SELECT usuario_id, estado FROM asistencia WHERE fecha = '2025-03-03' ORDER BY usuario_id").fetchall()
+    finally:
+        conn.close()
+    assert guardadas == [(usuario_id, "Tarde"), (otro, "Presente")]
@@ -0,0 +1,17 @@
+import logging
+import time
+
+import compactacion
+
+
+def test_los_errores_del_compactador_van_al_log_con_traza(tmp_path, caplog):
+    compactador = compactacion.Compactador(str(tmp_path / "no_existe" / "base.db"), intervalo=60)
+    with caplog.at_level(logging.ERROR, logger="compactacion"):
+        compactador.iniciar()
+        limite = time.monotonic() + 5
+        while not caplog.records and time.monotonic() < limite:
+            time.sleep(0.01)
+        compactador.detener()
+    registro = caplog.records[0]
+    assert registro.getMessage() == "Error en la compactación"
+    assert registro.exc_info is not None
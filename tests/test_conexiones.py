@@ -0,0 +1,26 @@
+import threading
+
+from conexiones import ConnectionPool
+
+
+def test_prestamo_anidado_vuelve_al_pool_al_terminar_el_ultimo(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), size=2)
+    try:
+        externo = pool.connection()
+        conn = externo.__enter__()
+        interno = pool.connection()
+        assert interno.__enter__() is conn
+
+        # Termina primero el préstamo externo (dos generadores intercalados en el mismo hilo)
+        externo.__exit__(None, None, None)
+        otros = []
+        hilo = threading.Thread(target=lambda: otros.append(pool.acquire()))
+        hilo.start()
+        hilo.join()
+        assert otros[0] is not conn  # Sigue prestada al préstamo interno
+        pool.release(otros[0])
+
+        interno.__exit__(None, None, None)
+        assert pool.acquire() is conn
+    finally:
+        pool.close()
@@ -0,0 +1,40 @@
+import almacenamiento
+import diario_local
+import registroasistencia
+
+from conftest import cargar_personas
+
+
+def _estados(db):
+    conn = almacenamiento.conectar(db)
+    try:
+        return dict(conn.execute("SELECT usuario_id, estado FROM asistencia WHERE fecha = '2025-03-03'"))
+    finally:
+        conn.close()
+
+
+def test_sincronizar_gana_la_escritura_mas_reciente(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(registroasistencia, "DB_NAME", db)
+    vieja, nueva, repetida = cargar_personas(db, 3)
+    fecha = "2025-03-03"
+    directorio = str(tmp_path / "diario")
+    diario = diario_local.DiarioLocal(directorio)
+
+    # Marca del kiosco sin conexión, anterior a la que después se hizo en la base
+    diario.marcar(vieja, fecha, "Ausente", "2025-03-03 08:00:00.000000")
+    registroasistencia.marcar_asistencia(vieja, fecha, "Presente")
+    # Marca de la base, anterior a la del kiosco
+    registroasistencia.marcar_asistencia(nueva, fecha, "Presente")
+    diario.marcar(nueva, fecha, "Tarde", almacenamiento.ahora_preciso())
+    # Dos marcas del kiosco para la misma persona: vale la última
+    diario.marcar(repetida, fecha, "Tarde", "2025-03-03 08:00:00.000000")
+    diario.marcar(repetida, fecha, "Justificado", "2025-03-03 08:05:00.000000")
+    diario.marcar(999, fecha, "Presente")
+    diario.cerrar()
+
+    resumen = diario_local.sincronizar(directorio, db)
+    assert _estados(db) == {vieja: "Presente", nueva: "Tarde", repetida: "Justificado"}
+    assert resumen["rechazadas"] == [999]
+    assert diario_local.segmentos_pendientes(directorio) == []
+    # Volver a sincronizar no aplica nada: los segmentos enviados se borran
+    assert diario_local.sincronizar(directorio, db)["marcas"] == 0
@@ -0,0 +1,60 @@
+import duplicados
+from benchmarks import datos
+
+
+def _indice(personas):
+    indice = duplicados.IndiceDuplicados()
+    for clave, (nombre, dni, fecha_nacimiento) in enumerate(personas):
+        indice.agregar(clave, nombre, dni, fecha_nacimiento)
+    return indice
+
+
+def _pares(indice):
+    return {frozenset(par[:2]): par[3] for par in indice.pares()}
+
+
+def test_pares_detectados():
+    indice = _indice([
+        ("Juan Perez", None, None),
+        ("Jaun Perez", None, None),                     # 1: letras invertidas
+        ("Lucía Gómez", None, None),
+        ("Lucia Gomes", None, None),                    # 3: suena igual
+        ("Marta Díaz", "25111222", None),
+        ("Marta Beatriz Díaz", "25111222", None),       # 5: mismo DNI
+        ("Pedro Ramírez", "30123456", "1990-05-01"),
+        ("Pedro Ramires Sosa", "30123465", "1990-05-01"),  # 7: DNI con dígitos invertidos y misma fecha
+    ])
+    pares = _pares(indice)
+
+    assert "nombre con letras invertidas" in pares[frozenset((0, 1))]
+    assert "nombre que suena igual" in pares[frozenset((2, 3))]
+    assert "mismo DNI" in pares[frozenset((4, 5))]
+    assert "DNI casi igual" in pares[frozenset((6, 7))]
+    assert {candidato["clave"] for candidato in indice.candidatos("Jaun Pérez")} == {0, 1}
+
+
+def test_pares_descartados():
+    indice = _indice([
+        ("Ana López", "20111111", "1980-01-01"),
+        ("Ana López", "40222222", "2001-07-15"),   # Homónima con otra fecha de nacimiento
+        ("Marcelo Gómez", None, None),
+        ("Marta Gómez", None, None),               # Mismas primeras letras, otro nombre
+        ("Carlos Fernández", None, None),
+        ("Julián Ortiz", None, None),
+    ])
+
+    assert _pares(indice) == {}
+
+
+def test_barrido_no_compara_contra_bloques_grandes():
+    indice = duplicados.IndiceDuplicados()
+    for clave, (nombre, apellido, dni, fecha_nacimiento, *_) in enumerate(datos.individuos(2000)):
+        indice.agregar(clave, f"{nombre} {apellido}", dni, fecha_nacimiento)
+    comparaciones = []
+    comparar = indice._comparar
+    indice._comparar = lambda a, b: comparaciones.append(1) or comparar(a, b)
+
+    indice.pares()
+
+    # Con nombres y DNI sintéticos muy repetidos, cada persona se compara con pocas otras
+    assert len(comparaciones) < 10 * len(indice)
@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+import almacenamiento
+import exportacion_asistencia
+import registroasistencia
+
+from conftest import cargar_personas
+
+pytest.importorskip("pyarrow")
+
+
+def _exportado(destino):
+    tabla = exportacion_asistencia.leer_exportacion(destino, columnas=["usuario_id", "fecha", "estado", "rol"])
+    return sorted((str(fila["fecha"]), fila["rol"], fila["usuario_id"], fila["estado"]) for fila in tabla.to_pylist())
+
+
+def test_exporta_por_particiones_y_luego_solo_las_jornadas_modificadas(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(registroasistencia, "DB_NAME", db)
+    a, b, c = cargar_personas(db, 3)
+    conn = almacenamiento.conectar(db)
+    conn.execute("UPDATE individuos SET rol = 'Profesor' WHERE id = ?", (c,))
+    conn.commit()
+    conn.close()
+    registroasistencia.marcar_asistencia_lote("2025-03-03", [(a, "Presente"), (b, "Ausente"), (c, "Presente")])
+    registroasistencia.marcar_asistencia_lote("2025-03-04", [(a, "Tarde")])
+    destino = str(tmp_path / "exportacion")
+
+    resumen = exportacion_asistencia.exportar(destino, db)
+    assert (resumen["jornadas"], resumen["filas"], resumen["archivos"]) == (2, 4, 3)
+    for fecha, rol in (("2025-03-03", "Alumno"), ("2025-03-03", "Profesor"), ("2025-03-04", "Alumno")):
+        assert os.path.exists(exportacion_asistencia.ruta_jornada(destino, fecha, rol, "parquet"))
+    assert _exportado(destino) == [
+        ("2025-03-03", "Alumno", a, "Presente"), ("2025-03-03", "Alumno", b, "Ausente"),
+        ("2025-03-03", "Profesor", c, "Presente"), ("2025-03-04", "Alumno", a, "Tarde"),
+    ]
+
+    # Sin cambios no se reescribe nada
+    assert exportacion_asistencia.exportar(destino, db)["jornadas"] == 0
+
+    # Solo se reescriben las jornadas tocadas; la que se quedó sin profesores pierde ese archivo
+    registroasistencia.marcar_asistencia(b, "2025-03-04", "Presente")
+    registroasistencia.eliminar_asistencia(c, "2025-03-03")
+    resumen = exportacion_asistencia.exportar(destino, db)
+    assert (resumen["jornadas"], resumen["filas"], resumen["archivos"]) == (2, 4, 2)
+    assert not os.path.exists(exportacion_asistencia.ruta_jornada(destino, "2025-03-03", "Profesor", "parquet"))
+    assert _exportado(destino) == [
+        ("2025-03-03", "Alumno", a, "Presente"), ("2025-03-03", "Alumno", b, "Ausente"),
+        ("2025-03-04", "Alumno", a, "Tarde"), ("2025-03-04", "Alumno", b, "Presente"),
+    ]
+
+    registroasistencia.marcar_asistencia(a, "2025-03-04", "Justificado")
+    resumen = exportacion_asistencia.exportar(destino, db)
+    assert (resumen["jornadas"], resumen["filas"]) == (1, 2)
+    assert exportacion_asistencia.exportar(destino, db, completo=True)["jornadas"] == 2
@@ -0,0 +1,109 @@
+import sqlite3
+
+import pytest
+
+import almacenamiento
+import grupos_asistencia
+import registroasistencia
+
+from conftest import cargar_personas
+
+
+def _ejecutar(db, sql, parametros=()):
+    conn = almacenamiento.conectar(db)
+    try:
+        conn.execute(sql, parametros)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _version_guardada(db, grupo_id):
+    conn = almacenamiento.conectar(db)
+    try:
+        return conn.execute("SELECT version FROM grupo_planillas WHERE grupo_id = ?", (grupo_id,)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_integrantes_agregados_quitados_y_movidos(db):
+    a, b, c = cargar_personas(db, 3)
+    tercero = grupos_asistencia.crear_grupo("3° A", db)
+    cuarto = grupos_asistencia.crear_grupo("4° A", db)
+
+    resultado = grupos_asistencia.agregar_miembros(tercero, [c, a, b, 9999, a], db)
+    assert resultado == {"agregados": 3, "rechazados": [9999]}
+    assert [fila[0] for fila in grupos_asistencia.planilla(tercero, db)] == [a, b, c]
+
+    assert grupos_asistencia.mover_miembro(b, tercero, cuarto, db)
+    assert not grupos_asistencia.mover_miembro(b, tercero, cuarto, db)
+    assert grupos_asistencia.quitar_miembros(tercero, [c, 9999], db) == 1
+    assert grupos_asistencia.planilla(tercero, db) == [(a, "Nombre0 Apellido0")]
+    assert grupos_asistencia.planilla(cuarto, db) == [(b, "Nombre1 Apellido1")]
+    assert grupos_asistencia.listar_grupos(db) == [(tercero, "3° A", 1), (cuarto, "4° A", 1)]
+
+    with pytest.raises(sqlite3.IntegrityError):
+        grupos_asistencia.crear_grupo("3° A", db)
+
+
+def test_la_planilla_se_rearma_solo_si_cambio_el_grupo(db):
+    a, b = cargar_personas(db, 2)
+    grupo = grupos_asistencia.crear_grupo("3° A", db)
+    grupos_asistencia.agregar_miembros(grupo, [a, b], db)
+    grupos_asistencia.planilla(grupo, db)
+    version = _version_guardada(db, grupo)
+
+    # Sin cambios, la planilla guardada sigue vigente
+    conn = almacenamiento.conectar(db)
+    try:
+        assert not grupos_asistencia._asegurar_planilla(conn, grupo)
+    finally:
+        conn.close()
+
+    _ejecutar(db, "UPDATE individuos SET nombre = 'Ana' WHERE id = ?", (a,))
+    assert grupos_asistencia.planilla(grupo, db) == [(a, "Ana Apellido0"), (b, "Nombre1 Apellido1")]
+    _ejecutar(db, "UPDATE individuos SET estado = 'Inactivo' WHERE id = ?", (b,))
+    assert grupos_asistencia.planilla(grupo, db) == [(a, "Ana Apellido0")]
+    _ejecutar(db, "DELETE FROM individuos WHERE id = ?", (a,))
+    assert grupos_asistencia.planilla(grupo, db) == []
+    assert _version_guardada(db, grupo) > version
+
+
+def test_abrir_clase_trae_las_marcas_del_dia(db, monkeypatch):
+    monkeypatch.setattr(registroasistencia, "DB_NAME", db)
+    a, b, ajeno = cargar_personas(db, 3)
+    grupo = grupos_asistencia.crear_grupo("3° A", db)
+    grupos_asistencia.agregar_miembros(grupo, [a, b], db)
+    registroasistencia.marcar_asistencia(a, "2025-03-03", "Presente")
+    registroasistencia.marcar_asistencia(ajeno, "2025-03-03", "Tarde")
+
+    assert grupos_asistencia.abrir_clase(grupo, "2025-03-03", db) == [
+        (a, "Nombre0 Apellido0", "Presente"),
+        (b, "Nombre1 Apellido1", None),
+    ]
+    assert [fila[2] for fila in grupos_asistencia.abrir_clase(None, "2025-03-03", db)] == ["Presente", None, "Tarde"]
+    with pytest.raises(ValueError):
+        grupos_asistencia.abrir_clase(9999, "2025-03-03", db)
+
+
+def test_altas_y_bajas_cierran_su_conexion(db, monkeypatch):
+    a, b = cargar_personas(db, 2)
+    abiertas = []
+    conectar = almacenamiento.conectar
+
+    def conectar_y_anotar(db_name=None):
+        conn = conectar(db_name)
+        abiertas.append(conn)
+        return conn
+    monkeypatch.setattr(almacenamiento, "conectar", conectar_y_anotar)
+
+    grupo = grupos_asistencia.crear_grupo("3° A", db)
+    otro = grupos_asistencia.crear_grupo("3° B", db)
+    grupos_asistencia.agregar_miembros(grupo, [a, b], db)
+    grupos_asistencia.mover_miembro(a, grupo, otro, db)
+    grupos_asistencia.quitar_miembros(grupo, [b], db)
+
+    assert len(abiertas) == 5
+    for conn in abiertas:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
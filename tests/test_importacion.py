@@ -0,0 +1,51 @@
+import io
+
+import pytest
+
+import duplicados
+import importacion_usuarios
+
+pytest.importorskip("flask_sqlalchemy")
+from altadeusuario import Usuario, create_app, db as base, init_db
+
+ARCHIVO = """nombre_completo,dni,email,rol
+Juan Pérez,30111222,juan@example.com,Alumno
+,30111223,sin_nombre@example.com,Alumno
+Ana Gómez,30111222,ana@example.com,Alumno
+Luis Díaz,30111224,juan@example.com,Alumno
+Marta Ruiz,20999999,marta@example.com,Alumno
+Lucía Gomes,30111225,lucia@example.com,Alumno
+Lucia Gómez,30111226,lucia2@example.com,
+Lucia Gómez,30111227,lucia3@example.com,Alumno
+"""
+
+
+def test_importar_informa_errores_y_posibles_duplicados_por_linea(db):
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{db}"})
+    init_db(app)
+    indice = duplicados.IndiceDuplicados()
+    indice.agregar(7, "Juan Perez")
+    with app.app_context():
+        base.session.execute(Usuario.__table__.insert(), {"nombre": "Marta", "apellido": "Ruiz", "dni": "20999999", "rol": "Alumno"})
+        base.session.commit()
+        filas = importacion_usuarios.leer_filas(io.StringIO(ARCHIVO), "csv")
+        reporte = importacion_usuarios.importar_usuarios(base.session, Usuario.__table__, filas, tamano_lote=2, indice=indice)
+        importados = base.session.execute(
+            Usuario.__table__.select().where(Usuario.__table__.c.dni.like("3011122%")).order_by(Usuario.__table__.c.dni)
+        ).all()
+
+    assert reporte["insertados"] == 3
+    assert [(error["linea"], error["error"]) for error in reporte["errores"]] == [
+        (3, "El campo 'nombre_completo' es obligatorio."),
+        (4, "El DNI ya está registrado."),      # Repetido dentro del archivo
+        (5, "El email ya está registrado."),
+        (6, "El DNI ya está registrado."),      # Ya estaba en la base
+        (8, "El campo 'rol' es obligatorio."),
+    ]
+    assert [(fila.nombre, fila.apellido) for fila in importados] == [("Juan", "Pérez"), ("Lucía", "Gomes"), ("Lucia", "Gómez")]
+
+    posibles = {posible["linea"]: posible["candidatos"] for posible in reporte["posibles_duplicados"]}
+    assert posibles[2] == [{"id": 7, "motivos": ["mismo nombre"]}]  # Sin acentos ni mayúsculas
+    assert [candidato["linea"] for candidato in posibles[4]] == [2]  # Mismo DNI que una línea anterior
+    assert [candidato["linea"] for candidato in posibles[9]] == [7]
+    assert 5 not in posibles
@@ -0,0 +1,138 @@
+import contextlib
+import io
+import sqlite3
+
+import pytest
+
+import almacenamiento
+from EditarEliminar import DatabaseManager
+
+from conftest import cargar_personas
+
+
+@pytest.fixture
+def manager(db):
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager = DatabaseManager(db)
+    yield manager
+    manager.close()
+
+
+def test_iter_individuos_no_retiene_la_conexion_del_hilo(manager, db):
+    ids = cargar_personas(db, 5)
+    recorrido = manager.iter_individuos(batch_size=2)
+    primero = next(recorrido)
+    assert getattr(manager.pool._local, "conn", None) is None
+
+    # Dentro del recorrido se puede modificar y confirmar en la conexión del hilo
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert manager.update_individuo(primero["id"], genero="Femenino")
+    restantes = list(recorrido)
+    assert [primero["id"], *(fila["id"] for fila in restantes)] == ids
+    assert manager.get_individuo_by_id(primero["id"])["genero"] == "Femenino"
+
+
+def test_bulk_update_es_una_sola_transaccion(manager, db):
+    ids = cargar_personas(db, 2)
+    conn = almacenamiento.conectar(db)
+    conn.execute('''
+        CREATE TRIGGER falla_genero AFTER UPDATE OF genero ON individuos
+        BEGIN INSERT INTO tabla_inexistente VALUES (NEW.id); END
+    ''')
+    conn.commit()
+    conn.close()
+
+    # El primer grupo (nombre) se aplica y el segundo (genero) falla: no debe quedar nada
+    with pytest.raises(sqlite3.OperationalError):
+        manager.bulk_update_individuos([{"id": ids[0], "nombre": "Cambiado"}, {"id": ids[1], "genero": "Otro"}])
+    assert manager.get_individuo_by_id(ids[0])["nombre"] == "Nombre0"
+
+    with pytest.raises(RuntimeError):
+        with manager.transaction():
+            manager.bulk_update_individuos([{"id": ids[0], "nombre": "Cambiado"}])
+            raise RuntimeError("se deshace todo")
+    assert manager.get_individuo_by_id(ids[0])["nombre"] == "Nombre0"
+
+
+def test_restaurar_conserva_el_estado_anterior(manager, db):
+    activo, inactivo = cargar_personas(db, 2)
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager.bulk_update_individuos([{"id": inactivo, "estado": "Inactivo"}])
+        for individuo_id in (activo, inactivo):
+            assert manager.delete_individuo(individuo_id)
+            assert manager.get_individuo_by_id(individuo_id) is None
+            assert manager.restaurar_individuo(individuo_id)
+    assert manager.get_individuo_by_id(activo)["estado"] == "Activo"
+    assert manager.get_individuo_by_id(inactivo)["estado"] == "Inactivo"
+
+
+def test_la_cache_se_invalida_al_modificar_y_dar_de_baja(manager, db):
+    individuo_id, = cargar_personas(db, 1)
+    dni = manager.get_individuo_by_id(individuo_id)["dni"]
+    assert manager.get_individuo_by_dni(dni)["id"] == individuo_id
+    assert manager.get_individuo_by_dni("99999999") is None  # También se cachea que no existe
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager.update_individuo(individuo_id, genero="Femenino", dni="99999999")
+    assert manager.get_individuo_by_id(individuo_id)["genero"] == "Femenino"
+    assert manager.get_individuo_by_dni(dni) is None
+    assert manager.get_individuo_by_dni("99999999")["id"] == individuo_id
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager.delete_individuo(individuo_id)
+    assert manager.get_individuo_by_id(individuo_id) is None
+    assert manager.get_individuo_by_dni("99999999") is None
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager.restaurar_individuo(individuo_id)
+    assert manager.get_individuo_by_id(individuo_id)["dni"] == "99999999"
+
+
+def test_una_lectura_previa_a_la_invalidacion_no_queda_en_la_cache(manager, db, monkeypatch):
+    individuo_id, = cargar_personas(db, 1)
+    cache_individuo = manager._cache_individuo
+
+    def modificar_antes_de_cachear(individuo, *args):
+        # Otro hilo confirma un cambio entre la lectura y el guardado en la caché
+        monkeypatch.setattr(manager, "_cache_individuo", cache_individuo)
+        with contextlib.redirect_stdout(io.StringIO()):
+            manager.update_individuo(individuo_id, genero="Femenino")
+        cache_individuo(individuo, *args)
+    monkeypatch.setattr(manager, "_cache_individuo", modificar_antes_de_cachear)
+
+    assert manager.get_individuo_by_id(individuo_id)["genero"] is None
+    assert manager.get_individuo_by_id(individuo_id)["genero"] == "Femenino"
+
+
+def _nombres(individuos):
+    return sorted(f"{individuo['nombre']} {individuo['apellido']}" for individuo in individuos)
+
+
+def test_busqueda_por_texto_prefijo_y_exacta(manager):
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager.add_individuo("José María", "Pérez García", "30111222", genero="Masculino")
+        manager.add_individuo("Josefina", "Perales", "30222333", genero="Femenino")
+        baja = manager.add_individuo("Ana", "Pérez", "40111222", genero="Femenino")
+        manager.add_individuo("Ana", "Pérez", "40999888", genero="Femenino")
+        manager.delete_individuo(baja)
+    buscar = manager.get_individuos_by_criteria
+
+    # Texto: por palabras y como prefijo, sin mayúsculas ni acentos ni orden de las palabras
+    assert _nombres(buscar(nombre="jose")) == ["Josefina Perales", "José María Pérez García"]
+    assert _nombres(buscar(nombre="maria jose")) == ["José María Pérez García"]
+    assert _nombres(buscar(apellido="garcia")) == ["José María Pérez García"]
+    assert _nombres(buscar(apellido="perez", genero="fem")) == ["Ana Pérez"]
+    assert _nombres(buscar(dni="3011")) == ["José María Pérez García"]
+
+    # Prefijo: cada campo empieza con el valor, respetando mayúsculas salvo el género
+    assert _nombres(buscar(modo="prefijo", nombre="Jos")) == ["Josefina Perales", "José María Pérez García"]
+    assert buscar(modo="prefijo", nombre="jos") == []
+    assert _nombres(buscar(modo="prefijo", apellido="Pérez", genero="masc")) == ["José María Pérez García"]
+
+    # Exacto: el valor completo
+    assert _nombres(buscar(modo="exacto", apellido="Pérez")) == ["Ana Pérez"]
+    assert _nombres(buscar(modo="exacto", apellido="Pérez", incluir_eliminados=True)) == ["Ana Pérez", "Ana Pérez"]
+    assert _nombres(buscar(modo="exacto", genero="MASCULINO")) == ["José María Pérez García"]
+
+    with pytest.raises(ValueError):
+        buscar(modo="parecido", nombre="Jose")
@@ -0,0 +1,46 @@
+import pytest
+
+import almacenamiento
+import instrumentacion
+
+pytestmark = pytest.mark.skipif(not instrumentacion.ACTIVA, reason="ASISTENCIA_INSTRUMENTACION=0")
+
+
+def _tipos(texto):
+    return dict(linea.split()[2:4] for linea in texto.splitlines() if linea.startswith("# TYPE "))
+
+
+def test_metricas_publicadas(db):
+    conn = almacenamiento.conectar(db)
+    try:
+        conn.execute("SELECT COUNT(*) FROM individuos").fetchall()
+    finally:
+        conn.close()
+    instrumentacion.observar_http("checkin", "/checkin", "POST", 200, 0.007)
+
+    texto = instrumentacion.REGISTRO.texto_prometheus()
+    assert {
+        "asistencia_sql_duracion_segundos": "histogram",
+        "asistencia_sql_filas_total": "counter",
+        "asistencia_sql_errores_total": "counter",
+        "asistencia_sql_lentas_total": "counter",
+        "asistencia_http_duracion_segundos": "histogram",
+    }.items() <= _tipos(texto).items()
+    assert 'asistencia_sql_duracion_segundos_count{origen="sqlite3",operacion="SELECT",tabla="individuos"}' in texto
+    assert 'asistencia_http_duracion_segundos_bucket{servicio="checkin",endpoint="/checkin",metodo="POST",codigo="200",le="0.01"}' in texto
+
+
+def test_registro_y_clasificacion():
+    registro = instrumentacion.Registro()
+    contador = registro.contador("prueba_total", "Prueba.", ("tabla",))
+    assert registro.contador("prueba_total", "Prueba.", ("tabla",)) is contador
+    with pytest.raises(ValueError):
+        registro.histograma("prueba_total", "Prueba.")
+    contador.inc(2, tabla='con "comillas"')
+    assert registro.texto_prometheus() == (
+        "# HELP prueba_total Prueba.\n# TYPE prueba_total counter\n"
+        'prueba_total{tabla="con \\"comillas\\""} 2\n'
+    )
+
+    assert instrumentacion.clasificar("/* x */ SELECT * FROM asistencia a JOIN individuos u") == ("SELECT", "asistencia")
+    assert instrumentacion.clasificar("INSERT INTO grupo_miembros VALUES (1, 2)") == ("INSERT", "grupo_miembros")
@@ -0,0 +1,86 @@
+import sqlite3
+
+import almacenamiento
+import rollups_asistencia
+
+
+def test_actualiza_una_base_v4_con_asistencias(tmp_path):
+    ruta = str(tmp_path / "v4.db")
+    conn = almacenamiento.conectar(ruta)
+    cursor = conn.cursor()
+    for numero, _, migracion in almacenamiento.MIGRACIONES[:4]:
+        migracion(cursor)
+        cursor.execute(f"PRAGMA user_version = {numero}")
+    for i in range(1, 4):
+        cursor.execute("INSERT INTO individuos (nombre, apellido, dni, rol) VALUES ('N', 'A', ?, 'Alumno')", (str(i),))
+        cursor.execute("INSERT INTO asistencia (usuario_id, fecha, estado) VALUES (?, '2025-03-03', 'Presente')", (i,))
+    conn.commit()
+
+    assert almacenamiento.migrar(conn) == almacenamiento.VERSION_ACTUAL
+    assert rollups_asistencia.verificar_rollups(conn) == {}
+    assert conn.execute("SELECT total, presentes FROM asistencia_diaria_rol").fetchall() == [(3, 3)]
+    conn.close()
+
+
+def _base_vieja(ruta, *sentencias):
+    conn = sqlite3.connect(ruta)
+    for sentencia in sentencias:
+        conn.execute(sentencia)
+    conn.commit()
+    conn.close()
+    return ruta
+
+
+def test_migrar_datos_legados_une_usuarios_y_asistencias(db, tmp_path):
+    usuarios_db = _base_vieja(
+        str(tmp_path / "usuarios.db"),
+        "CREATE TABLE usuario (id INTEGER PRIMARY KEY, nombre_completo TEXT, dni TEXT, email TEXT, rol TEXT, estado TEXT)",
+        "INSERT INTO usuario VALUES (1, 'Juan Carlos Pérez', '111', 'juan@example.com', 'Alumno', 'Activo')",
+        "INSERT INTO usuario VALUES (2, 'Ana López', '222', 'ana@example.com', 'Profesor', 'Inactivo')",
+        "INSERT INTO usuario VALUES (3, 'Luis Díaz', '333', 'ocupado@example.com', 'Alumno', 'Activo')",
+    )
+    asistencia_db = _base_vieja(
+        str(tmp_path / "asistencia.db"),
+        "CREATE TABLE usuarios (id INTEGER PRIMARY KEY, nombre TEXT, dni TEXT)",
+        "CREATE TABLE asistencia (usuario_id INTEGER, fecha TEXT, estado TEXT)",
+        "INSERT INTO usuarios VALUES (10, 'Juan', '111'), (20, 'Ana', '222'), (30, 'Nadie', '555')",
+        "INSERT INTO asistencia VALUES (10, '2025-03-03', 'Presente'), (20, '2025-03-03', 'Ausente'), (30, '2025-03-03', 'Presente')",
+    )
+    conn = almacenamiento.conectar(db)
+    conn.execute("INSERT INTO individuos (nombre, apellido, dni) VALUES ('Ana', 'López', '222')")
+    conn.execute("INSERT INTO individuos (nombre, apellido, dni, email) VALUES ('Otra', 'Persona', '999', 'ocupado@example.com')")
+    conn.commit()
+
+    resumen = almacenamiento.migrar_datos_legados(usuarios_db, asistencia_db, db)
+
+    assert resumen == {"usuarios": 2, "usuarios_omitidos": 1, "asistencias": 2, "asistencias_huerfanas": 1}
+    personas = {fila[0]: fila[1:] for fila in conn.execute("SELECT dni, nombre, apellido, email, rol, estado FROM individuos")}
+    assert personas["111"] == ("Juan Carlos", "Pérez", "juan@example.com", "Alumno", "Activo")
+    assert personas["222"] == ("Ana", "López", "ana@example.com", "Profesor", "Inactivo")  # Se completó la que ya estaba
+    assert "333" not in personas
+    assert conn.execute('''
+        SELECT i.dni, a.estado FROM asistencia a JOIN individuos i ON i.id = a.usuario_id ORDER BY i.dni
+    ''').fetchall() == [("111", "Presente"), ("222", "Ausente")]
+    conn.close()
+
+
+def test_migrar_datos_legados_sin_usuarios_en_asistencia_usa_los_ids_de_usuarios_db(db, tmp_path):
+    usuarios_db = _base_vieja(
+        str(tmp_path / "usuarios.db"),
+        "CREATE TABLE usuario (id INTEGER PRIMARY KEY, nombre_completo TEXT, dni TEXT, email TEXT, rol TEXT, estado TEXT)",
+        "INSERT INTO usuario VALUES (7, 'Juan Pérez', '111', NULL, 'Alumno', NULL)",
+    )
+    asistencia_db = _base_vieja(
+        str(tmp_path / "asistencia.db"),
+        "CREATE TABLE asistencia (usuario_id INTEGER, fecha TEXT, estado TEXT)",
+        "INSERT INTO asistencia VALUES (7, '2025-03-03', 'Tarde'), (8, '2025-03-03', 'Presente')",
+    )
+
+    resumen = almacenamiento.migrar_datos_legados(usuarios_db, asistencia_db, db)
+
+    assert resumen == {"usuarios": 1, "usuarios_omitidos": 0, "asistencias": 1, "asistencias_huerfanas": 1}
+    conn = almacenamiento.conectar(db)
+    assert conn.execute("SELECT i.dni, i.estado, a.estado FROM asistencia a JOIN individuos i ON i.id = a.usuario_id").fetchall() == [
+        ("111", "Activo", "Tarde")
+    ]
+    conn.close()
@@ -0,0 +1,28 @@
+import almacenamiento
+import particiones_asistencia
+import registroasistencia
+import reportes_asistencia
+import rollups_asistencia
+
+from conftest import cargar_personas
+
+
+def test_archivar_un_anio_conserva_reportes_y_resumenes(db, monkeypatch):
+    monkeypatch.setattr(registroasistencia, "DB_NAME", db)
+    ids = cargar_personas(db, 4)
+    for fecha in ("2024-11-04", "2024-11-05", "2025-03-03"):
+        registroasistencia.marcar_asistencia_lote(fecha, [(i, "Presente" if i % 2 else "Tarde") for i in ids])
+    conn = almacenamiento.conectar(db)
+    resumenes = conn.execute("SELECT * FROM asistencia_mensual_rol ORDER BY mes, rol").fetchall()
+    reporte = reportes_asistencia.resumen_por_fecha("2024-01-01", "2025-12-31")
+
+    resumen = particiones_asistencia.archivar_anio(2024, db)
+    assert resumen["filas"] == 8
+    assert conn.execute("SELECT COUNT(*) FROM asistencia WHERE fecha < '2025'").fetchone()[0] == 0
+    # Los resúmenes del año archivado quedan como estaban y verificar no los cuenta como diferencia
+    assert rollups_asistencia.verificar_rollups(conn) == {}
+    assert conn.execute("SELECT * FROM asistencia_mensual_rol ORDER BY mes, rol").fetchall() == resumenes
+    # Los reportes leen el archivo
+    assert reportes_asistencia.resumen_por_fecha("2024-01-01", "2025-12-31") == reporte
+    assert [fila["fecha"] for fila in reporte] == ["2024-11-04", "2024-11-05", "2025-03-03"]
+    conn.close()
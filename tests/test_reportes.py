@@ -0,0 +1,55 @@
+import almacenamiento
+import particiones_asistencia
+import registroasistencia
+import reportes_asistencia
+
+from conftest import cargar_personas
+
+
+def _cargar(db, monkeypatch):
+    monkeypatch.setattr(registroasistencia, "DB_NAME", db)
+    a, b, c = cargar_personas(db, 3)
+    conn = almacenamiento.conectar(db)
+    conn.execute("UPDATE individuos SET rol = 'Profesor' WHERE id = ?", (c,))
+    conn.commit()
+    conn.close()
+    registroasistencia.marcar_asistencia_lote("2025-03-03", [(a, "Presente"), (b, "Ausente"), (c, "Tarde")])
+    registroasistencia.marcar_asistencia_lote("2025-03-04", [(a, "Presente"), (b, "Justificado"), (c, "Presente")])
+    registroasistencia.marcar_asistencia(a, "2025-03-05", "Ausente")
+    registroasistencia.eliminar_asistencia(a, "2025-03-05")  # Dada de baja: no cuenta
+    return a, b, c
+
+
+def _conteos(fila):
+    return {clave: fila[clave] for clave in ("total", "presentes", "ausentes", "tardes", "justificados")}
+
+
+def test_totales_por_persona_rol_y_rango(db, monkeypatch):
+    a, b, c = _cargar(db, monkeypatch)
+
+    por_persona = {fila["usuario_id"]: fila for fila in reportes_asistencia.resumen_por_persona("2025-03-03", "2025-03-05")}
+    assert _conteos(por_persona[a]) == {"total": 2, "presentes": 2, "ausentes": 0, "tardes": 0, "justificados": 0}
+    assert _conteos(por_persona[b]) == {"total": 2, "presentes": 0, "ausentes": 1, "tardes": 0, "justificados": 1}
+    assert por_persona[b]["tasa_ausente"] == 50.0
+    assert [fila["usuario_id"] for fila in reportes_asistencia.resumen_por_persona(usuario_id=c)] == [c]
+
+    por_rol = {fila["rol"]: fila for fila in reportes_asistencia.resumen_por_rol()}
+    assert _conteos(por_rol["Alumno"]) == {"total": 4, "presentes": 2, "ausentes": 1, "tardes": 0, "justificados": 1}
+    assert _conteos(por_rol["Profesor"]) == {"total": 2, "presentes": 1, "ausentes": 0, "tardes": 1, "justificados": 0}
+    assert por_rol["Alumno"]["tasa_presente"] == 50.0
+
+    assert [fila["total"] for fila in reportes_asistencia.resumen_por_fecha("2025-03-04", "2025-03-04")] == [3]
+    general = reportes_asistencia.resumen_general()
+    assert (general["desde"], general["hasta"], general["total"], general["tasa_presente"]) == ("2025-03-03", "2025-03-04", 6, 50.0)
+
+
+def test_totales_suman_la_base_y_los_anios_archivados(db, monkeypatch):
+    a, b, c = _cargar(db, monkeypatch)
+    registroasistencia.marcar_asistencia_lote("2024-11-04", [(a, "Presente"), (b, "Ausente")])
+    particiones_asistencia.archivar_anio(2024, db)
+
+    general = reportes_asistencia.resumen_general("2024-01-01", "2025-12-31")
+    assert (general["desde"], general["total"], general["presentes"], general["ausentes"]) == ("2024-11-04", 8, 4, 2)
+    por_persona = {fila["usuario_id"]: fila for fila in reportes_asistencia.resumen_por_persona("2024-01-01", "2025-12-31")}
+    assert _conteos(por_persona[a]) == {"total": 3, "presentes": 3, "ausentes": 0, "tardes": 0, "justificados": 0}
+    assert [fila["total"] for fila in reportes_asistencia.resumen_por_rol("2024-01-01", "2024-12-31")] == [2]
@@ -0,0 +1,43 @@
+import almacenamiento
+import registroasistencia
+import rollups_asistencia
+
+from conftest import cargar_personas
+
+
+def test_main_verifica_y_reconstruye(db, capsys, monkeypatch):
+    ids = cargar_personas(db, 3)
+    monkeypatch.setattr(registroasistencia, "DB_NAME", db)
+    registroasistencia.marcar_asistencia_lote("2025-03-03", [(i, "Presente") for i in ids])
+    conn = almacenamiento.conectar(db)
+    conn.execute("UPDATE asistencia_mensual_rol SET presentes = presentes + 1")
+    conn.commit()
+    conn.close()
+
+    assert rollups_asistencia.main(["verificar", "--db", db]) == 1
+    assert rollups_asistencia.main(["reconstruir", "--db", db]) == 0
+    assert rollups_asistencia.main(["--db", db]) == 0
+    assert "coinciden" in capsys.readouterr().out
+
+
+
+def test_verificar_tras_bajas_y_restauraciones(db, monkeypatch):
+    monkeypatch.setattr(registroasistencia, "DB_NAME", db)
+    ids = cargar_personas(db, 4)
+    for fecha in ("2025-03-03", "2025-03-04", "2025-04-01"):
+        registroasistencia.marcar_asistencia_lote(fecha, [(i, "Presente" if i % 2 else "Tarde") for i in ids])
+    conn = almacenamiento.conectar(db)
+
+    # Baja y restauración de una persona (arrastra sus asistencias) y de una asistencia suelta
+    conn.execute("UPDATE individuos SET eliminado_en = ? WHERE id = ?", (almacenamiento.ahora(), ids[0]))
+    conn.commit()
+    assert rollups_asistencia.verificar_rollups(conn) == {}
+    assert conn.execute("SELECT SUM(total) FROM asistencia_mensual_rol").fetchone()[0] == 9
+    assert registroasistencia.eliminar_asistencia(ids[1], "2025-03-04")
+    assert rollups_asistencia.verificar_rollups(conn) == {}
+    conn.execute("UPDATE individuos SET eliminado_en = NULL WHERE id = ?", (ids[0],))
+    conn.commit()
+    registroasistencia.marcar_asistencia(ids[1], "2025-03-04", "Ausente")
+    assert rollups_asistencia.verificar_rollups(conn) == {}
+    assert conn.execute("SELECT SUM(total), SUM(ausentes) FROM asistencia_mensual_rol").fetchone() == (12, 1)
+    conn.close()